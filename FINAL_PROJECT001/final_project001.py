@@ -1,32 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.openapi.models import Example
 from pydantic import RootModel
 from pydantic import BaseModel
-from typing import List, Dict, Optional
-import pandas as pd
+from typing import List, Dict, Optional, TYPE_CHECKING
+import numpy as np
 import pickle
 import os
 import json
-from datetime import datetime
-from sklearn.linear_model import LinearRegression
+import base64
+import bisect
+import importlib
+import hashlib
+from datetime import datetime, timedelta
 import sqlite3
+import threading
+import queue
+from collections import OrderedDict, Counter
+
+if TYPE_CHECKING:  # sklearn is imported on first use, see fit_linear_chunked
+    from sklearn.linear_model import LinearRegression
 
 app = FastAPI(title="ML Model Training and Prediction API")
 
 MODELS_DIR = "models"
 DB_FILE = "usage.db"
+MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+CHUNK_ROWS = 100000
+WARMUP_ENABLED = False   # Preload recent models at startup; /ready answers 503 until done
+WARMUP_MODELS = 20
 os.makedirs(MODELS_DIR, exist_ok=True)
 
-############ DATASET ############
-df = pd.read_csv("employee_data.csv")
-
-print(df.head())
-
-print("CSV columns:", df.columns.tolist())
-
 ############ Database Setup ############
 def init_db():
     conn = sqlite3.connect(DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")  # readers (/usage) do not block the log writer
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS usage_logs (
@@ -37,35 +45,356 @@ def init_db():
             timestamp TEXT NOT NULL
         )
     """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_usage_user_action_ts
+        ON usage_logs (user_id, action, timestamp)
+    """)
+    # Aggregates kept up to date by the log writer, so /usage never scans usage_logs
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS usage_counters (
+            user_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, action)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS usage_rollups (
+            user_id TEXT NOT NULL,
+            action TEXT NOT NULL,
+            period TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, action, period, bucket)
+        )
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rollups_period_bucket
+        ON usage_rollups (period, bucket)
+    """)
     conn.commit()
+    # Databases created before the aggregates existed: build them once from the log
+    if (c.execute("SELECT 1 FROM usage_counters LIMIT 1").fetchone() is None
+            and c.execute("SELECT 1 FROM usage_logs LIMIT 1").fetchone() is not None):
+        rebuild_usage_aggregates(conn)
     conn.close()
 
+# period -> length of the ISO timestamp prefix that names its bucket
+ROLLUP_PERIODS = {"hour": 13, "day": 10}
+
+def update_usage_aggregates(conn, rows):
+    """Add a batch of (user_id, action, model_name, timestamp) rows to the aggregates."""
+    counts = Counter((r[0], r[1]) for r in rows)
+    conn.executemany("""
+        INSERT INTO usage_counters (user_id, action, count) VALUES (?, ?, ?)
+        ON CONFLICT (user_id, action) DO UPDATE SET count = count + excluded.count
+    """, [(u, a, n) for (u, a), n in counts.items()])
+    buckets = Counter((r[0], r[1], period, r[3][:size])
+                      for r in rows for period, size in ROLLUP_PERIODS.items())
+    conn.executemany("""
+        INSERT INTO usage_rollups (user_id, action, period, bucket, count) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, action, period, bucket) DO UPDATE SET count = count + excluded.count
+    """, [(*key, n) for key, n in buckets.items()])
+
+def rebuild_usage_aggregates(conn=None):
+    """Recompute usage_counters and usage_rollups from usage_logs in one transaction."""
+    own = conn is None
+    if own:
+        conn = sqlite3.connect(DB_FILE)
+    with conn:
+        conn.execute("DELETE FROM usage_counters")
+        conn.execute("DELETE FROM usage_rollups")
+        conn.execute("""
+            INSERT INTO usage_counters (user_id, action, count)
+            SELECT user_id, action, COUNT(*) FROM usage_logs GROUP BY user_id, action
+        """)
+        for period, size in ROLLUP_PERIODS.items():
+            conn.execute("""
+                INSERT INTO usage_rollups (user_id, action, period, bucket, count)
+                SELECT user_id, action, ?, substr(timestamp, 1, ?), COUNT(*)
+                FROM usage_logs GROUP BY user_id, action, substr(timestamp, 1, ?)
+            """, (period, size, size))
+    if own:
+        conn.close()
+
+############ Usage log writer ############
+# Requests only queue the row; one background thread inserts the queued rows
+# in a single transaction per batch. When the queue is full rows are dropped
+# (counted in usage_log_stats) rather than slowing the request down.
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 500
+LOG_FLUSH_INTERVAL = 1.0
+_log_queue = queue.Queue(LOG_QUEUE_SIZE)
+_log_stop = object()
+_log_thread = None
+_log_lock = threading.Lock()
+usage_log_stats = {"written": 0, "batches": 0, "dropped": 0, "failed": 0}
+
 def log_action(user_id: str, action: str, model_name: Optional[str] = None):
+    global _log_thread
+    if _log_thread is None:
+        with _log_lock:
+            if _log_thread is None:
+                _log_thread = threading.Thread(target=_log_writer, name="usage-log-writer", daemon=True)
+                _log_thread.start()
+    try:
+        _log_queue.put_nowait((user_id, action, model_name, datetime.utcnow().isoformat()))
+    except queue.Full:
+        with _log_lock:
+            usage_log_stats["dropped"] += 1
+
+def _log_writer():
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL; fsync at checkpoints only
+    stopping = False
+    while not stopping:
+        try:
+            item = _log_queue.get(timeout=LOG_FLUSH_INTERVAL)
+        except queue.Empty:
+            continue
+        batch = []
+        while True:
+            if item is _log_stop:
+                stopping = True
+            else:
+                batch.append(item)
+            if len(batch) >= LOG_BATCH_SIZE:
+                break
+            try:
+                item = _log_queue.get_nowait()
+            except queue.Empty:
+                break
+        if not batch:
+            continue
+        try:
+            with conn:  # one transaction per batch, log rows and aggregates together
+                conn.executemany("""
+                    INSERT INTO usage_logs (user_id, action, model_name, timestamp)
+                    VALUES (?, ?, ?, ?)
+                """, batch)
+                update_usage_aggregates(conn, batch)
+            with _log_lock:
+                usage_log_stats["written"] += len(batch)
+                usage_log_stats["batches"] += 1
+        except sqlite3.Error as e:
+            print(f"Dropped {len(batch)} usage log rows: {e}")
+            with _log_lock:
+                usage_log_stats["failed"] += len(batch)
+    conn.close()
+
+@app.on_event("shutdown")
+def flush_usage_log():
+    if _log_thread is not None:
+        _log_queue.put(_log_stop)
+        _log_thread.join(10)
+
+def get_usage_summary(user_id: str):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
-    c.execute("""
-        INSERT INTO usage_logs (user_id, action, model_name, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, action, model_name, datetime.utcnow().isoformat()))
-    conn.commit()
+    c.execute("SELECT action, count FROM usage_counters WHERE user_id=?", (user_id,))
+    counts = dict(c.fetchall())
     conn.close()
+    return {"models_trained": counts.get("train", 0), "predictions_made": counts.get("predict", 0)}
 
-def get_usage_summary(user_id: str):
+def get_usage_rollup(period: str, since: str, user_id: Optional[str] = None):
     conn = sqlite3.connect(DB_FILE)
     c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM usage_logs WHERE user_id=? AND action='train'", (user_id,))
-    trained = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM usage_logs WHERE user_id=? AND action='predict'", (user_id,))
-    predictions = c.fetchone()[0]
+    if user_id is None:
+        c.execute("""
+            SELECT bucket, action, SUM(count) FROM usage_rollups
+            WHERE period=? AND bucket>=? GROUP BY bucket, action ORDER BY bucket
+        """, (period, since))
+    else:
+        c.execute("""
+            SELECT bucket, action, count FROM usage_rollups
+            WHERE user_id=? AND period=? AND bucket>=? ORDER BY bucket
+        """, (user_id, period, since))
+    rows = c.fetchall()
     conn.close()
-    return {"models_trained": trained, "predictions_made": predictions}
+    return [{"bucket": b, "action": a, "count": n} for b, a, n in rows]
 
 init_db()
 
+############ Model index ############
+class ModelIndex:
+    """Registry of saved models backed by an append-only JSON-lines file.
+
+    save_model appends one line per save (the last line for a name wins), so
+    /models never lists the directory or opens the _meta.json files. Each
+    request picks up lines appended by other workers since its last read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.models = {}          # name -> metadata
+        self.names = []           # sorted names, for cursor pagination
+        self.by_owner = {}        # owner -> sorted names
+        self.by_type = {}         # model type -> sorted names
+        self.offset = 0           # bytes of the index file already applied
+        self.inode = None
+        self.lines = 0
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            self._rebuild_from_meta_files()
+        self.refresh()
+        if self.lines > 2 * len(self.models) + 100:
+            self._compact()
+
+    def _rebuild_from_meta_files(self):
+        # One-off migration for model directories created before the index existed
+        with open(self.path + ".tmp", "w") as f:
+            for file in sorted(os.listdir(MODELS_DIR)):
+                if file.endswith("_meta.json"):
+                    with open(os.path.join(MODELS_DIR, file)) as meta:
+                        f.write(json.dumps(json.load(meta)) + "\n")
+        os.replace(self.path + ".tmp", self.path)
+
+    def _compact(self):
+        with self.lock:
+            with open(self.path + ".tmp", "w") as f:
+                for name in self.names:
+                    f.write(json.dumps(self.models[name]) + "\n")
+            os.replace(self.path + ".tmp", self.path)
+            st = os.stat(self.path)
+            self.offset, self.inode = st.st_size, st.st_ino
+            self.lines = len(self.names)
+
+    def refresh(self):
+        """Apply lines appended since the last call (cheap when nothing changed)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        size = st.st_size
+        with self.lock:
+            if st.st_ino != self.inode:  # first read, or compacted by another worker: start over
+                self.models, self.names, self.by_owner, self.by_type = {}, [], {}, {}
+                self.offset = self.lines = 0
+                self.inode = st.st_ino
+            if size == self.offset:
+                return
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            complete = data[:data.rfind(b"\n") + 1]  # ignore a line still being written
+            for line in complete.splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+                    self.lines += 1
+            self.offset += len(complete)
+
+    def _apply(self, metadata: dict):
+        name = metadata["model_name"]
+        old = self.models.get(name)
+        if old is None:
+            bisect.insort(self.names, name)
+        else:
+            self._unlink(self.by_owner, old.get("owner"), name)
+            self._unlink(self.by_type, old.get("type"), name)
+        self.models[name] = metadata
+        bisect.insort(self.by_owner.setdefault(metadata.get("owner"), []), name)
+        bisect.insort(self.by_type.setdefault(metadata.get("type"), []), name)
+
+    @staticmethod
+    def _unlink(groups, key, name):
+        names = groups.get(key, [])
+        i = bisect.bisect_left(names, name)
+        if i < len(names) and names[i] == name:
+            del names[i]
+
+    def add(self, metadata: dict):
+        line = json.dumps(metadata) + "\n"
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+        self.refresh()
+
+    def page(self, owner: Optional[str], model_type: Optional[str], after: Optional[str], limit: int):
+        """Up to limit models named after `after`, plus whether more follow."""
+        with self.lock:
+            if owner is not None and model_type is not None:
+                a, b = self.by_owner.get(owner, []), self.by_type.get(model_type, [])
+                names, other = (a, set(b)) if len(a) <= len(b) else (b, set(a))
+            elif owner is not None:
+                names, other = self.by_owner.get(owner, []), None
+            elif model_type is not None:
+                names, other = self.by_type.get(model_type, []), None
+            else:
+                names, other = self.names, None
+            start = bisect.bisect_right(names, after) if after is not None else 0
+            result = []
+            for name in names[start:] if other is None else (n for n in names[start:] if n in other):
+                if len(result) == limit:
+                    return result, True
+                result.append(self.models[name])
+            return result, False
+
+    def version(self) -> str:
+        with self.lock:
+            return f"{self.offset}-{self.lines}"
+
+############ Model cache ############
+class ModelCache:
+    """LRU cache of loaded models, bounded by the size of their files on disk."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # name -> (stamp, size, (model, metadata, predict_row))
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, name: str, stamp):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(name)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, name: str, stamp, size: int, value):
+        with self.lock:
+            self._drop(name)
+            if size > self.max_bytes:
+                return
+            self.entries[name] = (stamp, size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, name: str):
+        with self.lock:
+            self._drop(name)
+
+    def _drop(self, name: str):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "models": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+model_cache = ModelCache(MODEL_CACHE_MAX_BYTES)
+model_index = ModelIndex(os.path.join(MODELS_DIR, "_index.jsonl"))
+
 ############ Model save/load ############
-def save_model(model_name: str, model, features: List[str], label: str):
+def save_model(model_name: str, model, features: List[str], label: str, owner: Optional[str] = None):
     model_path = os.path.join(MODELS_DIR, f"{model_name}.pkl")
     meta_path = os.path.join(MODELS_DIR, f"{model_name}_meta.json")
+    model_cache.invalidate(model_name)
     with open(model_path, "wb") as f:
         pickle.dump(model, f)
     metadata = {
@@ -73,22 +402,129 @@ def save_model(model_name: str, model, features: List[str], label: str):
         "features": features,
         "label": label,
         "type": type(model).__name__,
+        "owner": owner,
         "trained_at": datetime.utcnow().isoformat()
     }
     with open(meta_path, "w") as f:
         json.dump(metadata, f)
-
-def load_model(model_name: str):
+    model_index.add(metadata)
+
+def compile_predictor(model, features: List[str]):
+    """Return predict_row(values) with the feature order fixed once, at load time."""
+    if type(model).__name__ == "LinearRegression" and np.ndim(model.coef_) == 1:
+        # Same X @ coef.T + intercept that LinearRegression.predict computes, without pandas
+        coef_t = np.asarray(model.coef_, dtype=np.float64).T
+        intercept = model.intercept_
+        def predict_row(values: List[float]) -> float:
+            return float((np.array([values], dtype=np.float64) @ coef_t + intercept)[0])
+    else:
+        import pandas as pd
+        def predict_row(values: List[float]) -> float:
+            return float(model.predict(pd.DataFrame([values], columns=features))[0])
+    return predict_row
+
+def _load(model_name: str):
     model_path = os.path.join(MODELS_DIR, f"{model_name}.pkl")
     meta_path = os.path.join(MODELS_DIR, f"{model_name}_meta.json")
-    if not os.path.exists(model_path) or not os.path.exists(meta_path):
+    try:
+        model_st = os.stat(model_path)
+        meta_st = os.stat(meta_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Model not found")
+    stamp = (model_st.st_mtime_ns, model_st.st_size, meta_st.st_mtime_ns, meta_st.st_size)
+    cached = model_cache.get(model_name, stamp)
+    if cached is not None:
+        return cached
     with open(model_path, "rb") as f:
         model = pickle.load(f)
     with open(meta_path, "r") as f:
         metadata = json.load(f)
+    loaded = (model, metadata, compile_predictor(model, metadata["features"]))
+    model_cache.put(model_name, stamp, model_st.st_size + meta_st.st_size, loaded)
+    return loaded
+
+def load_model(model_name: str):
+    model, metadata, _ = _load(model_name)
     return model, metadata
 
+############ Streaming training ############
+def read_chunks(fileobj, columns: List[str], features: List[str], label: str):
+    """Yield (X, y) float arrays CHUNK_ROWS rows at a time, parsing only the given columns."""
+    import pandas as pd
+    reader = pd.read_csv(fileobj, usecols=columns, dtype={c: np.float64 for c in columns},
+                         chunksize=CHUNK_ROWS)
+    rows = 0
+    for chunk in reader:
+        X, y = chunk[features].to_numpy(), chunk[label].to_numpy()
+        # sklearn's fit rejected these; the chunked fit would return NaN coefficients instead
+        if not (np.isfinite(X).all() and np.isfinite(y).all()):
+            bad = ~(np.isfinite(X).all(axis=1) & np.isfinite(y))
+            raise ValueError(f"Input contains NaN or infinite values (first at data row "
+                             f"{rows + int(np.argmax(bad)) + 1}); fill or drop empty cells")
+        rows += len(chunk)
+        yield X, y
+
+def fit_linear_chunked(chunks, features: List[str]) -> "LinearRegression":
+    """Least squares from X^T X and X^T y accumulated per chunk, so memory does not grow with rows."""
+    from sklearn.linear_model import LinearRegression
+    d = len(features)
+    n, shift_x, shift_y = 0, None, 0.0
+    sx, sy = np.zeros(d), 0.0
+    sxx, sxy = np.zeros((d, d)), np.zeros(d)
+    for X, y in chunks:
+        if len(X) == 0:
+            continue
+        if shift_x is None:  # shift by the first chunk's mean to keep the sums well conditioned
+            shift_x, shift_y = X.mean(axis=0), float(y.mean())
+        Xc, yc = X - shift_x, y - shift_y
+        n += len(X)
+        sx += Xc.sum(axis=0)
+        sy += float(yc.sum())
+        sxx += Xc.T @ Xc
+        sxy += Xc.T @ yc
+    if n == 0:
+        raise HTTPException(status_code=400, detail="CSV has no data rows")
+    mean_x, mean_y = sx / n, sy / n
+    coef = np.linalg.lstsq(sxx - n * np.outer(mean_x, mean_x), sxy - n * mean_x * mean_y, rcond=None)[0]
+    model = LinearRegression()
+    model.coef_ = coef
+    model.intercept_ = float((mean_y + shift_y) - (mean_x + shift_x) @ coef)
+    model.n_features_in_ = d
+    model.feature_names_in_ = np.asarray(features, dtype=object)
+    return model
+
+############ Warm-up ############
+# pandas and sklearn are imported on first use, so the app starts quickly and
+# the first /train or /predict pays for them instead. With WARMUP_ENABLED a
+# background thread pays at startup and loads the WARMUP_MODELS most recently
+# trained models into the cache; /ready answers 503 until it is done.
+warmup_status = {"status": "READY", "models": 0, "loaded": 0, "errors": 0}
+
+def _warm_up():
+    try:
+        for module in ("pandas", "sklearn.linear_model"):
+            importlib.import_module(module)
+        model_index.refresh()
+        with model_index.lock:
+            recent = sorted(model_index.models.values(), key=lambda m: m.get("trained_at") or "",
+                            reverse=True)[:WARMUP_MODELS]
+        warmup_status["models"] = len(recent)
+        for metadata in reversed(recent):  # newest loaded last, so evicted last
+            try:
+                _load(metadata["model_name"])
+                warmup_status["loaded"] += 1
+            except Exception as e:
+                print(f"Warm-up could not load model {metadata['model_name']}: {e}")
+                warmup_status["errors"] += 1
+    finally:
+        warmup_status["status"] = "READY"
+
+@app.on_event("startup")
+def start_warm_up():
+    if WARMUP_ENABLED:
+        warmup_status["status"] = "WARMING"
+        threading.Thread(target=_warm_up, daemon=True).start()
+
 ############ Pydantic Models ############
 class PredictRequest(RootModel[Dict[str, float]]):
     pass
@@ -103,12 +539,14 @@ async def train_model(
     user_id: str = Form(...),
     model_params: Optional[str] = Form(None),
 ):
-    # --- Load CSV ---
-    df = pd.read_csv(file.file)
+    # --- Read CSV header only; rows are streamed below ---
+    import pandas as pd
+    header = pd.read_csv(file.file, nrows=0).columns
+    file.file.seek(0)
 
     # --- Clean CSV columns ---
-    df.columns = df.columns.str.strip()  # remove spaces
-    print("CSV columns after strip:", df.columns.tolist())
+    stripped = [str(c).strip() for c in header]  # remove spaces
+    print("CSV columns after strip:", stripped)
 
     # --- Parse features string ---
     try:
@@ -126,28 +564,30 @@ async def train_model(
     label = label.strip()
 
     # --- Optional: lowercase everything to avoid case issues ---
-    df.columns = df.columns.str.lower()
+    columns = [c.lower() for c in stripped]
     features_list = [f.lower() for f in features_list]
     label = label.lower()
 
     # --- Validate label ---
-    if label not in df.columns:
-        raise HTTPException(status_code=400, detail=f"Label '{label}' not found in CSV columns: {df.columns.tolist()}")
+    if label not in columns:
+        raise HTTPException(status_code=400, detail=f"Label '{label}' not found in CSV columns: {columns}")
 
     # --- Validate features ---
-    missing_features = [f for f in features_list if f not in df.columns]
+    missing_features = [f for f in features_list if f not in columns]
     if missing_features:
-        raise HTTPException(status_code=400, detail=f"Features not found in CSV: {missing_features}. CSV columns: {df.columns.tolist()}")
-
-    # --- Train model ---
-    X = df[features_list]
-    y = df[label]
+        raise HTTPException(status_code=400, detail=f"Features not found in CSV: {missing_features}. CSV columns: {columns}")
 
-    model = LinearRegression()
-    model.fit(X, y)
+    # --- Train model (only the needed columns, in bounded chunks) ---
+    raw = dict(zip(columns, header))
+    raw_features = [raw[f] for f in features_list]
+    usecols = list(dict.fromkeys(raw_features + [raw[label]]))
+    try:
+        model = fit_linear_chunked(read_chunks(file.file, usecols, raw_features, raw[label]), features_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV data: {str(e)}")
 
     # --- Save model ---
-    save_model(model_name, model, features_list, label)
+    save_model(model_name, model, features_list, label, owner=user_id)
 
     # --- Log action ---
     log_action(user_id, "train", model_name)
@@ -167,7 +607,7 @@ class PredictRequest(BaseModel):
 
 @app.post("/predict/{model_name}")
 async def predict(model_name: str, request: PredictRequest):
-    model, metadata = load_model(model_name)
+    _, metadata, predict_row = _load(model_name)
     required_features = metadata["features"]
     data = request.features
 
@@ -176,9 +616,8 @@ async def predict(model_name: str, request: PredictRequest):
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing features: {missing}")
 
-    # Predict
-    X = pd.DataFrame([data])
-    pred = model.predict(X)[0]
+    # Predict (values in the order the model was trained on)
+    pred = predict_row([data[f] for f in required_features])
 
     # Log usage
     log_action(request.user_id, "predict", model_name)
@@ -186,17 +625,73 @@ async def predict(model_name: str, request: PredictRequest):
     return {"prediction": float(pred), "model": model_name}
 
 @app.get("/models")
-async def list_models():
-    models = []
-    for file in os.listdir(MODELS_DIR):
-        if file.endswith("_meta.json"):
-            with open(os.path.join(MODELS_DIR, file)) as f:
-                models.append(json.load(f))
-    return models
+async def list_models(
+    request: Request,
+    owner: Optional[str] = None,
+    algorithm: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+):
+    model_index.refresh()
+    limit = max(1, min(limit, 1000))
+    try:
+        after = base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode() if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Same index state + same query = same page, so the ETag needs no page scan
+    etag = '"' + hashlib.sha1(f"{model_index.version()}|{owner}|{algorithm}|{cursor}|{limit}".encode()).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    models, more = model_index.page(owner, algorithm, after, limit)  # algorithm: the model's "type"
+    next_cursor = base64.urlsafe_b64encode(models[-1]["model_name"].encode()).decode() if more else None
+    return JSONResponse({"models": models, "next_cursor": next_cursor}, headers={"ETag": etag})
+
+@app.get("/ready")
+async def ready():
+    return JSONResponse(warmup_status, status_code=200 if warmup_status["status"] == "READY" else 503)
+
+@app.get("/admin/cache/models")
+async def model_cache_stats():
+    return model_cache.stats()
+
+@app.get("/admin/usage/log")
+async def usage_log_status():
+    with _log_lock:
+        return {"queued": _log_queue.qsize(), **usage_log_stats}
+
+def rollup_since(period: str, last: int) -> str:
+    if last < 1:
+        raise HTTPException(status_code=400, detail="last must be at least 1")
+    step = timedelta(hours=1) if period == "hour" else timedelta(days=1)
+    try:
+        return (datetime.utcnow() - step * (last - 1)).isoformat()[:ROLLUP_PERIODS[period]]
+    except OverflowError:
+        return ""  # further back than datetime goes: every bucket
 
 @app.get("/usage/{user_id}")
-async def user_usage(user_id: str):
+async def user_usage(user_id: str, period: Optional[str] = None, last: int = 24):
     summary = get_usage_summary(user_id)
-    return {"user": user_id, **summary}
-
+    if period is None:
+        return {"user": user_id, **summary}
+    if period not in ROLLUP_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {list(ROLLUP_PERIODS)}")
+    rollup = get_usage_rollup(period, rollup_since(period, last), user_id)
+    return {"user": user_id, **summary, "period": period, "rollup": rollup}
+
+@app.get("/admin/usage")
+async def admin_usage(period: str = "day", last: int = 30):
+    if period not in ROLLUP_PERIODS:
+        raise HTTPException(status_code=400, detail=f"period must be one of {list(ROLLUP_PERIODS)}")
+    conn = sqlite3.connect(DB_FILE)
+    c = conn.cursor()
+    c.execute("SELECT action, SUM(count), COUNT(*) FROM usage_counters GROUP BY action")
+    totals = {action: {"count": n, "users": users} for action, n, users in c.fetchall()}
+    conn.close()
+    return {"totals": totals, "period": period, "rollup": get_usage_rollup(period, rollup_since(period, last))}
 
+@app.post("/admin/usage/rebuild")
+async def admin_usage_rebuild():
+    rebuild_usage_aggregates()
+    return {"status": "rebuilt"}
@@ -0,0 +1,174 @@
+import copy
+import numpy as np
+from backend import model_format, predictors
+from backend.ingest import read_arrays, fit_linear_streaming, LinearStats, linear_model_from_stats, read_chunks
+from backend.knn_index import build_knn, IVFKNNRegressor, KNN_INDEXES
+from backend.predictors import LinearPredictor, KNNPredictor, IVFPredictor
+from frontend.config import KNN_LEAF_SIZE, KNN_N_PROBE
+
+###################### ALGORITHM REGISTRY ######################
+# Every trainable model type is one Algorithm: its form parameters, how to
+# fit it from an uploaded CSV, and for each estimator class it can produce,
+# the serializer (backend.model_format) and compiled predictor
+# (backend.predictors) to use. /create/{algo}, /models/{model}/predict, tuning,
+# batching and the caches all go through these tables, so adding a type is
+# one register() call. An optional append hook lets /models/{name}/append add
+# rows to a saved model at a cost that follows the new rows, not the history.
+
+
+class Param:
+    """One form field of /create/{algo}."""
+
+    def __init__(self, name, cast, default, check=None, choices=None, help=""):
+        self.name = name
+        self.cast = cast
+        self.default = default
+        self.check = check
+        self.choices = choices
+        self.help = help
+
+    def parse(self, raw):
+        try:
+            value = self.default if raw is None or raw == "" else self.cast(raw)
+        except ValueError:
+            raise ValueError(f"{self.name} must be of type {self.cast.__name__}, got {raw!r}") from None
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{self.name} must be one of {list(self.choices)}")
+        if self.check is not None and not self.check(value):
+            raise ValueError(f"Invalid {self.name}: {value} ({self.help})")
+        return value
+
+    def schema(self):
+        return {"name": self.name, "type": self.cast.__name__, "default": self.default,
+                "choices": list(self.choices) if self.choices is not None else None, "help": self.help}
+
+
+class Algorithm:
+    def __init__(self, name, title, params, fit, predictors=None, serializers=None, prepare=None,
+                 append=None):
+        self.name = name
+        self.title = title
+        self.params = params
+        self.fit = fit                      # fit(csv_path, features, label, params, report) -> estimator
+        self.predictors = predictors or {}  # estimator class name -> Predictor subclass
+        self.serializers = serializers or {}  # estimator class name -> model_format entry
+        self.prepare = prepare              # optional: drop/adjust params after parsing
+        self.append = append                # optional: append(model, csv_path, features, label, report) -> estimator
+
+    def parse_params(self, form):
+        """Read and validate this algorithm's parameters from a mapping of raw form values."""
+        params = {p.name: p.parse(form.get(p.name)) for p in self.params}
+        return self.prepare(params) if self.prepare else params
+
+    def schema(self):
+        return {"name": self.name, "title": self.title, "params": [p.schema() for p in self.params],
+                "appendable": self.append is not None}
+
+
+ALGORITHMS = {}
+
+
+def register(algorithm):
+    ALGORITHMS[algorithm.name] = algorithm
+    model_format.ESTIMATORS.update(algorithm.serializers)
+    predictors.PREDICTORS.update(algorithm.predictors)
+    return algorithm
+
+
+def get_algorithm(name):
+    algorithm = ALGORITHMS.get(name)
+    if algorithm is None:
+        raise ValueError(f"Unknown algorithm '{name}', expected one of {list(ALGORITHMS)}")
+    return algorithm
+
+
+###################### BUILT-IN ALGORITHMS ######################
+def _fit_linear(csv_path, features, label, params, report):
+    # Fit from X^T X / X^T y so memory does not grow with the row count
+    return fit_linear_streaming(csv_path, features, label)
+
+
+def _fit_ridge(csv_path, features, label, params, report):
+    # Closed form from the same sufficient statistics, with the L2 penalty added
+    stats = LinearStats(len(features))
+    for X, y in read_chunks(csv_path, features, label):
+        stats.update(X, y)
+    return linear_model_from_stats(stats, features, params["alpha"])
+
+
+def _fit_knn(csv_path, features, label, params, report):
+    import pandas as pd
+    X, y = read_arrays(csv_path, features, label)
+    report(0.4)
+    return build_knn(params).fit(pd.DataFrame(X, columns=features, copy=False), y)
+
+
+def _append_linear(model, csv_path, features, label, report):
+    # Fold the new rows into the stored X^T X / X^T y and solve again
+    stats = getattr(model, "stats_", None)
+    if stats is None or not stats.n:
+        raise ValueError("Model has no stored statistics; retrain it once to enable appends")
+    stats = copy.deepcopy(stats)  # the loaded model may be shared with readers
+    for X, y in read_chunks(csv_path, features, label):
+        stats.update(X, y)
+    return linear_model_from_stats(stats, features, getattr(model, "alpha", 0.0))
+
+
+def _append_knn(model, csv_path, features, label, report):
+    X, y = read_arrays(csv_path, features, label)
+    report(0.4)
+    if isinstance(model, IVFKNNRegressor):
+        # Shallow copy: partial_fit replaces the arrays rather than writing into them
+        return copy.copy(model).partial_fit(X, y)
+    # kd/ball trees have no insert; the stored rows are reused without re-parsing any CSV
+    from sklearn.neighbors import KNeighborsRegressor
+    fit_X = np.concatenate([model._fit_X, X.astype(model._fit_X.dtype, copy=False)])
+    fit_y = np.concatenate([model._y, y])
+    appended = KNeighborsRegressor(**model.get_params()).fit(fit_X, fit_y)
+    appended.feature_names_in_ = np.asarray(features, dtype=object)
+    return appended
+
+
+def _knn_prepare(params):
+    # Keep only the settings the chosen index uses
+    index = params["index"]
+    drop = ("leaf_size",) if index in ("ivf", "brute") else ("n_lists", "n_probe")
+    if index == "brute":
+        drop += ("n_lists", "n_probe")
+    return {k: v for k, v in params.items() if k not in drop}
+
+
+LINEAR_FORMAT = model_format.ESTIMATORS["LinearRegression"]
+
+register(Algorithm(
+    "linearregression", "Linear Regression", [], _fit_linear,
+    predictors={"LinearRegression": LinearPredictor, "Ridge": LinearPredictor},
+    serializers={"LinearRegression": LINEAR_FORMAT, "Ridge": model_format.ESTIMATORS["Ridge"]},
+    append=_append_linear,
+))
+
+register(Algorithm(
+    "ridge", "Ridge Regression",
+    [Param("alpha", float, 1.0, lambda v: v >= 0, help="L2 penalty, >= 0")],
+    _fit_ridge,
+    predictors={"Ridge": LinearPredictor, "LinearRegression": LinearPredictor},
+    serializers={"Ridge": model_format.ESTIMATORS["Ridge"], "LinearRegression": LINEAR_FORMAT},
+    append=_append_linear,
+))
+
+register(Algorithm(
+    "knn", "KNN",
+    [Param("k", int, 3, lambda v: v >= 1, help="neighbours, >= 1"),
+     Param("weights", str, "uniform", choices=("uniform", "distance")),
+     Param("index", str, "auto", choices=KNN_INDEXES,
+           help="kd_tree / ball_tree / brute are exact, ivf is approximate"),
+     Param("leaf_size", int, KNN_LEAF_SIZE, lambda v: v >= 1, help="kd_tree / ball_tree leaf size"),
+     Param("n_lists", int, 0, lambda v: v >= 0, help="ivf cells, 0 = sqrt(rows)"),
+     Param("n_probe", int, KNN_N_PROBE, lambda v: v >= 1, help="ivf cells scanned per query")],
+    _fit_knn,
+    predictors={"KNeighborsRegressor": KNNPredictor, "IVFKNNRegressor": IVFPredictor},
+    serializers={"KNeighborsRegressor": model_format.ESTIMATORS["KNeighborsRegressor"],
+                 "IVFKNNRegressor": model_format.ESTIMATORS["IVFKNNRegressor"]},
+    prepare=_knn_prepare,
+    append=_append_knn,
+))
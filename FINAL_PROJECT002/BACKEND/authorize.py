@@ -1,26 +1,41 @@
 from datetime import datetime, timedelta
 import jwt
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.hash import argon2
-from frontend.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_HOURS
+from backend.metrics import stage
+from frontend.config import (SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_HOURS, TOKEN_CACHE_SIZE,
+                             ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, ADMIN_EMAILS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="user/login")
 
 
 ###################### PASSWORD ######################
-def preprocess(password: str) -> str:
-    sha256 = hashlib.sha256(password.encode("utf-8")).hexdigest()
-    return sha256  # Always exactly 64 chars, safe for bcrypt
+# Cost comes from config; hashes made with other parameters still verify and
+# are upgraded at the user's next login (see verify_and_rehash).
+_argon2 = argon2.using(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST,
+                       parallelism=ARGON2_PARALLELISM)
 
 
 def hash_pwd(password: str) -> str:
-    return argon2.hash(password)
+    return _argon2.hash(password)
 
 
 def verify_pwd(password: str, hashed: str) -> bool:
-    return argon2.verify(password, hashed)
+    return _argon2.verify(password, hashed)
+
+
+def verify_and_rehash(password: str, hashed: str):
+    """Return (valid, new_hash); new_hash is set when hashed uses outdated parameters."""
+    if not _argon2.verify(password, hashed):
+        return False, None
+    if _argon2.needs_update(hashed):
+        return True, _argon2.hash(password)
+    return True, None
 
 
 ###################### TOKEN CREATION ######################
@@ -30,12 +45,130 @@ def create_token(data: dict):
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+###################### VERIFIED TOKEN CACHE ######################
+class TokenCache:
+    """Bounded cache of already verified tokens: sha256(token) -> (sub, exp).
+
+    An entry is served only while time.time() < exp, the same rule jwt.decode
+    applies, so caching never extends a token's lifetime.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.lock = threading.Lock()
+
+    def get(self, digest, now):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            if now >= entry[1]:
+                del self.entries[digest]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest, sub, exp):
+        with self.lock:
+            self.entries[digest] = (sub, exp)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, digest):
+        with self.lock:
+            self.entries.pop(digest, None)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "revoked": len(_denylist),
+            }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+###################### REVOCATION ######################
+# digest -> exp; entries are dropped once the token would have expired anyway
+_denylist = {}
+_denylist_lock = threading.Lock()
+
+
+def _in_denylist(digest: str) -> bool:
+    return digest in _denylist
+
+# Replace with set_revocation_check() to share revocations across workers (e.g. a DB table)
+_revocation_check = _in_denylist
+
+
+def set_revocation_check(check):
+    """Install a callable(digest) -> bool consulted on every verify_token call."""
+    global _revocation_check
+    _revocation_check = check
+
+
+def revoke_token(token: str):
+    """Deny a token until it expires (logout)."""
+    try:
+        exp = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["exp"]
+    except jwt.PyJWTError:
+        return  # already expired or invalid
+    digest = token_digest(token)
+    now = time.time()
+    with _denylist_lock:
+        for d in [d for d, e in _denylist.items() if e <= now]:
+            del _denylist[d]
+        _denylist[digest] = exp
+    token_cache.invalidate(digest)
+
+
 ###################### TOKEN VERIFY ######################
 def verify_token(token: str = Depends(oauth2_scheme)):
+    with stage("verify_token"):
+        return _verify(token)
+
+
+def verify_admin(email: str = Depends(verify_token)):
+    """verify_token, restricted to the users listed in ADMIN_EMAILS."""
+    if email not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin only")
+    return email
+
+
+def _verify(token):
+    digest = token_digest(token)
+    if _revocation_check(digest):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    sub = token_cache.get(digest, time.time())
+    if sub is not None:
+        return sub
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload["sub"]
+        sub = payload["sub"]
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
+    if "exp" in payload:
+        token_cache.put(digest, sub, payload["exp"])
+    return sub
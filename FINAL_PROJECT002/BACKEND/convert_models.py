@@ -0,0 +1,38 @@
+import argparse
+import os
+import pickle
+from backend.models import MODELS_DIR, save_model
+from backend.model_format import supports
+
+###################### PICKLE -> NATIVE CONVERTER ######################
+# Usage (from FINAL_PROJECT002):  python -m backend.convert_models [name ...]
+
+
+def legacy_models():
+    return sorted(f[:-len(".pkl")] for f in os.listdir(MODELS_DIR)
+                  if f.endswith(".pkl") and not f.endswith("_meta.pkl"))
+
+
+def convert(name):
+    """Rewrite one pickled model in the native format; returns False if its estimator is unsupported."""
+    with open(os.path.join(MODELS_DIR, f"{name}.pkl"), "rb") as f:
+        model = pickle.load(f)
+    with open(os.path.join(MODELS_DIR, f"{name}_meta.pkl"), "rb") as f:
+        meta = pickle.load(f)
+    if not supports(model):
+        return False
+    save_model(name, model, meta)  # writes a native version and removes the pickles
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled models to the native format")
+    parser.add_argument("names", nargs="*", help="models to convert (default: all pickled models)")
+    args = parser.parse_args()
+    for name in args.names or legacy_models():
+        status = "converted" if convert(name) else "skipped (estimator not supported)"
+        print(f"{name}: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import psycopg2
+import threading
+import time
+from contextlib import contextmanager
 from frontend.config import *
 
 def get_conn():
@@ -8,4 +11,148 @@ def get_conn():
         dbname=DB_NAME,
         user=DB_USER,
         password=DB_PASSWORD
-    )
\ No newline at end of file
+    )
+
+
+###################### CONNECTION POOL ######################
+class PoolTimeout(Exception):
+    """No connection became free within DB_POOL_TIMEOUT seconds."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections with checkout metrics."""
+
+    def __init__(self, minconn, maxconn, timeout, check_after, connect=get_conn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after
+        self.connect = connect
+        self.idle = []  # (conn, returned_at)
+        self.opened = 0
+        self.in_use = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+        self.discarded = 0
+        self.cond = threading.Condition()
+        for _ in range(minconn):
+            self.idle.append((connect(), time.monotonic()))
+            self.opened += 1
+
+    def getconn(self):
+        start = time.monotonic()
+        with self.cond:
+            waited = False
+            while not self.idle and self.opened >= self.maxconn:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(f"no database connection free after {self.timeout}s")
+                waited = True
+                self.cond.wait(remaining)
+            if waited:
+                self.waits += 1
+                self.wait_time += time.monotonic() - start
+            self.checkouts += 1
+            self.in_use += 1
+            if self.idle:
+                conn, returned_at = self.idle.pop()
+            else:
+                conn, returned_at = None, None
+                self.opened += 1
+
+        try:
+            if conn is not None and not self._healthy(conn, returned_at):
+                self.discarded += 1
+                self._close(conn)
+                conn = None
+            if conn is None:
+                conn = self.connect()
+        except Exception:
+            with self.cond:
+                self.opened -= 1
+                self.in_use -= 1
+                self.cond.notify()
+            raise
+        return conn
+
+    def putconn(self, conn, discard=False):
+        with self.cond:
+            self.in_use -= 1
+            if discard or conn.closed:
+                self.opened -= 1
+                self._close(conn)
+            else:
+                self.idle.append((conn, time.monotonic()))
+            self.cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection, commit on success, roll back on error, always return it."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:  # includes GeneratorExit when a streaming client disconnects
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard)
+
+    def _healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def stats(self):
+        with self.cond:
+            return {
+                "min": self.minconn,
+                "max": self.maxconn,
+                "opened": self.opened,
+                "in_use": self.in_use,
+                "idle": len(self.idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_time_seconds": round(self.wait_time, 6),
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Create the shared pool on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_AFTER)
+    return _pool
+
+def db_conn():
+    """Context manager yielding a pooled connection."""
+    return get_pool().connection()
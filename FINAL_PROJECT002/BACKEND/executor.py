@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from frontend.config import EXECUTOR_LIMITS, EXECUTOR_PROCESS_CLASSES, EXECUTOR_QUEUE_LIMITS
+
+###################### WORK CLASS POOLS ######################
+# Every kind of blocking work gets its own bounded pool so a burst of one
+# (e.g. KNN training) cannot starve the others (e.g. predictions).
+_executors = {}
+_lock = threading.Lock()
+_in_flight = {}  # work class -> calls submitted and not finished (touched only on the event loop)
+
+
+# Process pools start from a fresh interpreter, never a fork of this process:
+# a fork copies the locks of the event loop, pool, ledger, log and usage-log
+# threads in whatever state they are in, and a child that takes one of them
+# (save_model, the model cache, metrics) could block forever.
+PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def process_context():
+    return multiprocessing.get_context(PROCESS_START_METHOD)
+
+
+class PoolBusy(Exception):
+    """A work class already has EXECUTOR_QUEUE_LIMITS[work_class] calls queued or running."""
+
+
+def get_executor(work_class: str):
+    """Return the pool for a work class, creating it on first use."""
+    executor = _executors.get(work_class)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(work_class)
+            if executor is None:
+                workers = EXECUTOR_LIMITS[work_class]
+                if work_class in EXECUTOR_PROCESS_CLASSES:
+                    executor = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+                else:
+                    executor = ThreadPoolExecutor(max_workers=workers,
+                                                  thread_name_prefix=f"{work_class}-worker")
+                _executors[work_class] = executor
+    return executor
+
+
+async def run_in(work_class: str, fn, *args, **kwargs):
+    """Run a blocking call on its work class pool without blocking the event loop."""
+    limit = EXECUTOR_QUEUE_LIMITS.get(work_class)
+    if limit is not None and _in_flight.get(work_class, 0) >= limit:
+        raise PoolBusy(f"{work_class} pool has {limit} calls pending")
+    loop = asyncio.get_running_loop()
+    _in_flight[work_class] = _in_flight.get(work_class, 0) + 1
+    try:
+        return await loop.run_in_executor(get_executor(work_class), partial(fn, *args, **kwargs))
+    finally:
+        _in_flight[work_class] -= 1
+
+
+def pending_calls():
+    """Calls submitted through run_in and not yet finished, per work class."""
+    return dict(_in_flight)
+
+
+def shutdown_executors():
+    with _lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -1,13 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, Form, Depends
+from fastapi import FastAPI, UploadFile, File, Form, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.neighbors import KNeighborsRegressor
-import os
-from backend.db import get_conn
-from backend.models import save_model, load_model
-from backend.authorize import create_token, verify_token, hash_pwd, verify_pwd
-from backend.logging_config import logger
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+import numpy as np
+import base64
+import hashlib
+import json
+import math
+from backend.db import db_conn, get_pool
+from backend.models import load_model, load_predictor, load_versioned_predictor, model_cache
+from backend.result_cache import result_cache
+from backend.authorize import (create_token, verify_token, verify_admin, hash_pwd, verify_and_rehash,
+                               revoke_token, token_cache, oauth2_scheme)
+from backend.logging_config import queue_handler
+from backend.executor import run_in, shutdown_executors, pending_calls, PoolBusy
+from backend.jobs import job_queue, QueueFull, ModelBusy, spool_upload
+from backend.ledger import token_ledger, BALANCE_SQL
+from backend.usage_log import usage_log
+from backend.knn_index import KNN_INDEXES
+from backend.algorithms import ALGORITHMS, get_algorithm
+from backend import metrics
+from backend.metrics import MetricsMiddleware, profiler, stage
+from backend.warmup import warm_up
+from frontend.config import (BATCH_ROWS_PER_CHARGE, BATCH_CHUNK_ROWS, KNN_LEAF_SIZE, KNN_N_PROBE,
+                             MODELS_PAGE_SIZE, MODELS_PAGE_MAX, ADMIN_PAGE_SIZE, ADMIN_PAGE_MAX, ADMIN_STREAM_ITERSIZE,
+                             PREDICTION_CACHE_ENABLED, TUNE_MAX_FOLDS, TUNE_MAX_GRID,
+                             PROFILER_ENABLED, PROFILER_INTERVAL, PROFILER_MAX_SECONDS, WARMUP_ENABLED, WARMUP_MODELS)
 
 
 app = FastAPI(title="ML Model API")
@@ -20,106 +37,196 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and in-flight counts for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+@app.on_event("startup")
+def start_warm_up():
+    # Runs in the background; requests are served meanwhile, /ready reports when it is done
+    if WARMUP_ENABLED:
+        warm_up.start(WARMUP_MODELS)
+
+@app.on_event("shutdown")
+def stop_executors():
+    shutdown_executors()
+    job_queue.shutdown()
+    token_ledger.shutdown()
+    usage_log.shutdown()
+    profiler.stop()
+
 ####################### TOKEN USAGE HELPER #######################
 def use_tokens(email: str, amount: int) -> bool:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-        UPDATE ml_user
-        SET tokens = tokens - %s
-        WHERE email=%s AND tokens >= %s
-        RETURNING tokens;
-    """, (amount, email, amount))
-    row = cur.fetchone()
-    conn.commit()
-    cur.close()
-    return row is not None
+    # Debited from this worker's leased block; only touches ml_user when the block runs out
+    with stage("use_tokens"):
+        return token_ledger.use(email, amount)
 
 ####################### USER ENDPOINTS #######################
 
 ############# USER CREATE ################
 @app.post("/user/create", tags=["User"])
 async def create_user(email: str = Form(...), pwd: str = Form(...)):
-    import traceback
     try:
-        conn = get_conn()
-        cur = conn.cursor()
+        hashed = await run_in("hash", hash_pwd, pwd)
+
+        await run_in("io", insert_user, email, hashed)
+
+        # Return 15 tokens to Streamlit
+        return {"status": "OK", "tokens": 15}
 
-        hashed = hash_pwd(pwd)
+    except PoolBusy:
+        return {"status": "BUSY", "reason": "Too many sign-ups in progress, try again"}
+    except Exception as e:
+        return {"status": "FAIL", "reason": str(e)}
 
+def insert_user(email: str, hashed: str):
+    with db_conn() as conn:
+        cur = conn.cursor()
         # Give new users 15 tokens
         cur.execute(
             "INSERT INTO ml_user (email, pwd, tokens) VALUES (%s, %s, %s)",
             (email, hashed, 15)
         )
-        conn.commit()
-
         cur.close()
-        conn.close()
-
-        # Return 15 tokens to Streamlit
-        return {"status": "OK", "tokens": 15}
-
-    except Exception as e:
-        return {"status": "FAIL", "reason": str(e)}
 
 ############### USER LOGIN ###############
 @app.post("/user/login", tags=["User"])
 async def login(email: str = Form(...), pwd: str = Form(...)):
-    conn = get_conn()
-    cur = conn.cursor()
+    # Fetch password hash
+    row = await run_in("io", fetch_password, email)
 
-    # Fetch password + current tokens
-    cur.execute("SELECT pwd, tokens FROM ml_user WHERE email=%s", (email,))
-    row = cur.fetchone()
+    if not row:
+        return {"status": "FAIL", "reason": "Invalid email or password"}
 
-    if not row or not verify_pwd(pwd, row[0]):
-        cur.close()
+    # Verify on the hash process pool, without holding a pooled connection
+    try:
+        valid, new_hash = await run_in("hash", verify_and_rehash, pwd, row[0])
+    except PoolBusy:
+        return {"status": "BUSY", "reason": "Too many logins in progress, try again"}
+    if not valid:
         return {"status": "FAIL", "reason": "Invalid email or password"}
 
-    current_tokens = row[1]
+    # Hash was made with older ARGON2_* settings: store the upgraded one
+    if new_hash is not None:
+        await run_in("io", update_password, email, row[0], new_hash)
 
     # Add 5 tokens per login
-    new_token_balance = current_tokens + 5
-
-    cur.execute(
-        "UPDATE ml_user SET tokens=%s WHERE email=%s",
-        (new_token_balance, email)
-    )
-    conn.commit()
+    new_token_balance = await run_in("io", credit_login_tokens, email)
 
     # Generate JWT
     token = create_token({"sub": email})
 
-    cur.close()
-    conn.close()
-
-
     return {
         "status": "OK",
         "token": token,
         "tokens": new_token_balance
     }
 
+def fetch_password(email: str):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT pwd FROM ml_user WHERE email=%s", (email,))
+        row = cur.fetchone()
+        cur.close()
+    return row
+
+def update_password(email: str, old_hash: str, new_hash: str):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        # Only replace the hash we verified, never a password changed in the meantime
+        cur.execute("UPDATE ml_user SET pwd=%s WHERE email=%s AND pwd=%s", (new_hash, email, old_hash))
+        cur.close()
+
+def credit_login_tokens(email: str) -> int:
+    # Hand back this worker's lease; other workers' leases are added to the reported balance
+    token_ledger.release(email)
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE ml_user SET tokens = tokens + 5 WHERE email=%s",
+            (email,)
+        )
+        cur.execute(f"SELECT {BALANCE_SQL} FROM ml_user u WHERE u.email=%s", (email,))
+        new_token_balance = cur.fetchone()[0]
+        cur.close()
+    return new_token_balance
+
+############### USER LOGOUT ###############
+@app.post("/user/logout", tags=["User"])
+async def logout(token: str = Depends(oauth2_scheme)):
+    revoke_token(token)
+    return {"status": "OK"}
+
 ####################### MODEL TRAINING / PREDICTION #######################
-@app.post("/create/linearregression", tags=["LinearRegression"])
-async def create_lr(
-        model_name: str = Form(...),
-        features: str = Form(...),
-        label: str = Form(...),
-        file: UploadFile = File(...),
-        email: str = Depends(verify_token)
-):
-    if not use_tokens(email, 1):
+async def queue_training(email, algorithm, model_name, features, label, params, file, kind="train"):
+    """Charge for and queue a training, tuning or append job; the fits run on the train process pool."""
+    try:
+        job_queue.reserve(model_name)
+    except QueueFull:
+        return {"status": "QUEUE_FULL"}
+    except ModelBusy:
+        return {"status": "BUSY", "reason": f"A job for model '{model_name}' is already queued or running"}
+    try:
+        if not await run_in("io", use_tokens, email, 1):
+            job_queue.release(model_name)
+            return {"status": "NO_TOKENS"}
+        csv_path = await run_in("io", spool_upload, file.file)
+        job_id = job_queue.submit(email, algorithm, model_name, csv_path,
+                                  features.split(","), label, params, kind)
+    except Exception:
+        job_queue.release(model_name)
+        raise
+    return {"status": "QUEUED", "job_id": job_id}
+
+def timed_predict(predictor, values):
+    with stage("predict"):  # measured on the worker thread, so pool queueing is not included
+        return predictor.predict_row(values)
+
+async def predict_row(email: str, model_name: str, data: str):
+    """Score one comma-separated row with the model's compiled predictor."""
+    try:
+        predictor, version = await run_in("io", load_versioned_predictor, model_name)
+    except FileNotFoundError:
+        return {"status": "FAIL", "reason": f"Model '{model_name}' not found"}
+    try:
+        values = list(map(float, data.split(",")))
+        pred = result_cache.get(model_name, version, values) if PREDICTION_CACHE_ENABLED else None
+        if pred is None:
+            if predictor.inline:  # e.g. a linear model: a dot product, cheaper than a thread hop
+                with stage("predict"):
+                    pred = predictor.predict_row(values)
+            else:
+                pred = await run_in("predict", timed_predict, predictor, values)
+            if PREDICTION_CACHE_ENABLED:
+                result_cache.put(model_name, version, values, pred)
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    usage_log.log(email, "predict", model_name)
+    return {"prediction": pred}
+
+####################### GENERIC ALGORITHM ROUTES #######################
+# Every algorithm in backend.algorithms gets /create/{algo} (which also serves
+# the old /create/linearregression and /create/knn forms), validated against
+# the algorithm's Params; /models/{model}/predict works for any saved model
+# because the compiled predictor is picked from the stored estimator. The
+# older /predict/{model} and /predict/batch/{model} still answer, but cannot
+# reach models named like the static /predict/... routes kept for old clients.
+CREATE_FIELDS = ("model_name", "features", "label", "file")
+
+async def create_with(email, algo, model_name, features, label, form, file):
+    try:
+        params = get_algorithm(algo).parse_params(form)
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    return await queue_training(email, algo, model_name, features, label, params, file)
+
+async def charge_and_predict(email, model_name, data):
+    if not await run_in("io", use_tokens, email, 5):
         return {"status": "NO_TOKENS"}
+    return await predict_row(email, model_name, data)
 
-    df = pd.read_csv(file.file)
-    X = df[features.split(",")]
-    y = df[label]
-    model = LinearRegression().fit(X, y)
-    save_model(model_name, model, {"features": features.split(","), "label": label})
-    logger.info(f"{email} trained LR model {model_name}")
-    return {"status": "OK"}
+@app.get("/algorithms", tags=["Models"])
+async def list_algorithms():
+    return {"algorithms": [a.schema() for a in ALGORITHMS.values()]}
 
 @app.post("/predict/linearregression", tags=["LinearRegression"])
 async def predict_lr(
@@ -127,66 +234,390 @@ async def predict_lr(
         data: str = Form(...),
         email: str = Depends(verify_token)
 ):
-    if not use_tokens(email, 5):
-        return {"status": "NO_TOKENS"}
-    model, meta = load_model(model_name)
-    values = list(map(float, data.split(",")))
-    df = pd.DataFrame([values], columns=meta["features"])
-    pred = model.predict(df)[0]
-    return {"prediction": float(pred)}
-
-@app.post("/create/knn", tags=["KNN"])
-async def create_knn(
+    return await charge_and_predict(email, model_name, data)
+
+@app.post("/predict/knn", tags=["KNN"])
+async def predict_knn(
+        model_name: str = Form(...),
+        data: str = Form(...),
+        email: str = Depends(verify_token)
+):
+    return await charge_and_predict(email, model_name, data)
+
+@app.post("/create/{algo}", tags=["Models"])
+async def create_model(algo: str, request: Request, email: str = Depends(verify_token)):
+    # Form fields: model_name, features, label, file, plus the algorithm's params (GET /algorithms)
+    if algo not in ALGORITHMS:
+        return {"status": "FAIL", "reason": f"Unknown algorithm '{algo}', expected one of {list(ALGORITHMS)}"}
+    form = await request.form()
+    missing = [f for f in CREATE_FIELDS if not form.get(f)]
+    if missing:
+        return {"status": "FAIL", "reason": f"Missing form fields: {missing}"}
+    # A field the algorithm does not declare would otherwise be dropped silently
+    known = set(CREATE_FIELDS) | {p.name for p in ALGORITHMS[algo].params}
+    unknown = [f for f in form.keys() if f not in known]
+    if unknown:
+        return {"status": "FAIL", "reason": f"Unknown form fields for {algo}: {unknown}"}
+    return await create_with(email, algo, form["model_name"], form["features"], form["label"],
+                             form, form["file"])
+
+@app.post("/models/{model_name}/predict", tags=["Models"])
+@app.post("/predict/{model_name}", tags=["Models"], deprecated=True)
+async def predict_model(model_name: str, data: str = Form(...), email: str = Depends(verify_token)):
+    return await charge_and_predict(email, model_name, data)
+
+####################### HYPERPARAMETER TUNING #######################
+def parse_grid(text: str, cast):
+    values = [cast(v.strip()) for v in text.split(",") if v.strip()]
+    if not values:
+        raise ValueError("Empty parameter list")
+    return list(dict.fromkeys(values))
+
+@app.post("/tune/knn", tags=["KNN"])
+async def tune_knn(
         model_name: str = Form(...),
         features: str = Form(...),
         label: str = Form(...),
-        k: int = Form(3),
+        ks: str = Form("1,3,5,7,9,15"),
+        weights: str = Form("uniform,distance"),
+        folds: int = Form(5),
+        index: str = Form("auto"),
+        leaf_size: int = Form(KNN_LEAF_SIZE),
+        n_lists: int = Form(0),
+        n_probe: int = Form(KNN_N_PROBE),
         file: UploadFile = File(...),
         email: str = Depends(verify_token)
 ):
-    if not use_tokens(email, 1):
-        return {"status": "NO_TOKENS"}
-
-    df = pd.read_csv(file.file)
-    X = df[features.split(",")]
-    y = df[label]
-    model = KNeighborsRegressor(n_neighbors=k).fit(X, y)
-    save_model(model_name, model, {"features": features.split(","), "label": label})
-    logger.info(f"{email} trained KNN model {model_name}")
-    return {"status": "OK"}
-
-@app.post("/predict/knn", tags=["KNN"])
-async def predict_knn(
+    # Cross-validates every (k, weights) pair, saves the best as model_name; the job result holds the scores
+    try:
+        ks = parse_grid(ks, int)
+        weights = parse_grid(weights, str)
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    if min(ks) < 1 or not set(weights) <= {"uniform", "distance"}:
+        return {"status": "FAIL", "reason": "ks must be positive and weights uniform and/or distance"}
+    if index not in KNN_INDEXES:
+        return {"status": "FAIL", "reason": f"index must be one of {list(KNN_INDEXES)}"}
+    if not 2 <= folds <= TUNE_MAX_FOLDS or len(ks) * len(weights) > TUNE_MAX_GRID:
+        return {"status": "FAIL", "reason": f"folds must be 2-{TUNE_MAX_FOLDS}, at most {TUNE_MAX_GRID} combinations"}
+    params = {"ks": ks, "weights": weights, "folds": folds, "index": index}
+    if index == "ivf":
+        params.update(n_lists=n_lists, n_probe=n_probe)
+    elif index != "brute":
+        params["leaf_size"] = leaf_size
+    return await queue_training(email, "knn", model_name, features, label, params, file, kind="tune")
+
+@app.post("/tune/linearregression", tags=["LinearRegression"])
+async def tune_lr(
         model_name: str = Form(...),
-        data: str = Form(...),
+        features: str = Form(...),
+        label: str = Form(...),
+        alphas: str = Form("0,0.01,0.1,1,10,100"),
+        folds: int = Form(5),
+        file: UploadFile = File(...),
         email: str = Depends(verify_token)
 ):
-    if not use_tokens(email, 5):
+    # alpha 0 is plain least squares; alpha > 0 saves a Ridge model
+    try:
+        alphas = parse_grid(alphas, float)
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    if min(alphas) < 0:
+        return {"status": "FAIL", "reason": "alphas must be >= 0"}
+    if not 2 <= folds <= TUNE_MAX_FOLDS or len(alphas) > TUNE_MAX_GRID:
+        return {"status": "FAIL", "reason": f"folds must be 2-{TUNE_MAX_FOLDS}, at most {TUNE_MAX_GRID} alphas"}
+    params = {"alphas": alphas, "folds": folds}
+    return await queue_training(email, "linearregression", model_name, features, label, params, file, kind="tune")
+
+####################### INCREMENTAL UPDATES #######################
+def fetch_model_owner(model_name: str):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT owner_email FROM ml_models WHERE model_name=%s;", (model_name,))
+        row = cur.fetchone()
+        cur.close()
+    return row[0] if row else None
+
+@app.post("/models/{model_name}/append", tags=["Models"])
+async def append_rows(model_name: str, file: UploadFile = File(...), email: str = Depends(verify_token)):
+    # The CSV holds only the new rows, with the feature and label columns the model was trained on.
+    # The job saves the updated model in one swap, so predictions see the old or the new version.
+    try:
+        _, meta = await run_in("io", load_model, model_name)
+    except FileNotFoundError:
+        return {"status": "FAIL", "reason": f"Model '{model_name}' not found"}
+    owner = await run_in("io", fetch_model_owner, model_name)
+    if owner is not None and owner != email:
+        return {"status": "FAIL", "reason": "Only the model's owner can append to it"}
+    algorithm = ALGORITHMS.get(meta.get("algorithm"))
+    if algorithm is None or algorithm.append is None:
+        return {"status": "FAIL", "reason": f"{meta.get('algorithm')} models do not support appending rows"}
+    return await queue_training(email, algorithm.name, model_name, ",".join(meta["features"]),
+                                meta["label"], {}, file, kind="append")
+
+####################### TRAINING JOBS #######################
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def job_status(job_id: str, email: str = Depends(verify_token)):
+    job = await run_in("io", job_queue.get, job_id)
+    if job is None or job["owner"] != email:
+        return {"status": "NOT_FOUND"}
+    return job
+
+####################### BATCH PREDICTION #######################
+def stream_predictions(preds, output: str):
+    """Yield predictions as CSV or NDJSON, BATCH_CHUNK_ROWS rows at a time."""
+    if output == "csv":
+        yield "prediction\n"
+    for start in range(0, len(preds), BATCH_CHUNK_ROWS):
+        chunk = preds[start:start + BATCH_CHUNK_ROWS].tolist()
+        if output == "csv":
+            yield "".join(f"{p}\n" for p in chunk)
+        else:
+            yield "".join(json.dumps({"row": start + i, "prediction": p}) + "\n"
+                          for i, p in enumerate(chunk))
+
+def read_batch_csv(fileobj, features):
+    import pandas as pd
+    return pd.read_csv(fileobj, usecols=features)[features].to_numpy(dtype=float)
+
+@app.post("/models/{model_name}/predict/batch", tags=["Batch"])
+@app.post("/predict/batch/{model_name}", tags=["Batch"], deprecated=True)
+async def predict_batch(
+        model_name: str,
+        file: UploadFile = File(None),
+        data: str = Form(None),
+        output: str = Form("csv"),
+        email: str = Depends(verify_token)
+):
+    if output not in ("csv", "ndjson"):
+        return {"status": "FAIL", "reason": "output must be 'csv' or 'ndjson'"}
+    try:
+        predictor = await run_in("io", load_predictor, model_name)
+    except FileNotFoundError:
+        return {"status": "FAIL", "reason": f"Model '{model_name}' not found"}
+    features = predictor.features
+
+    try:
+        if file is not None:
+            X = await run_in("io", read_batch_csv, file.file, features)
+        elif data is not None:
+            X = np.asarray(json.loads(data), dtype=float)
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+        else:
+            return {"status": "FAIL", "reason": "Upload a CSV file or send a JSON matrix as 'data'"}
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    if X.ndim != 2 or X.shape[1] != len(features):
+        return {"status": "FAIL", "reason": f"Expected rows of {len(features)} values: {features}"}
+
+    # One charge per started block of rows, debited once for the whole batch
+    cost = 5 * max(1, math.ceil(len(X) / BATCH_ROWS_PER_CHARGE))
+    if not await run_in("io", use_tokens, email, cost):
         return {"status": "NO_TOKENS"}
-    model, meta = load_model(model_name)
-    values = list(map(float, data.split(",")))
-    df = pd.DataFrame([values], columns=meta["features"])
-    pred = model.predict(df)[0]
-    return {"prediction": float(pred)}
+
+    preds = await run_in("predict", predictor.predict_matrix, X)
+    usage_log.log(email, "predict_batch", model_name)
+    media_type = "text/csv" if output == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_predictions(preds, output), media_type=media_type)
 
 ####################### ADMIN / MODEL LISTING #######################
 @app.get("/admin/users", tags=["Admin"])
-async def admin_users():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT email, tokens FROM ml_user")
-    rows = cur.fetchall()
-    cur.close()
-    return [{"email": r[0], "tokens": r[1]} for r in rows]
+async def admin_users(cursor: str = None, limit: int = ADMIN_PAGE_SIZE, stream: bool = False):
+    # Pages of users in email order; stream=true sends every user after the cursor as NDJSON
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
+    if stream:
+        return StreamingResponse(stream_users(after), media_type="application/x-ndjson")
 
-@app.get("/models", tags=["Models"])
-async def list_models():
-    files = os.listdir("models")  # Relative to project root
-    models = [f.replace(".pkl", "") for f in files if not f.endswith("_meta.pkl")]
-    return {"models": models}
+    limit = max(1, min(limit, ADMIN_PAGE_MAX))
+    rows = await run_in("io", fetch_users, after, limit + 1)
+    page = rows[:limit]
+    return {
+        "users": [{"email": r[0], "tokens": r[1]} for r in page],
+        "next_cursor": encode_cursor(page[-1][0]) if len(rows) > limit else None,
+    }
+
+def fetch_users(after, limit):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        if after is None:
+            cur.execute(f"SELECT u.email, {BALANCE_SQL} FROM ml_user u ORDER BY u.email LIMIT %s", (limit,))
+        else:
+            cur.execute(f"SELECT u.email, {BALANCE_SQL} FROM ml_user u WHERE u.email > %s "
+                        "ORDER BY u.email LIMIT %s", (after, limit))
+        rows = cur.fetchall()
+        cur.close()
+    return rows
+
+def stream_users(after):
+    """Yield users as NDJSON from a server-side cursor, ADMIN_STREAM_ITERSIZE rows per fetch."""
+    with db_conn() as conn:
+        cur = conn.cursor(name="admin_users_stream")
+        cur.itersize = ADMIN_STREAM_ITERSIZE
+        cur.execute(f"SELECT u.email, {BALANCE_SQL} FROM ml_user u WHERE u.email > %s ORDER BY u.email",
+                    (after or "",))
+        for email, tokens in cur:
+            yield json.dumps({"email": email, "tokens": tokens}) + "\n"
+        cur.close()
 
+@app.get("/admin/users/summary", tags=["Admin"])
+async def admin_users_summary():
+    return await run_in("io", fetch_user_summary)
 
+def fetch_user_summary():
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT COUNT(*), COALESCE(SUM(tokens), 0), MIN(tokens), MAX(tokens), AVG(tokens),
+                   percentile_cont(ARRAY[0.5, 0.9, 0.99]) WITHIN GROUP (ORDER BY tokens)
+            FROM (SELECT {BALANCE_SQL} AS tokens FROM ml_user u) balances
+        """)
+        users, total, low, high, mean, pct = cur.fetchone()
+        cur.execute("SELECT COALESCE(SUM(tokens), 0) FROM ml_token_lease")
+        leased = cur.fetchone()[0]
+        cur.close()
+    pct = pct or [None, None, None]
+    return {
+        "users": users,
+        "tokens_total": total,
+        "tokens_min": low,
+        "tokens_max": high,
+        "tokens_mean": float(mean) if mean is not None else None,
+        "tokens_p50": pct[0],
+        "tokens_p90": pct[1],
+        "tokens_p99": pct[2],
+        # Balances above include tokens leased to workers, as last published by them
+        "tokens_leased": leased,
+        "tokens_leased_here": token_ledger.stats()["held_tokens"],
+    }
 
+@app.get("/admin/db/pool", tags=["Admin"])
+async def db_pool_stats():
+    return get_pool().stats()
+
+@app.get("/admin/logs", tags=["Admin"])
+async def log_pipeline_stats():
+    return {"ml_logs": usage_log.stats(), "server_log_dropped": queue_handler.dropped}
+
+@app.get("/admin/tokens/ledger", tags=["Admin"])
+async def token_ledger_stats():
+    return token_ledger.stats()
+
+@app.get("/admin/cache/auth", tags=["Admin"])
+async def auth_cache_stats():
+    return token_cache.stats()
+
+@app.get("/ready", tags=["Admin"])
+async def ready():
+    # 503 while the startup warm-up (WARMUP_ENABLED) is still loading models
+    return JSONResponse(warm_up.status(), status_code=200 if warm_up.ready else 503)
+
+@app.get("/metrics", tags=["Admin"])
+async def prometheus_metrics():
+    # Prometheus text format; stage timings cover verify_token, use_tokens,
+    # load_model / compile_predictor (cache misses), dataframe and predict
+    cache = model_cache.stats()
+    lines = metrics.gauge_lines("executor_pending_calls", "Calls queued or running per work class",
+                                ("work_class",), {(k,): v for k, v in pending_calls().items()})
+    lines += metrics.gauge_lines("model_cache", "Loaded-model cache counters", ("stat",),
+                                 {(k,): v for k, v in cache.items()})
+    return PlainTextResponse(metrics.render(lines), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profiler", tags=["Admin"])
+async def profiler_status(email: str = Depends(verify_admin)):
+    return {"enabled": PROFILER_ENABLED, **profiler.status()}
+
+@app.post("/admin/profiler/start", tags=["Admin"])
+async def profiler_start(interval: float = PROFILER_INTERVAL, seconds: float = PROFILER_MAX_SECONDS,
+                         email: str = Depends(verify_admin)):
+    # Samples this worker's threads until /admin/profiler/stop or `seconds` have passed
+    if not PROFILER_ENABLED:
+        return {"status": "FAIL", "reason": "The profiler is disabled (PROFILER_ENABLED in config)"}
+    if not 0.001 <= interval <= 1 or not 0 < seconds <= PROFILER_MAX_SECONDS:
+        return {"status": "FAIL", "reason": f"interval must be 0.001-1s and seconds at most {PROFILER_MAX_SECONDS}"}
+    if not profiler.start(interval, seconds):
+        return {"status": "FAIL", "reason": "Profiler already running"}
+    return {"status": "OK", **profiler.status()}
+
+@app.post("/admin/profiler/stop", tags=["Admin"])
+async def profiler_stop(top: int = 200, email: str = Depends(verify_admin)):
+    # Collapsed stacks, most sampled first: feed to flamegraph.pl or speedscope
+    await run_in("io", profiler.stop)
+    return PlainTextResponse(profiler.collapsed(top))
+
+@app.get("/admin/cache/predictions", tags=["Admin"])
+async def prediction_cache_stats():
+    return {"enabled": PREDICTION_CACHE_ENABLED, **result_cache.stats()}
+
+@app.get("/admin/cache/models", tags=["Admin"])
+async def model_cache_stats():
+    return model_cache.stats()
+
+####################### MODEL REGISTRY #######################
+def encode_cursor(model_name: str) -> str:
+    return base64.urlsafe_b64encode(model_name.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor.encode("ascii"), altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def fetch_models(owner, algorithm, after, limit):
+    """One page of ml_models in model_name order (keyset pagination, no OFFSET)."""
+    clauses, args = [], []
+    if owner is not None:
+        clauses.append("owner_email = %s")
+        args.append(owner)
+    if algorithm is not None:
+        clauses.append("algorithm = %s")
+        args.append(algorithm)
+    if after is not None:
+        clauses.append("model_name > %s")
+        args.append(after)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            SELECT model_name, owner_email, algorithm, created_at
+            FROM ml_models {where}
+            ORDER BY model_name
+            LIMIT %s
+        """, args + [limit])
+        rows = cur.fetchall()
+        cur.close()
+    return rows
 
+@app.get("/models", tags=["Models"])
+async def list_models(
+        request: Request,
+        owner: str = None,
+        algorithm: str = None,
+        cursor: str = None,
+        limit: int = MODELS_PAGE_SIZE
+):
+    limit = max(1, min(limit, MODELS_PAGE_MAX))
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return {"status": "FAIL", "reason": str(e)}
 
+    rows = await run_in("io", fetch_models, owner, algorithm, after, limit + 1)
+    page = rows[:limit]
+    body = {
+        "models": [
+            {"model_name": name, "owner_email": email, "algorithm": algo,
+             "created_at": created.isoformat() if created else None}
+            for name, email, algo, created in page
+        ],
+        "next_cursor": encode_cursor(page[-1][0]) if len(rows) > limit else None,
+    }
 
+    # Clients that already hold this page get a 304 instead of the body again
+    etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(body, headers={"ETag": etag})
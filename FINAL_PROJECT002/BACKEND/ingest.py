@@ -0,0 +1,113 @@
+import numpy as np
+from frontend.config import INGEST_CHUNK_ROWS, INGEST_FLOAT32
+
+
+###################### CHUNKED CSV READING ######################
+def check_finite(X, y, first_row=0):
+    """Raise ValueError for NaN / inf (blank CSV cells parse as NaN); sklearn's fit used to do this."""
+    if np.isfinite(X).all() and np.isfinite(y).all():
+        return
+    bad = ~(np.isfinite(X).all(axis=1) & np.isfinite(y))
+    row = first_row + int(np.argmax(bad)) + 1
+    raise ValueError(f"Input contains NaN or infinite values ({int(bad.sum())} rows, first at data row {row}); "
+                     "fill or drop empty cells")
+
+
+def read_chunks(source, features, label, chunk_rows=INGEST_CHUNK_ROWS, float32=INGEST_FLOAT32):
+    """Yield (X, y) arrays of at most chunk_rows rows, parsing only the feature and label columns."""
+    import pandas as pd  # imported on first use to keep API startup fast
+    dtype = np.float32 if float32 else np.float64
+    columns = list(dict.fromkeys(features + [label]))
+    reader = pd.read_csv(source, usecols=columns, dtype={c: dtype for c in columns},
+                         chunksize=chunk_rows)
+    rows = 0
+    for chunk in reader:
+        X, y = chunk[features].to_numpy(), chunk[label].to_numpy()
+        check_finite(X, y, rows)
+        rows += len(chunk)
+        yield X, y
+
+
+def read_arrays(source, features, label, chunk_rows=INGEST_CHUNK_ROWS, float32=INGEST_FLOAT32):
+    """Read the whole feature matrix and label vector through read_chunks."""
+    xs, ys = [], []
+    for X, y in read_chunks(source, features, label, chunk_rows, float32):
+        xs.append(X)
+        ys.append(y)
+    if not xs:
+        raise ValueError("CSV has no data rows")
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+###################### STREAMING LINEAR REGRESSION ######################
+class LinearStats:
+    """Sufficient statistics (X^T X, X^T y, n) for ordinary least squares.
+
+    Sums are kept in float64 around a shift taken from the first chunk, which
+    avoids losing precision when features have a large offset (e.g. salaries).
+    """
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.shift_x = None
+        self.shift_y = 0.0
+        self.sx = np.zeros(n_features)
+        self.sy = 0.0
+        self.sxx = np.zeros((n_features, n_features))
+        self.sxy = np.zeros(n_features)
+
+    def update(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(X) == 0:
+            return
+        check_finite(X, y, self.n)
+        if self.shift_x is None:
+            self.shift_x = X.mean(axis=0)
+            self.shift_y = float(y.mean())
+        Xc = X - self.shift_x
+        yc = y - self.shift_y
+        self.n += len(X)
+        self.sx += Xc.sum(axis=0)
+        self.sy += float(yc.sum())
+        self.sxx += Xc.T @ Xc
+        self.sxy += Xc.T @ yc
+
+    def solve(self, alpha=0.0):
+        """Return (coef, intercept) of the least-squares fit with an intercept.
+
+        alpha > 0 adds an L2 penalty on the coefficients (what sklearn's Ridge solves).
+        """
+        if self.n == 0:
+            raise ValueError("CSV has no data rows")
+        mean_x = self.sx / self.n
+        mean_y = self.sy / self.n
+        cxx = self.sxx - self.n * np.outer(mean_x, mean_x)
+        cxy = self.sxy - self.n * mean_x * mean_y
+        if alpha:
+            coef = np.linalg.solve(cxx + alpha * np.eye(len(cxx)), cxy)
+        else:
+            coef = np.linalg.lstsq(cxx, cxy, rcond=None)[0]
+        intercept = (mean_y + self.shift_y) - (mean_x + self.shift_x) @ coef
+        return coef, float(intercept)
+
+
+def linear_model_from_stats(stats, features, alpha=0.0):
+    """Build a fitted LinearRegression (or Ridge, when alpha > 0) from accumulated statistics."""
+    from sklearn.linear_model import LinearRegression, Ridge
+    coef, intercept = stats.solve(alpha)
+    model = Ridge(alpha=alpha) if alpha else LinearRegression()
+    model.coef_ = coef
+    model.intercept_ = intercept
+    model.n_features_in_ = len(features)
+    model.feature_names_in_ = np.asarray(features, dtype=object)
+    model.stats_ = stats
+    return model
+
+
+def fit_linear_streaming(source, features, label, chunk_rows=INGEST_CHUNK_ROWS, float32=INGEST_FLOAT32):
+    """Fit LinearRegression chunk by chunk; peak memory is bounded by chunk_rows."""
+    stats = LinearStats(len(features))
+    for X, y in read_chunks(source, features, label, chunk_rows, float32):
+        stats.update(X, y)
+    return linear_model_from_stats(stats, features)
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from backend.db import db_conn
+from backend.executor import get_executor, process_context
+from backend.models import model_cache
+from backend.training import run_training_job, run_append_job
+from backend.tuning import run_tuning_job
+from backend.logging_config import logger
+from backend.usage_log import usage_log
+from backend.result_cache import result_cache
+from frontend.config import JOB_QUEUE_DEPTH, JOB_RETENTION_SECONDS
+
+###################### TRAINING JOB QUEUE ######################
+# Jobs run on the "train" process pool, so EXECUTOR_LIMITS["train"] caps how
+# many fit at once; JOB_QUEUE_DEPTH caps how many may be queued or running.
+
+class QueueFull(Exception):
+    """More than JOB_QUEUE_DEPTH jobs are already queued or running."""
+
+
+class ModelBusy(Exception):
+    """A job that writes this model is already queued or running."""
+
+
+class JobQueue:
+    def __init__(self, max_depth):
+        self.max_depth = max_depth
+        self.jobs = {}
+        self.active = 0
+        self.busy = set()  # models with a train, tune or append job queued or running
+        self.lock = threading.Lock()
+        self.manager = None
+        self.progress = None  # shared dict the worker processes report into
+
+    def _shared_progress(self):
+        if self.progress is None:
+            self.manager = process_context().Manager()
+            self.progress = self.manager.dict()
+        return self.progress
+
+    def reserve(self, model_name=None):
+        """Claim a queue slot before the upload is copied and tokens are charged.
+
+        model_name is also claimed until the job finishes, so this worker runs
+        one job per model at a time. Across workers, an append that loses a
+        race is caught by save_model's version check (see run_append_job).
+        """
+        with self.lock:
+            self._prune()
+            if self.active >= self.max_depth:
+                raise QueueFull(f"{self.active} training jobs already queued")
+            if model_name is not None:
+                if model_name in self.busy:
+                    raise ModelBusy(f"{model_name} already has a job in progress")
+                self.busy.add(model_name)
+            self.active += 1
+
+    def release(self, model_name=None):
+        with self.lock:
+            self.active -= 1
+            self.busy.discard(model_name)
+
+    def submit(self, email, algorithm, model_name, csv_path, features, label, params, kind="train"):
+        """Queue a "train", "tune" or "append" job on a slot taken with reserve(); returns the job id."""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "owner": email,
+            "algorithm": algorithm,
+            "model_name": model_name,
+            "progress": 0.0,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "duration": None,
+            "error": None,
+            "result": None,
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+        progress = self._shared_progress()
+        # Tuning coordinators run on threads and fan their folds out to the train pool
+        run, pool = {"tune": (run_tuning_job, "tune"),
+                     "append": (run_append_job, "train")}.get(kind, (run_training_job, "train"))
+        future = get_executor(pool).submit(
+            run, job_id, progress, csv_path,
+            algorithm, model_name, features, label, params
+        )
+        future.add_done_callback(lambda f: self._finished(job_id, csv_path, f))
+        return job_id
+
+    def _finished(self, job_id, csv_path, future):
+        try:
+            os.remove(csv_path)
+        except OSError:
+            pass
+        error = future.exception() if not future.cancelled() else "cancelled"
+        report = self.progress.pop(job_id, None) if self.progress is not None else None
+        with self.lock:
+            self.active -= 1
+            job = self.jobs[job_id]
+            self.busy.discard(job["model_name"])
+            job["finished_at"] = time.time()
+            job["started_at"] = report[2] if report else job["started_at"]
+            if job["started_at"] is not None:
+                job["duration"] = round(job["finished_at"] - job["started_at"], 3)
+            if error is None:
+                job["status"] = "done"
+                job["progress"] = 1.0
+                job["result"] = future.result()
+            else:
+                job["status"] = "failed"
+                job["error"] = str(error)
+        model_cache.invalidate(job["model_name"])
+        result_cache.invalidate(job["model_name"])
+        if error is None and job["kind"] == "append":
+            logger.info(f"{job['owner']} appended rows to {job['algorithm']} model {job['model_name']}")
+            usage_log.log(job["owner"], "append", job["model_name"])
+        elif error is None:
+            logger.info(f"{job['owner']} trained {job['algorithm']} model {job['model_name']}")
+            usage_log.log(job["owner"], "train", job["model_name"])
+            get_executor("io").submit(record_model, job["model_name"], job["owner"], job["algorithm"])
+        else:
+            logger.error(f"{job['kind']} job {job_id} for {job['model_name']} failed: {error}")
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+        if job["status"] == "queued" and self.progress is not None:
+            report = self.progress.get(job_id)
+            if report is not None:
+                job["status"], job["progress"], job["started_at"] = report
+        if job["status"] == "running":
+            job["duration"] = round(time.time() - job["started_at"], 3)
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j for j, job in self.jobs.items()
+                       if job["finished_at"] is not None and job["finished_at"] < cutoff]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        if self.manager is not None:
+            self.manager.shutdown()
+
+
+job_queue = JobQueue(JOB_QUEUE_DEPTH)
+
+
+def spool_upload(fileobj):
+    """Copy an upload to a temp file the worker process can read."""
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "wb") as out:
+        while True:
+            chunk = fileobj.read(1024 * 1024)
+            if not chunk:
+                break
+            out.write(chunk)
+    return path
+
+
+def record_model(model_name, owner_email, algorithm):
+    """Record a finished training job in ml_models."""
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO ml_models (model_name, owner_email, algorithm)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (model_name) DO UPDATE
+            SET owner_email = EXCLUDED.owner_email,
+                algorithm = EXCLUDED.algorithm,
+                created_at = NOW();
+        """, (model_name, owner_email, algorithm))
+        cur.close()
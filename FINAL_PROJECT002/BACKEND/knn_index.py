@@ -0,0 +1,148 @@
+import numpy as np
+from frontend.config import KNN_LEAF_SIZE, KNN_N_PROBE
+
+KNN_INDEXES = ("auto", "kd_tree", "ball_tree", "brute", "ivf")
+
+
+###################### IVF (APPROXIMATE) INDEX ######################
+def _sq_distances(X, C):
+    """Squared euclidean distances between the rows of X and the rows of C."""
+    d = (X * X).sum(axis=1)[:, None] - 2.0 * (X @ C.T) + (C * C).sum(axis=1)[None, :]
+    return np.maximum(d, 0.0)
+
+
+def _nearest_centroid(X, C, chunk_rows=65536):
+    labels = np.empty(len(X), dtype=np.int64)
+    for start in range(0, len(X), chunk_rows):
+        labels[start:start + chunk_rows] = _sq_distances(X[start:start + chunk_rows], C).argmin(axis=1)
+    return labels
+
+
+class IVFKNNRegressor:
+    """Approximate k-NN regressor over an inverted-file index, in plain NumPy.
+
+    Training rows are partitioned into n_lists cells by k-means and stored
+    contiguously per cell. A query scans only the n_probe cells whose
+    centroids are closest, trading recall for latency.
+    """
+
+    def __init__(self, n_neighbors=5, n_lists=0, n_probe=KNN_N_PROBE, weights="uniform",
+                 n_iter=10, sample_per_list=256, random_state=0):
+        self.n_neighbors = n_neighbors
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.weights = weights
+        self.n_iter = n_iter
+        self.sample_per_list = sample_per_list
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        if hasattr(X, "columns"):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = np.asarray(X)
+        if X.dtype != np.float32:  # keep float32 uploads compact
+            X = X.astype(np.float64, copy=False)
+        y = np.asarray(y)
+        n = len(X)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.random_state)
+
+        # Lloyd's k-means on a sample; the centroids only need to be roughly right
+        sample = X[rng.choice(n, size=min(n, n_lists * self.sample_per_list), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].astype(np.float64)
+        for _ in range(self.n_iter):
+            labels = _nearest_centroid(sample, centroids)
+            counts = np.bincount(labels, minlength=n_lists)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        labels = _nearest_centroid(X, centroids)
+        order = np.argsort(labels, kind="stable")
+        self.centroids_ = centroids
+        self.offsets_ = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        self.index_ = order
+        self.X_ = X[order]
+        self.y_ = y[order]
+        self.n_features_in_ = X.shape[1]
+        return self
+
+    def partial_fit(self, X, y):
+        """Add rows to the fitted index; they join their nearest existing cell, no k-means rerun."""
+        X = np.asarray(X)
+        if X.dtype != self.X_.dtype:
+            X = X.astype(np.result_type(X.dtype, self.X_.dtype), copy=False)
+        y = np.asarray(y)
+        n_lists = len(self.centroids_)
+        old_labels = np.repeat(np.arange(n_lists), np.diff(self.offsets_))
+        labels = np.concatenate([old_labels, _nearest_centroid(X, self.centroids_)])
+        # Stable sort keeps each cell's existing rows first, then the new ones
+        order = np.argsort(labels, kind="stable")
+        n = len(self.X_)
+        self.offsets_ = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        self.index_ = np.concatenate([self.index_, np.arange(n, n + len(X))])[order]
+        self.X_ = np.concatenate([self.X_, X])[order]
+        self.y_ = np.concatenate([self.y_, y])[order]
+        return self
+
+    def kneighbors(self, X, n_neighbors=None, n_probe=None):
+        """Return (distances, row indices into the training data) of the approximate neighbours."""
+        dist, pos = self._search(X, n_neighbors, n_probe)
+        return dist, self.index_[pos]
+
+    def _search(self, X, n_neighbors=None, n_probe=None):
+        # Positions returned here index the cell-sorted X_ / y_ arrays
+        k = min(n_neighbors or self.n_neighbors, len(self.X_))
+        probe = min(n_probe or self.n_probe, len(self.centroids_))
+        X = np.asarray(X, dtype=np.float64)
+        dist = np.empty((len(X), k))
+        pos = np.empty((len(X), k), dtype=np.int64)
+        cell_d = _sq_distances(X, self.centroids_)
+        for i, q in enumerate(X):
+            cells = np.argsort(cell_d[i])
+            rows = self._candidate_rows(cells, probe, k)
+            d = ((self.X_[rows] - q) ** 2).sum(axis=1)
+            if len(rows) > k:
+                top = np.argpartition(d, k - 1)[:k]
+                top = top[np.argsort(d[top])]
+            else:
+                top = np.argsort(d)
+            dist[i] = np.sqrt(d[top])
+            pos[i] = rows[top]
+        return dist, pos
+
+    def _candidate_rows(self, cells, probe, k):
+        # Widen the probe until at least k rows are scanned
+        while True:
+            chosen = cells[:probe]
+            ranges = [np.arange(self.offsets_[c], self.offsets_[c + 1]) for c in chosen]
+            rows = np.concatenate(ranges)
+            if len(rows) >= k or probe >= len(cells):
+                return rows
+            probe *= 2
+
+    def predict(self, X):
+        dist, pos = self._search(X)
+        targets = self.y_[pos]
+        if self.weights == "distance":
+            w = 1.0 / np.maximum(dist, 1e-12)
+            return (targets * w).sum(axis=1) / w.sum(axis=1)
+        return targets.mean(axis=1)
+
+
+###################### INDEX SELECTION ######################
+def build_knn(params):
+    """Create an unfitted KNN regressor for the index chosen at training time."""
+    k = params.get("k", 3)
+    index = params.get("index", "auto")
+    weights = params.get("weights", "uniform")
+    if index not in KNN_INDEXES:
+        raise ValueError(f"Unknown KNN index '{index}', expected one of {KNN_INDEXES}")
+    if index == "ivf":
+        return IVFKNNRegressor(n_neighbors=k, n_lists=params.get("n_lists", 0),
+                               n_probe=params.get("n_probe", KNN_N_PROBE), weights=weights)
+    from sklearn.neighbors import KNeighborsRegressor
+    return KNeighborsRegressor(n_neighbors=k, algorithm=index, weights=weights,
+                               leaf_size=params.get("leaf_size", KNN_LEAF_SIZE))
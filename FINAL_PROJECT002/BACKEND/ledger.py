@@ -0,0 +1,313 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from backend.db import db_conn
+from backend.logging_config import logger
+from frontend.config import (TOKEN_LEASE_BLOCK, TOKEN_LEASE_IDLE, TOKEN_FLUSH_INTERVAL, TOKEN_MAX_LEASES,
+                             TOKEN_SYNC_INTERVAL, TOKEN_RECALL_TIMEOUT, TOKEN_LEASE_STALE)
+
+###################### TOKEN LEDGER ######################
+# Tokens are moved out of ml_user in blocks ("leases") and spent from memory,
+# so a prediction no longer needs its own UPDATE + commit.
+#
+#  - no overdraft: a lease takes at most the balance left in ml_user, under
+#    FOR UPDATE, and local debits never go below the leased amount
+#  - no minting: tokens leave the table before they are spent and only the
+#    unspent remainder is ever added back; if a worker dies, its unspent
+#    leases are lost (at most one block per active user), never doubled
+#  - no false refusals: every worker publishes what it holds in
+#    ml_token_lease. A worker that finds ml_user short while others hold
+#    leases recalls them and debits directly once they are handed back. Once
+#    a user is down to a couple of blocks, no new leases are taken at all.
+#
+# Idle leases are returned on a timer, when too many are held, and at shutdown.
+
+# A user's full balance: what is in ml_user plus what workers have leased (alias the user table "u")
+BALANCE_SQL = "u.tokens + COALESCE((SELECT SUM(l.tokens) FROM ml_token_lease l WHERE l.email = u.email), 0)"
+
+
+class Lease:
+    __slots__ = ("balance", "used_at", "synced")
+
+    def __init__(self, balance):
+        self.balance = balance
+        self.used_at = time.monotonic()
+        self.synced = 0  # balance last written to ml_token_lease
+
+
+class TokenLedger:
+    """Per-process token balances leased in blocks from ml_user."""
+
+    def __init__(self, block, idle_seconds, flush_interval, max_leases, connection=db_conn,
+                 sync_interval=TOKEN_SYNC_INTERVAL, recall_timeout=TOKEN_RECALL_TIMEOUT,
+                 stale_seconds=TOKEN_LEASE_STALE):
+        self.block = block
+        self.idle_seconds = idle_seconds
+        self.flush_interval = flush_interval
+        self.max_leases = max_leases
+        self.connection = connection
+        self.sync_interval = sync_interval
+        self.recall_timeout = recall_timeout
+        self.stale_seconds = stale_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leases = {}
+        self.locks = [threading.Lock() for _ in range(64)]  # striped per-email locks
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.debits = 0
+        self.denied = 0
+        self.lease_queries = 0
+        self.leased = 0
+        self.returned = 0
+        self.recalls_sent = 0
+        self.recalls_answered = 0
+
+    def _lock(self, email):
+        return self.locks[hash(email) % len(self.locks)]
+
+    @contextmanager
+    def _locked(self, emails):
+        # take the email locks in stripe order so concurrent flushes / syncs cannot deadlock
+        locks = sorted({id(self._lock(e)): self._lock(e) for e in emails}.items())
+        for _, lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for _, lock in locks:
+                lock.release()
+
+    def use(self, email: str, amount: int) -> bool:
+        """Debit amount tokens from email; False if the user cannot cover it."""
+        self._start()
+        with self._lock(email):
+            lease = self.leases.get(email)
+            took = lease is None or lease.balance < amount
+            if took:
+                if lease is None:
+                    lease = Lease(0)
+                    with self.lock:
+                        self.leases[email] = lease
+                lease.balance = self._take(email, amount, lease.balance)
+            lease.used_at = time.monotonic()
+            if lease.balance < amount:
+                with self.lock:
+                    self.denied += 1
+                return False
+            lease.balance -= amount
+            if took:
+                lease.synced = lease.balance  # _take published the balance after this debit
+            with self.lock:
+                self.debits += 1
+        if len(self.leases) > self.max_leases:
+            self.flush(idle_seconds=0, limit=len(self.leases) - self.max_leases)
+        return True
+
+    def release(self, email: str):
+        """Return email's unspent lease now (e.g. before reading the balance at login)."""
+        with self._lock(email):
+            lease = self.leases.get(email)
+            if lease is not None:
+                self._give_back([(lease.balance, email)])
+                with self.lock:
+                    del self.leases[email]
+
+    def flush(self, idle_seconds=None, limit=None):
+        """Return leases idle for idle_seconds (oldest first) in one transaction."""
+        idle_seconds = self.idle_seconds if idle_seconds is None else idle_seconds
+        cutoff = time.monotonic() - idle_seconds
+        with self.lock:
+            idle = sorted((lease.used_at, email) for email, lease in self.leases.items()
+                          if lease.used_at <= cutoff)
+        emails = [email for _, email in idle[:limit]]
+        with self._locked(emails):
+            with self.lock:
+                returning = [(email, self.leases[email]) for email in emails
+                             if email in self.leases and self.leases[email].used_at <= cutoff]
+            if returning:
+                self._give_back([(lease.balance, email) for email, lease in returning])
+                with self.lock:
+                    for email, _ in returning:
+                        del self.leases[email]
+
+    def _take(self, email, amount, held):
+        """Top up a lease of held tokens for a debit of amount; returns the new lease balance."""
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT tokens FROM ml_user WHERE email=%s FOR UPDATE", (email,))
+            row = cur.fetchone()
+            available = row[0] if row else 0
+            recalled = 0
+            taken = 0
+            if available + held >= amount:
+                if available >= 2 * self.block:
+                    taken = min(available, max(self.block, amount - held))
+                else:
+                    # Low balance: take only this debit and leave the rest where every worker can see it
+                    taken = amount - held
+            else:
+                cur.execute("""
+                    SELECT COALESCE(SUM(tokens), 0) FROM ml_token_lease
+                    WHERE email=%s AND holder<>%s AND synced_at >= %s
+                """, (email, self.holder, time.time() - self.stale_seconds))
+                # Published balances only lag behind debits, so this never undercounts
+                if available + held + cur.fetchone()[0] >= amount:
+                    # Short here: hand our own lease back first, then ask the other holders for theirs
+                    taken = -held
+                    cur.execute("""
+                        UPDATE ml_token_lease SET recall = TRUE
+                        WHERE email=%s AND holder<>%s AND tokens > 0 AND synced_at >= %s
+                    """, (email, self.holder, time.time() - self.stale_seconds))
+                    recalled = cur.rowcount
+                # else: more than the user has anywhere; refuse and leave every balance where it is
+            if taken:
+                cur.execute("UPDATE ml_user SET tokens = tokens - %s WHERE email=%s", (taken, email))
+            balance = held + taken
+            self._publish(cur, [(email, balance - amount if balance >= amount else balance)])
+            cur.close()
+        with self.lock:
+            self.lease_queries += 1
+            if taken > 0:
+                self.leased += taken
+            elif taken < 0:
+                self.returned -= taken
+            self.recalls_sent += recalled > 0
+        if balance < amount and recalled:
+            balance = self._wait_for_recall(email, amount)
+        return balance
+
+    def _publish(self, cur, rows):
+        """Write this worker's lease balances, (email, balance) pairs, to ml_token_lease."""
+        now = time.time()
+        held = [(email, self.holder, balance, now) for email, balance in rows if balance]
+        if held:
+            cur.executemany("""
+                INSERT INTO ml_token_lease (email, holder, tokens, synced_at) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (email, holder) DO UPDATE SET tokens = EXCLUDED.tokens, synced_at = EXCLUDED.synced_at
+            """, held)
+        empty = [(email, self.holder) for email, balance in rows if not balance]
+        if empty:
+            cur.executemany("DELETE FROM ml_token_lease WHERE email=%s AND holder=%s", empty)
+
+    def _wait_for_recall(self, email, amount):
+        """Debit amount directly once other workers have handed back enough of their leases."""
+        deadline = time.monotonic() + self.recall_timeout
+        while True:
+            with self.connection() as conn:
+                cur = conn.cursor()
+                # Count first: a lease handed back after this is visible to the UPDATE below
+                cur.execute("""
+                    SELECT COUNT(*) FROM ml_token_lease
+                    WHERE email=%s AND holder<>%s AND recall AND synced_at >= %s
+                """, (email, self.holder, time.time() - self.stale_seconds))
+                pending = cur.fetchone()[0]
+                cur.execute("""
+                    UPDATE ml_user SET tokens = tokens - %s
+                    WHERE email=%s AND tokens >= %s
+                    RETURNING tokens;
+                """, (amount, email, amount))
+                debited = cur.fetchone() is not None
+                cur.close()
+            if debited:
+                with self.lock:
+                    self.leased += amount
+                return amount
+            if not pending or time.monotonic() >= deadline:
+                return 0
+            time.sleep(self.sync_interval / 5)
+
+    def _give_back(self, rows):
+        with self.connection() as conn:
+            cur = conn.cursor()
+            credit = [(balance, email) for balance, email in rows if balance]
+            if credit:
+                cur.executemany("UPDATE ml_user SET tokens = tokens + %s WHERE email=%s", credit)
+            cur.executemany("DELETE FROM ml_token_lease WHERE email=%s AND holder=%s",
+                            [(email, self.holder) for _, email in rows])
+            cur.close()
+        with self.lock:
+            self.returned += sum(balance for balance, _ in rows)
+
+    def sync(self):
+        """Publish changed lease balances and hand back the leases other workers recalled."""
+        with self.lock:
+            emails = [email for email, lease in self.leases.items() if lease.balance != lease.synced]
+            holding = bool(self.leases)
+        if not holding:
+            return
+        # Under the email locks, so a lease returned meanwhile is not published again
+        with self._locked(emails):
+            with self.lock:
+                changed = [(email, self.leases[email]) for email in emails if email in self.leases]
+            with self.connection() as conn:
+                cur = conn.cursor()
+                # Upsert: the row is gone if a refused debit left this lease at zero for a while
+                self._publish(cur, [(email, lease.balance) for email, lease in changed])
+                cur.execute("SELECT email FROM ml_token_lease WHERE holder=%s AND recall", (self.holder,))
+                recalled = [row[0] for row in cur.fetchall()]
+                cur.close()
+            for email, lease in changed:
+                lease.synced = lease.balance
+        for email in recalled:
+            self.release(email)
+        with self.lock:
+            self.recalls_answered += len(recalled)
+
+    def heartbeat(self):
+        """Mark this worker's leases live and drop the ones dead workers left behind."""
+        now = time.time()
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("UPDATE ml_token_lease SET synced_at=%s WHERE holder=%s", (now, self.holder))
+            cur.execute("DELETE FROM ml_token_lease WHERE synced_at < %s", (now - self.stale_seconds,))
+            cur.close()
+
+    def _start(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="token-ledger", daemon=True)
+                    self.thread.start()
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        next_beat = time.monotonic() + self.stale_seconds / 4
+        while not self.stopped.wait(self.sync_interval):
+            try:
+                self.sync()
+                if time.monotonic() >= next_flush:
+                    next_flush = time.monotonic() + self.flush_interval
+                    self.flush()
+                if time.monotonic() >= next_beat:
+                    next_beat = time.monotonic() + self.stale_seconds / 4
+                    self.heartbeat()
+            except Exception as e:
+                logger.warning(f"Token ledger flush failed: {e}")
+
+    def shutdown(self):
+        """Stop the flush timer and return every lease."""
+        self.stopped.set()
+        self.flush(idle_seconds=0)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "holder": self.holder,
+                "leases": len(self.leases),
+                "held_tokens": sum(lease.balance for lease in self.leases.values()),
+                "block": self.block,
+                "debits": self.debits,
+                "denied": self.denied,
+                "lease_queries": self.lease_queries,
+                "leased_tokens": self.leased,
+                "returned_tokens": self.returned,
+                "recalls_sent": self.recalls_sent,
+                "recalls_answered": self.recalls_answered,
+            }
+
+
+token_ledger = TokenLedger(TOKEN_LEASE_BLOCK, TOKEN_LEASE_IDLE, TOKEN_FLUSH_INTERVAL, TOKEN_MAX_LEASES)
@@ -1,14 +1,30 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+from frontend.config import LOG_QUEUE_SIZE
 
-logging.basicConfig(
-    filename="server.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 
-logger = logging.getLogger()
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread; drops them instead of blocking when it falls behind."""
 
+    dropped = 0
 
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
+# Request threads only enqueue; the listener thread does the file writes
+_file_handler = logging.FileHandler("server.log")
+_file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+_listener = logging.handlers.QueueListener(queue.Queue(LOG_QUEUE_SIZE), _file_handler)
+queue_handler = DroppingQueueHandler(_listener.queue)
+_listener.start()
+atexit.register(_listener.stop)
 
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.addHandler(queue_handler)
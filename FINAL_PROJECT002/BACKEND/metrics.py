@@ -0,0 +1,277 @@
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from starlette.routing import Match
+from frontend.config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS, PROFILER_INTERVAL, PROFILER_MAX_SECONDS
+
+###################### METRICS ######################
+# In-process histograms and gauges rendered in the Prometheus text format on
+# GET /metrics. Requests are timed by MetricsMiddleware, labelled with the
+# route template (/models/{model_name}/predict, not every model name); the stages
+# inside a request are timed with `with stage("name"):`. Every worker
+# process keeps its own numbers, so scrape each worker (or run one).
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label value tuple."""
+
+    def __init__(self, name, help, labels=(), buckets=METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in self.series.items()]
+        names = self.labels + ("le",)
+        for labels, counts, total, count in sorted(snapshot):
+            running = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                running += n
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels):
+        self.inc(*labels, amount=-1)
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def render(self):
+        with self.lock:
+            snapshot = sorted(self.values.items())
+        return ([f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+                + [f"{self.name}{_labels(self.labels, labels)} {value}" for labels, value in snapshot])
+
+
+def gauge_lines(name, help, labels, values):
+    """Render a gauge computed at scrape time from {label values: value}."""
+    gauge = Gauge(name, help, labels)
+    gauge.values = values
+    return gauge.render()
+
+
+request_latency = Histogram("http_request_duration_seconds", "Request latency by route",
+                            ("method", "route", "status"))
+stage_latency = Histogram("stage_duration_seconds", "Latency of the timed stages inside requests",
+                          ("stage",))
+model_load_latency = Histogram("model_load_duration_seconds", "Reading a model from disk (cache misses)",
+                               ("format",))
+in_flight = Gauge("http_requests_in_flight", "Requests being handled, by route", ("route",))
+
+# Last load of each model: name -> (seconds, bytes); bounded so deleted models age out
+MAX_MODELS_TRACKED = 1000
+_model_loads = OrderedDict()
+_model_lock = threading.Lock()
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block into stage_duration_seconds{stage=name}."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_latency.observe(time.perf_counter() - start, name)
+
+
+def record_model_load(name, fmt, seconds, size):
+    if not METRICS_ENABLED:
+        return
+    model_load_latency.observe(seconds, fmt)
+    with _model_lock:
+        _model_loads[name] = (seconds, size)
+        _model_loads.move_to_end(name)
+        while len(_model_loads) > MAX_MODELS_TRACKED:
+            _model_loads.popitem(last=False)
+
+
+def model_load_lines():
+    with _model_lock:
+        loads = list(_model_loads.items())
+    return (gauge_lines("model_last_load_seconds", "Duration of the last load of each model",
+                        ("model",), {(name,): s for name, (s, _) in loads})
+            + gauge_lines("model_size_bytes", "Size on disk of each loaded model",
+                          ("model",), {(name,): b for name, (_, b) in loads}))
+
+
+def render(extra_lines=()):
+    lines = []
+    for metric in (request_latency, stage_latency, model_load_latency, in_flight):
+        lines += metric.render()
+    lines += model_load_lines()
+    lines += extra_lines
+    return "\n".join(lines) + "\n"
+
+
+###################### REQUEST MIDDLEWARE ######################
+MAX_ROUTE_CACHE = 10000
+
+
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge and latency histogram per (method, route template, status)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = {}  # (method, path) -> route template
+
+    def route_of(self, scope):
+        key = (scope["method"], scope["path"])
+        route = self.routes.get(key)
+        if route is None:
+            route = "unmatched"
+            for candidate in scope["app"].router.routes:
+                match, _ = candidate.matches(scope)
+                if match == Match.FULL:
+                    route = candidate.path
+                    break
+            if len(self.routes) >= MAX_ROUTE_CACHE:
+                self.routes.clear()
+            self.routes[key] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        route = self.route_of(scope)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        in_flight.inc(route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec(route)
+            request_latency.observe(time.perf_counter() - start, scope["method"], route, status[0])
+
+
+###################### SAMPLING PROFILER ######################
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval while running.
+
+    Off by default; /admin/profiler/start turns it on. Results are collapsed
+    stacks ("outer;inner;leaf count"), the input format of flamegraph.pl and
+    speedscope. It stops itself after PROFILER_MAX_SECONDS.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval = PROFILER_INTERVAL
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, interval=PROFILER_INTERVAL, max_seconds=PROFILER_MAX_SECONDS):
+        with self.lock:
+            if self.running:
+                return False
+            self.stacks = Counter()
+            self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, args=(interval, max_seconds),
+                                           name="sampling-profiler", daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        self.stop_event.set()
+        thread = self.thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self, interval, max_seconds):
+        own = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        while not self.stop_event.wait(interval) and time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                with self.lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.stopped_at = time.time()
+
+    def collapsed(self, top=None):
+        with self.lock:
+            common = self.stacks.most_common(top)
+        return "\n".join(f"{stack} {count}" for stack, count in common) + "\n"
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+        }
+
+
+profiler = SamplingProfiler()
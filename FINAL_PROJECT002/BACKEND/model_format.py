@@ -0,0 +1,182 @@
+import json
+import os
+import numpy as np
+from backend.ingest import LinearStats
+from backend.knn_index import IVFKNNRegressor
+
+###################### NATIVE MODEL FORMAT ######################
+# A model is a directory holding header.json plus one .npy file per array:
+#
+#   {name}/header.json   {"format": 1, "estimator": ..., "params": ..., "scalars": ..., "meta": ...}
+#   {name}/{array}.npy   raw arrays, opened with np.load(mmap_mode="r")
+#
+# Small arrays (a LinearRegression's coefficients) are inlined in the header,
+# so a linear model is a single JSON file. Large arrays (KNN training
+# matrices, tree nodes) are memory-mapped, so every worker shares one
+# page-cached copy instead of unpickling its own.
+
+FORMAT_VERSION = 1
+HEADER = "header.json"
+INLINE_MAX_BYTES = 64 * 1024  # smaller plain arrays live in header.json
+MMAP_MIN_BYTES = 1 << 20      # smaller .npy files are read into memory
+
+
+def _linear_parts(model):
+    arrays = {"coef": np.asarray(model.coef_)}
+    scalars = {"intercept": float(model.intercept_)}
+    stats = getattr(model, "stats_", None)
+    if stats is not None and stats.n:
+        arrays.update(stats_sx=stats.sx, stats_sxx=stats.sxx, stats_sxy=stats.sxy,
+                      stats_shift_x=stats.shift_x)
+        scalars.update(stats_n=stats.n, stats_sy=stats.sy, stats_shift_y=stats.shift_y)
+    return arrays, scalars
+
+
+def _linear_build(params, arrays, scalars, cls="LinearRegression"):
+    from sklearn import linear_model
+    model = getattr(linear_model, cls)(**params)
+    model.coef_ = arrays["coef"]
+    model.intercept_ = scalars["intercept"]
+    model.n_features_in_ = len(model.coef_)
+    if "stats_n" in scalars:
+        stats = LinearStats(len(model.coef_))
+        stats.n = scalars["stats_n"]
+        stats.sy = scalars["stats_sy"]
+        stats.shift_y = scalars["stats_shift_y"]
+        stats.sx = np.array(arrays["stats_sx"])
+        stats.sxx = np.array(arrays["stats_sxx"])
+        stats.sxy = np.array(arrays["stats_sxy"])
+        stats.shift_x = np.array(arrays["stats_shift_x"])
+        model.stats_ = stats
+    return model
+
+
+def _knn_parts(model):
+    import sklearn
+    arrays = {"fit_X": model._fit_X, "y": model._y}
+    scalars = {"fit_method": model._fit_method}
+    if model._tree is not None:
+        # Keep the built kd/ball tree so loading does not rebuild it
+        state = model._tree.__getstate__()
+        if len(state) == 13 and state[12] is None:
+            if state[0] is not model._fit_X:
+                arrays["tree_data"] = state[0]
+            arrays.update(tree_idx=state[1], tree_node_data=state[2], tree_node_bounds=state[3])
+            scalars.update(tree_ints=[int(v) for v in state[4:11]], sklearn=sklearn.__version__)
+    return arrays, scalars
+
+
+def _knn_build(params, arrays, scalars):
+    import sklearn
+    from sklearn.metrics import DistanceMetric
+    from sklearn.neighbors import KNeighborsRegressor, KDTree, BallTree
+    # The data was validated at training time; skip the finite-value scan over the mapped matrix
+    with sklearn.config_context(assume_finite=True):
+        if scalars.get("sklearn") != sklearn.__version__:
+            # Tree layout is sklearn-internal; rebuild it if it was written by another version
+            return KNeighborsRegressor(**params).fit(arrays["fit_X"], arrays["y"])
+        # Fit as brute (no copy of the mapped matrix), then attach the stored tree
+        model = KNeighborsRegressor(**{**params, "algorithm": "brute"}).fit(arrays["fit_X"], arrays["y"])
+    model.algorithm = params["algorithm"]
+    tree_cls = KDTree if scalars["fit_method"] == "kd_tree" else BallTree
+    tree = tree_cls.__new__(tree_cls)
+    metric = DistanceMetric.get_metric(model.effective_metric_, **model.effective_metric_params_)
+    tree.__setstate__((arrays.get("tree_data", arrays["fit_X"]), arrays["tree_idx"],
+                       arrays["tree_node_data"], arrays["tree_node_bounds"],
+                       *scalars["tree_ints"], metric, None))
+    model._tree = tree
+    model._fit_method = scalars["fit_method"]
+    return model
+
+
+def _ivf_parts(model):
+    return {"centroids": model.centroids_, "offsets": model.offsets_, "index": model.index_,
+            "X": model.X_, "y": model.y_}, {}
+
+
+def _ivf_build(params, arrays, scalars):
+    model = IVFKNNRegressor(**params)
+    model.centroids_ = arrays["centroids"]
+    model.offsets_ = arrays["offsets"]
+    model.index_ = arrays["index"]
+    model.X_ = arrays["X"]
+    model.y_ = arrays["y"]
+    model.n_features_in_ = model.X_.shape[1]
+    return model
+
+
+def _ivf_params(model):
+    return {k: getattr(model, k) for k in ("n_neighbors", "n_lists", "n_probe", "weights",
+                                           "n_iter", "sample_per_list", "random_state")}
+
+
+# estimator class name -> (get params, split into arrays/scalars, rebuild);
+# extended by backend.algorithms.register()
+ESTIMATORS = {
+    "LinearRegression": (lambda m: m.get_params(), _linear_parts, _linear_build),
+    "Ridge": (lambda m: m.get_params(), _linear_parts, lambda p, a, s: _linear_build(p, a, s, "Ridge")),
+    "KNeighborsRegressor": (lambda m: m.get_params(), _knn_parts, _knn_build),
+    "IVFKNNRegressor": (_ivf_params, _ivf_parts, _ivf_build),
+}
+
+
+def supports(model):
+    return type(model).__name__ in ESTIMATORS
+
+
+def write_model(path, model, meta):
+    """Write model + meta into the (new, empty) directory path; every file is fsynced, header.json last."""
+    get_params, parts, _ = ESTIMATORS[type(model).__name__]
+    arrays, scalars = parts(model)
+    os.makedirs(path)
+    stored = {}
+    for key, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        if arr.nbytes <= INLINE_MAX_BYTES and arr.dtype.names is None:
+            stored[key] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "data": arr.ravel().tolist()}
+        else:
+            with open(os.path.join(path, f"{key}.npy"), "wb") as f:
+                np.save(f, arr, allow_pickle=False)
+                f.flush()
+                os.fsync(f.fileno())
+            stored[key] = {"file": f"{key}.npy"}
+    names = getattr(model, "feature_names_in_", None)
+    header = {
+        "format": FORMAT_VERSION,
+        "estimator": type(model).__name__,
+        "params": get_params(model),
+        "scalars": scalars,
+        "arrays": stored,
+        "feature_names": None if names is None else [str(n) for n in names],
+        "meta": meta,
+    }
+    with open(os.path.join(path, HEADER), "w") as f:
+        json.dump(header, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_model(path):
+    """Load a model written by write_model; large arrays come back as read-only memmaps."""
+    with open(os.path.join(path, HEADER)) as f:
+        header = json.load(f)
+    if header["format"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format {header['format']} in {path}")
+    arrays = {}
+    for key, entry in header["arrays"].items():
+        if "file" in entry:
+            file = os.path.join(path, entry["file"])
+            mmap = "r" if os.path.getsize(file) >= MMAP_MIN_BYTES else None
+            arrays[key] = np.load(file, mmap_mode=mmap, allow_pickle=False)
+        else:
+            arrays[key] = np.array(entry["data"], dtype=entry["dtype"]).reshape(entry["shape"])
+    _, _, build = ESTIMATORS[header["estimator"]]
+    model = build(header["params"], arrays, header["scalars"])
+    if header["feature_names"] is not None:
+        model.feature_names_in_ = np.asarray(header["feature_names"], dtype=object)
+    return model, header["meta"]
+
+
+def model_bytes(path):
+    """Total size of the files in a model directory."""
+    return sum(entry.stat().st_size for entry in os.scandir(path))
@@ -1,24 +1,342 @@
 import pickle
 import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from backend.predictors import compile_predictor
+import backend.algorithms  # noqa: F401  (imported to register the algorithms' serializers and predictors)
+from backend.result_cache import result_cache
+from backend.metrics import stage, record_model_load
+from backend.model_format import HEADER, supports, write_model, read_model, model_bytes
+from frontend.config import MODEL_CACHE_MAX_BYTES, MODEL_KEEP_VERSIONS
 
 MODELS_DIR = "../models"
 
-def save_model(name, model, meta):
-    """Save a model and its metadata."""
-    if not os.path.exists(MODELS_DIR):
-        os.makedirs(MODELS_DIR)
-    with open(os.path.join(MODELS_DIR, f"{name}.pkl"), "wb") as f:
-        pickle.dump(model, f)
-    with open(os.path.join(MODELS_DIR, f"{name}_meta.pkl"), "wb") as f:
-        pickle.dump(meta, f)
 
-def load_model(name):
-    """Load a model and its metadata."""
-    with open(os.path.join(MODELS_DIR, f"{name}.pkl"), "rb") as f:
+###################### MODEL CACHE ######################
+class ModelCache:
+    """LRU cache of loaded models, bounded by the size of their files on disk."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # name -> (version, size, (model, meta, predictor, version))
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, name, version):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(name)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, name, version, size, value):
+        with self.lock:
+            self._drop(name)
+            if size > self.max_bytes:
+                return
+            self.entries[name] = (version, size, value)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate(self, name):
+        with self.lock:
+            self._drop(name)
+
+    def _drop(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "models": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+model_cache = ModelCache(MODEL_CACHE_MAX_BYTES)
+
+
+###################### VERSIONED STORAGE ######################
+# Every save writes a new, immutable version directory, then repoints CURRENT:
+#
+#   {name}/v000007/   header.json + .npy files (native) or model.pkl + meta.pkl
+#   {name}/CURRENT    "v000007", swapped in with os.replace
+#
+# A version is written under a temp name, fsynced and renamed into place, so
+# it is complete before CURRENT can name it. A reader resolves CURRENT once
+# and loads model and metadata from that one directory, so it never sees a
+# half-written model or another version's metadata. The newest
+# MODEL_KEEP_VERSIONS versions are kept. Models saved in the older layouts
+# ({name}.pkl + {name}_meta.pkl, or {name}/header.json) are still read and
+# move to this one on their next save.
+#
+# Saves of one name (from any process) publish and collect under {name}/.lock:
+# CURRENT only ever moves to a newer version, and the version it names is
+# never collected. An update of a loaded model (an append) passes the version
+# it started from as `expect`; if another save has published since, it raises
+# VersionConflict instead of overwriting that save.
+
+class VersionConflict(Exception):
+    """The model's current version is no longer the one an update was based on."""
+
+
+CURRENT = "CURRENT"
+LOCK = ".lock"
+TMP_PREFIX = ".tmp-"
+TMP_MAX_AGE = 3600  # seconds before a crashed save's temp directory is removed
+
+
+def _fsync_dir(path):
+    if os.name == "nt":  # directories cannot be opened for fsync on Windows
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _name_lock(root):
+    """Exclusive lock on one model name, across threads and processes."""
+    fd = os.open(os.path.join(root, LOCK), os.O_RDWR | os.O_CREAT)
+    try:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # gives up after ~10s; keep waiting
+                    break
+                except OSError:
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # closing releases the lock
+
+
+def _read_current(root):
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _versions(root):
+    return sorted(e for e in os.listdir(root) if e.startswith("v") and e[1:].isdigit())
+
+
+def _locate(name):
+    """Return (version, directory) a reader should load; directory is None for legacy pickles."""
+    root = os.path.join(MODELS_DIR, name)
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            version = f.read().strip()
+        return version, os.path.join(root, version)
+    except FileNotFoundError:
+        pass
+    # Legacy layouts are rewritten in place, so they are identified by file stats
+    if os.path.isfile(os.path.join(root, HEADER)):
+        header_st = os.stat(os.path.join(root, HEADER))
+        return ("native", header_st.st_ino, header_st.st_mtime_ns), root
+    model_st = os.stat(os.path.join(MODELS_DIR, f"{name}.pkl"))
+    meta_st = os.stat(os.path.join(MODELS_DIR, f"{name}_meta.pkl"))
+    return (model_st.st_mtime_ns, model_st.st_size, meta_st.st_mtime_ns, meta_st.st_size), None
+
+
+def current_version(name):
+    """The version id readers of this model currently load."""
+    return _locate(name)[0]
+
+
+def _current_or_none(name):
+    try:
+        return current_version(name)
+    except FileNotFoundError:
+        return None
+
+
+def stored_models():
+    """Every model on disk, in any layout: {name: mtime of its last save}."""
+    found = {}
+    if not os.path.isdir(MODELS_DIR):  # nothing saved yet
+        return found
+    for entry in os.scandir(MODELS_DIR):
+        if entry.is_dir():
+            for marker in (CURRENT, HEADER):
+                path = os.path.join(entry.path, marker)
+                if os.path.exists(path):
+                    found[entry.name] = os.path.getmtime(path)
+                    break
+        elif entry.name.endswith(".pkl") and not entry.name.endswith("_meta.pkl"):
+            found[entry.name[:-len(".pkl")]] = entry.stat().st_mtime
+    return found
+
+
+###################### SAVE / LOAD ######################
+def save_model(name, model, meta, expect=None):
+    """Save a model and its metadata as a new version, make it current and return its id.
+
+    With expect (a version from load_versioned_model), publish only if that is
+    still the current version; otherwise the new version is discarded and
+    VersionConflict is raised.
+    """
+    root = os.path.join(MODELS_DIR, name)
+    os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f"{TMP_PREFIX}{uuid.uuid4().hex}")
+    try:
+        if supports(model):
+            write_model(tmp, model, meta)
+        else:
+            os.makedirs(tmp)
+            _write_pickle(os.path.join(tmp, "model.pkl"), model)
+            _write_pickle(os.path.join(tmp, "meta.pkl"), meta)
+        _fsync_dir(tmp)
+        version = _claim_version(root, tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    with _name_lock(root):
+        if expect is not None and _current_or_none(name) != expect:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+            raise VersionConflict(f"Model '{name}' was saved again while this update ran")
+        current = _read_current(root)
+        # A concurrent save that claimed a later version may have published already
+        if current is None or int(version[1:]) > int(current[1:]):
+            _publish(root, version)
+            _remove_legacy(name, root)
+        _collect(root)
+    model_cache.invalidate(name)
+    result_cache.invalidate(name)
+    return version
+
+def _write_pickle(path, obj):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+def _claim_version(root, tmp):
+    # Renaming onto an existing version fails, so concurrent saves never share a number
+    while True:
+        versions = _versions(root)
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:06d}"
+        try:
+            os.rename(tmp, os.path.join(root, version))
+        except OSError:
+            if not os.path.exists(os.path.join(root, version)):
+                raise
+            continue
+        _fsync_dir(root)
+        return version
+
+def _publish(root, version):
+    tmp = os.path.join(root, f"{TMP_PREFIX}{uuid.uuid4().hex}")
+    with open(tmp, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(root, CURRENT))
+    _fsync_dir(root)
+
+def _remove_legacy(name, root):
+    paths = [os.path.join(MODELS_DIR, f"{name}{suffix}") for suffix in (".pkl", "_meta.pkl")]
+    paths += [e.path for e in os.scandir(root) if e.is_file() and (e.name == HEADER or e.name.endswith(".npy"))]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _collect(root):
+    """Delete versions older than the newest MODEL_KEEP_VERSIONS and stale temp files (under _name_lock)."""
+    current = _read_current(root)
+    for version in _versions(root)[:-MODEL_KEEP_VERSIONS]:
+        if version != current:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+    cutoff = time.time() - TMP_MAX_AGE
+    for entry in os.scandir(root):
+        if entry.name.startswith(TMP_PREFIX) and entry.stat().st_mtime < cutoff:
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+
+def _read(name, path):
+    """Return (model, meta, size on disk) from a version (or legacy) directory."""
+    if path is None:
+        path, model_file, meta_file = MODELS_DIR, f"{name}.pkl", f"{name}_meta.pkl"
+    elif os.path.isfile(os.path.join(path, HEADER)):
+        model, meta = read_model(path)
+        return model, meta, model_bytes(path)
+    else:
+        model_file, meta_file = "model.pkl", "meta.pkl"
+    with open(os.path.join(path, model_file), "rb") as f:
         model = pickle.load(f)
-    with open(os.path.join(MODELS_DIR, f"{name}_meta.pkl"), "rb") as f:
+    with open(os.path.join(path, meta_file), "rb") as f:
         meta = pickle.load(f)
+    size = os.path.getsize(os.path.join(path, model_file)) + os.path.getsize(os.path.join(path, meta_file))
+    return model, meta, size
+
+def _load(name):
+    for attempt in range(3):
+        version, path = _locate(name)
+        cached = model_cache.get(name, version)
+        if cached is not None:
+            return cached
+        start = time.perf_counter()
+        try:
+            with stage("load_model"):
+                model, meta, size = _read(name, path)
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+            continue  # a newer save removed this version after CURRENT was read; resolve again
+        fmt = "native" if path is not None and os.path.isfile(os.path.join(path, HEADER)) else "pickle"
+        record_model_load(name, fmt, time.perf_counter() - start, size)
+        # Compile once per load so requests skip DataFrame construction
+        with stage("compile_predictor"):
+            loaded = (model, meta, compile_predictor(model, meta), version)
+        model_cache.put(name, version, size, loaded)
+        return loaded
+
+def load_model(name):
+    """Load a model and its metadata, served from the cache while its version is current."""
+    model, meta, _, _ = _load(name)
     return model, meta
 
+def load_predictor(name):
+    """Load the compiled predictor for a model (see backend.predictors)."""
+    return _load(name)[2]
 
+def load_versioned_model(name):
+    """Load (model, meta, version); pass version to save_model(expect=...) to save an update of it."""
+    model, meta, _, version = _load(name)
+    return model, meta, version
 
+def load_versioned_predictor(name):
+    """Load (predictor, version); hold on to the predictor to serve a whole request from one version."""
+    _, _, predictor, version = _load(name)
+    return predictor, version
@@ -0,0 +1,126 @@
+import copy
+import threading
+import numpy as np
+from backend.metrics import stage
+
+###################### COMPILED PREDICTORS ######################
+# Built once when a model is loaded. They check the feature order against the
+# metadata up front and then predict straight from NumPy arrays, skipping the
+# per-request DataFrame construction and sklearn input validation.
+
+
+class Predictor:
+    """Fallback for estimators without a fast path: the original DataFrame route."""
+
+    inline = False  # True when a single prediction is cheap enough to run on the event loop
+
+    @classmethod
+    def accepts(cls, model):
+        """False when this fitted model needs the generic fallback instead."""
+        return True
+
+    def __init__(self, model, features):
+        self.model = model
+        self.features = list(features)
+        self.n_features = len(self.features)
+        self._local = threading.local()
+
+    def _row(self, values):
+        """Copy one input row into this thread's preallocated (1, n_features) buffer."""
+        if len(values) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} values: {self.features}")
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = np.empty((1, self.n_features))
+        buf[0] = values
+        return buf
+
+    def row_from_mapping(self, mapping):
+        missing = [f for f in self.features if f not in mapping]
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        return [mapping[f] for f in self.features]
+
+    def predict_row(self, values):
+        return float(self.predict_matrix(self._row(values))[0])
+
+    def predict_matrix(self, X):
+        import pandas as pd  # only models without a fast path need it
+        with stage("dataframe"):
+            frame = pd.DataFrame(X, columns=self.features, copy=False)
+        return self.model.predict(frame)
+
+
+class LinearPredictor(Predictor):
+    """X @ coef.T + intercept, the same expression LinearRegression/Ridge.predict evaluates."""
+
+    inline = True
+
+    @classmethod
+    def accepts(cls, model):
+        return np.ndim(model.coef_) == 1  # single target
+
+    def __init__(self, model, features):
+        super().__init__(model, features)
+        self.coef_t = np.asarray(model.coef_, dtype=np.float64).T
+        self.intercept = model.intercept_
+
+    def predict_matrix(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_t + self.intercept
+
+
+class KNNPredictor(Predictor):
+    """Queries the fitted neighbour index directly and averages like KNeighborsRegressor."""
+
+    def __init__(self, model, features):
+        super().__init__(model, features)
+        self.tree = model._tree
+        self.k = model.n_neighbors
+        self.y = model._y
+        self.y_col = np.asarray(model._y).reshape(-1, 1)  # sklearn averages over (n, 1) targets
+        # brute force has no index to call; use a shallow copy without feature
+        # names so sklearn accepts plain arrays (same code path, same result)
+        self.plain = copy.copy(model)
+        if hasattr(self.plain, "feature_names_in_"):
+            del self.plain.feature_names_in_
+
+    def predict_matrix(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.tree is None or self.model.weights not in ("uniform", "distance") or self.y.ndim != 1:
+            return self.plain.predict(X)
+        dist, ind = self.tree.query(X, k=self.k)
+        if self.model.weights == "uniform":
+            return np.mean(self.y_col[ind], axis=1).ravel()
+        # sklearn: inverse distance, and exact matches take all the weight
+        with np.errstate(divide="ignore"):
+            w = 1.0 / dist
+        exact = np.isinf(w).any(axis=1)
+        w[exact] = np.isinf(w[exact]).astype(float)
+        return np.sum(self.y[ind] * w, axis=1) / np.sum(w, axis=1)
+
+
+class IVFPredictor(Predictor):
+    def predict_matrix(self, X):
+        return self.model.predict(X)
+
+
+# estimator class name -> predictor, keyed by name so sklearn is only imported
+# once a model is loaded; extended by backend.algorithms.register()
+PREDICTORS = {
+    "LinearRegression": LinearPredictor,
+    "Ridge": LinearPredictor,
+    "KNeighborsRegressor": KNNPredictor,
+    "IVFKNNRegressor": IVFPredictor,
+}
+
+
+def compile_predictor(model, meta):
+    """Build the fast predictor for a loaded model, checking its feature order once."""
+    features = meta["features"]
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None and list(names) != list(features):
+        raise ValueError(f"Model was fitted on {list(names)} but metadata lists {features}")
+    cls = PREDICTORS.get(type(model).__name__, Predictor)
+    if not cls.accepts(model):
+        cls = Predictor
+    return cls(model, features)
@@ -0,0 +1,35 @@
+import argparse
+from backend.db import db_conn
+from backend.models import stored_models, load_model
+
+###################### REGISTRY BACKFILL ######################
+# GET /models lists ml_models. Models saved before training jobs recorded
+# themselves there only exist on disk; this adds them (owner unknown).
+# Usage (from FINAL_PROJECT002):  python -m backend.register_models
+
+
+def algorithm_of(model, meta):
+    if "algorithm" in meta:
+        return meta["algorithm"]
+    return "linearregression" if type(model).__name__ == "LinearRegression" else "knn"
+
+
+def main():
+    argparse.ArgumentParser(description="Add models found in MODELS_DIR to ml_models").parse_args()
+    rows = []
+    for name in sorted(stored_models()):
+        model, meta = load_model(name)
+        rows.append((name, algorithm_of(model, meta)))
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.executemany("""
+            INSERT INTO ml_models (model_name, algorithm)
+            VALUES (%s, %s)
+            ON CONFLICT (model_name) DO NOTHING;
+        """, rows)
+        cur.close()
+    print(f"{len(rows)} models on disk checked against ml_models")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from frontend.config import PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL
+
+###################### PREDICTION RESULT CACHE ######################
+# Memoizes single-row predictions under (model name, model version, input row).
+# The version is the model's saved version, so a retrained model never serves an
+# old result; save_model / finished jobs also drop the model's entries so they
+# do not sit in memory until they age out. Enabled with PREDICTION_CACHE_ENABLED.
+
+
+class ResultCache:
+    """LRU + TTL cache of predictions, with hit/miss counts per model."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # (name, version, row) -> (prediction, expires_at)
+        self.by_model = {}            # name -> keys currently cached for it
+        self.counts = {}              # name -> [hits, misses]
+        self.evictions = 0
+        self.expired = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, version, values):
+        # Values are already floats in the model's feature order; 0.0 and -0.0
+        # compare (and hash) equal, NaN never matches and is simply not reused
+        return name, version, tuple(values)
+
+    def get(self, name, version, values):
+        key = self.key(name, version, values)
+        with self.lock:
+            counts = self.counts.setdefault(name, [0, 0])
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] <= time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                counts[1] += 1
+                return None
+            self.entries.move_to_end(key)
+            counts[0] += 1
+            return entry[0]
+
+    def put(self, name, version, values, prediction):
+        key = self.key(name, version, values)
+        with self.lock:
+            self.entries[key] = (prediction, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            self.by_model.setdefault(name, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, name):
+        with self.lock:
+            for key in self.by_model.pop(name, ()):
+                self.entries.pop(key, None)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        keys = self.by_model.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.by_model[key[0]]
+
+    def stats(self):
+        with self.lock:
+            models = {}
+            for name, (hits, misses) in self.counts.items():
+                lookups = hits + misses
+                models[name] = {
+                    "entries": len(self.by_model.get(name, ())),
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "models": models,
+            }
+
+
+result_cache = ResultCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
@@ -0,0 +1,46 @@
+import time
+from backend.models import save_model, load_versioned_model, VersionConflict
+from backend.algorithms import get_algorithm
+from frontend.config import APPEND_RETRIES
+
+
+###################### TRAINING ######################
+def run_training_job(job_id, progress, csv_path, algorithm, model_name, features, label, params):
+    """Parse, fit and save one model inside a worker process, reporting progress as it goes."""
+    started_at = time.time()
+    progress[job_id] = ("running", 0.0, started_at)
+
+    def report(fraction):
+        progress[job_id] = ("running", fraction, started_at)
+
+    model = get_algorithm(algorithm).fit(csv_path, features, label, params, report)
+    report(0.8)
+    save_model(model_name, model, {"features": features, "label": label,
+                                   "algorithm": algorithm, "params": params})
+    report(1.0)
+
+
+def run_append_job(job_id, progress, csv_path, algorithm, model_name, features, label, params):
+    """Add the rows of csv_path to a saved model and save it as a new version."""
+    started_at = time.time()
+    progress[job_id] = ("running", 0.0, started_at)
+
+    def report(fraction):
+        progress[job_id] = ("running", fraction, started_at)
+
+    append = get_algorithm(algorithm).append
+    if append is None:
+        raise ValueError(f"{algorithm} models do not support appending rows")
+    for attempt in range(APPEND_RETRIES + 1):
+        base, meta, based_on = load_versioned_model(model_name)
+        model = append(base, csv_path, meta["features"], meta["label"], report)
+        report(0.8)
+        try:
+            # Published only if no other save (from any worker) replaced based_on meanwhile
+            version = save_model(model_name, model, meta, expect=based_on)
+        except VersionConflict:
+            if attempt == APPEND_RETRIES:
+                raise
+            continue  # add the rows to the newer version instead
+        report(1.0)
+        return {"version": version}
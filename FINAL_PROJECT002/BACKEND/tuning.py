@@ -0,0 +1,157 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import as_completed
+import numpy as np
+from backend.executor import get_executor
+from backend.ingest import read_arrays, LinearStats, linear_model_from_stats
+from backend.knn_index import build_knn, IVFKNNRegressor
+from backend.models import save_model
+from frontend.config import INGEST_CHUNK_ROWS
+
+###################### HYPERPARAMETER TUNING ######################
+# A tuning job parses the upload once into X.npy / y.npy, then fans k-fold CV
+# out to the "train" process pool: one task per fold, each memory-mapping the
+# same arrays. KNN folds query the neighbour index once at the largest k and
+# score every (k, weights) pair from that result; linear folds solve every
+# ridge alpha from one set of sufficient statistics. The best configuration
+# is refit on all rows and saved like a normal training job.
+#
+# The coordinator runs on the "tune" thread pool so it never occupies a
+# train worker while waiting for its own fold tasks.
+
+SEED = 0
+
+
+def _folds(n, n_folds, fold):
+    """(train rows, validation rows) of one fold; every task derives the same split."""
+    perm = np.random.default_rng(SEED).permutation(n)
+    parts = np.array_split(perm, n_folds)
+    val = np.sort(parts[fold])
+    train = np.sort(np.concatenate(parts[:fold] + parts[fold + 1:]))
+    return train, val
+
+
+def _load_shared(data_dir):
+    return (np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r"),
+            np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r"))
+
+
+def _scores(y_true, y_pred):
+    err = y_true - y_pred
+    mse = float(np.mean(err ** 2))
+    sst = float(np.sum((y_true - y_true.mean()) ** 2))
+    r2 = 1.0 - float(np.sum(err ** 2)) / sst if sst > 0 else 0.0
+    return r2, mse
+
+
+def _weighted_mean(dist, targets, weights, ivf):
+    if weights == "uniform":
+        return targets.mean(axis=1)
+    if ivf:  # IVFKNNRegressor.predict
+        w = 1.0 / np.maximum(dist, 1e-12)
+    else:    # KNeighborsRegressor: exact matches take all the weight
+        with np.errstate(divide="ignore"):
+            w = 1.0 / dist
+        exact = np.isinf(w).any(axis=1)
+        w[exact] = np.isinf(w[exact]).astype(float)
+    return (targets * w).sum(axis=1) / w.sum(axis=1)
+
+
+def knn_fold_scores(data_dir, n_folds, fold, ks, weights, index_params):
+    """Score every (k, weights) pair on one fold from a single neighbour query."""
+    X, y = _load_shared(data_dir)
+    train, val = _folds(len(X), n_folds, fold)
+    k_max = min(max(ks), len(train))
+    model = build_knn({**index_params, "k": k_max}).fit(X[train], y[train])
+    dist, ind = model.kneighbors(np.asarray(X[val], dtype=np.float64), n_neighbors=k_max)
+    targets = np.asarray(y[train], dtype=np.float64)[ind]
+    y_val = np.asarray(y[val], dtype=np.float64)
+    ivf = isinstance(model, IVFKNNRegressor)
+    rows = []
+    for k in ks:
+        k_used = min(k, k_max)
+        for w in weights:
+            pred = _weighted_mean(dist[:, :k_used], targets[:, :k_used], w, ivf)
+            rows.append(({"k": k, "weights": w}, *_scores(y_val, pred)))
+    return rows
+
+
+def linear_fold_scores(data_dir, n_folds, fold, alphas, chunk_rows=INGEST_CHUNK_ROWS):
+    """Score every ridge alpha on one fold from one pass of sufficient statistics."""
+    X, y = _load_shared(data_dir)
+    train, val = _folds(len(X), n_folds, fold)
+    stats = LinearStats(X.shape[1])
+    for start in range(0, len(train), chunk_rows):
+        rows = train[start:start + chunk_rows]
+        stats.update(X[rows], y[rows])
+    X_val = np.asarray(X[val], dtype=np.float64)
+    y_val = np.asarray(y[val], dtype=np.float64)
+    result = []
+    for alpha in alphas:
+        coef, intercept = stats.solve(alpha)
+        result.append(({"alpha": alpha}, *_scores(y_val, X_val @ coef + intercept)))
+    return result
+
+
+def fit_best(data_dir, algorithm, model_name, features, label, params):
+    """Refit the winning configuration on every row and save it."""
+    X, y = _load_shared(data_dir)
+    if algorithm == "linearregression":
+        stats = LinearStats(X.shape[1])
+        for start in range(0, len(X), INGEST_CHUNK_ROWS):
+            stats.update(X[start:start + INGEST_CHUNK_ROWS], y[start:start + INGEST_CHUNK_ROWS])
+        model = linear_model_from_stats(stats, features, params.get("alpha", 0.0))
+    else:
+        import pandas as pd
+        frame = pd.DataFrame(np.asarray(X), columns=features, copy=False)
+        model = build_knn(params).fit(frame, np.asarray(y))
+    save_model(model_name, model, {"features": features, "label": label,
+                                   "algorithm": algorithm, "params": params})
+
+
+def run_tuning_job(job_id, progress, csv_path, algorithm, model_name, features, label, params):
+    """Cross-validate a parameter grid in parallel, save the best model, return the score table."""
+    started_at = time.time()
+    progress[job_id] = ("running", 0.0, started_at)
+    data_dir = tempfile.mkdtemp(prefix="tune-")
+    try:
+        X, y = read_arrays(csv_path, features, label)
+        np.save(os.path.join(data_dir, "X.npy"), X)
+        np.save(os.path.join(data_dir, "y.npy"), y)
+        n_folds = min(params["folds"], len(X))
+        if n_folds < 2:
+            raise ValueError("Need at least 2 rows to cross-validate")
+        del X, y
+
+        pool = get_executor("train")
+        if algorithm == "knn":
+            index_params = {k: v for k, v in params.items() if k not in ("ks", "weights", "folds")}
+            futures = [pool.submit(knn_fold_scores, data_dir, n_folds, fold,
+                                   params["ks"], params["weights"], index_params)
+                       for fold in range(n_folds)]
+        else:
+            index_params = {}
+            futures = [pool.submit(linear_fold_scores, data_dir, n_folds, fold, params["alphas"])
+                       for fold in range(n_folds)]
+
+        totals = {}
+        for done, future in enumerate(as_completed(futures), 1):
+            for config, r2, mse in future.result():
+                key = tuple(sorted(config.items()))
+                entry = totals.setdefault(key, [0.0, 0.0])
+                entry[0] += r2
+                entry[1] += mse
+            progress[job_id] = ("running", 0.9 * done / n_folds, started_at)
+
+        scores = sorted(({**dict(key), "r2": r2 / n_folds, "mse": mse / n_folds}
+                         for key, (r2, mse) in totals.items()),
+                        key=lambda row: row["r2"], reverse=True)
+        best = {k: v for k, v in scores[0].items() if k not in ("r2", "mse")}
+        pool.submit(fit_best, data_dir, algorithm, model_name, features, label,
+                    {**index_params, **best}).result()
+        progress[job_id] = ("running", 1.0, started_at)
+        return {"metric": "r2", "folds": n_folds, "best": scores[0], "scores": scores}
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from psycopg2.extras import execute_values
+from backend.db import db_conn
+from backend.logging_config import logger
+from frontend.config import LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_FULL_POLICY, LOG_BLOCK_TIMEOUT
+
+###################### USAGE LOG WRITER ######################
+# Requests only put a row on a bounded queue; one background thread drains it
+# and inserts into ml_logs in batches, one transaction per batch. When the
+# queue is full the row is dropped ("drop") or the request waits up to
+# LOG_BLOCK_TIMEOUT for room ("block") and then drops it.
+
+_STOP = object()
+
+
+class UsageLogWriter:
+    """Background batch writer for ml_logs."""
+
+    def __init__(self, max_queue, batch_size, flush_interval, policy, block_timeout, connection=db_conn):
+        self.queue = queue.Queue(max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.connection = connection
+        self.thread = None
+        self.lock = threading.Lock()
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def log(self, email: str, action: str, model_name: str = None):
+        """Queue one ml_logs row; never waits on the database."""
+        self._start()
+        row = (email, action, model_name, datetime.utcnow())
+        try:
+            if self.policy == "block":
+                self.queue.put(row, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(row)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def _start(self):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="usage-log-writer", daemon=True)
+                    self.thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            item = first
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        try:
+            with self.connection() as conn:
+                cur = conn.cursor()
+                execute_values(cur, "INSERT INTO ml_logs (email, action, model_name, timestamp) VALUES %s",
+                               batch, page_size=len(batch))
+                cur.close()
+        except Exception as e:
+            with self.lock:
+                self.failed += len(batch)
+            logger.error(f"Dropped {len(batch)} usage log rows: {e}")
+            return
+        with self.lock:
+            self.written += len(batch)
+            self.batches += 1
+
+    def shutdown(self, timeout=10):
+        """Write everything queued so far, then stop the writer thread."""
+        if self.thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0.01))
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    return
+        self.thread.join(max(deadline - time.monotonic(), 0))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "queued": self.queue.qsize(),
+                "max_queue": self.queue.maxsize,
+                "policy": self.policy,
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+
+usage_log = UsageLogWriter(LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_FULL_POLICY, LOG_BLOCK_TIMEOUT)
@@ -0,0 +1,91 @@
+import importlib
+import threading
+import time
+from backend.db import db_conn
+from backend.models import stored_models, load_predictor
+from backend.logging_config import logger
+
+###################### WARM-UP ######################
+# pandas, sklearn and the models themselves are loaded lazily, so a fresh
+# worker starts fast but its first requests pay for those loads. With
+# WARMUP_ENABLED a background thread pays up front instead: it imports the
+# ML stack and loads the most recently trained models into the model cache.
+# GET /ready answers 503 until it is done; point the load balancer's
+# readiness check at it so a new worker only gets traffic once warm.
+
+
+def recent_models(limit):
+    """Names of the most recently trained models, newest first."""
+    try:
+        with db_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+                SELECT model_name FROM ml_models
+                ORDER BY created_at DESC
+                LIMIT %s;
+            """, (limit,))
+            names = [row[0] for row in cur.fetchall()]
+            cur.close()
+        return names
+    except Exception as e:
+        # Serve what is on disk rather than start cold when the database is down
+        logger.warning(f"Warm-up falling back to the model directory: {e}")
+        found = stored_models()
+        return sorted(found, key=found.get, reverse=True)[:limit]
+
+
+class WarmUp:
+    def __init__(self):
+        self.state = "idle"  # idle -> warming -> ready
+        self.models = 0
+        self.loaded = 0
+        self.errors = 0
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state != "warming"
+
+    def start(self, limit):
+        with self.lock:
+            if self.state != "idle":
+                return
+            self.state = "warming"
+            self.started_at = time.time()
+        threading.Thread(target=self._run, args=(limit,), name="warm-up", daemon=True).start()
+
+    def _run(self, limit):
+        try:
+            # The imports the first training job or model load would otherwise pay for
+            for module in ("pandas", "sklearn.linear_model", "sklearn.neighbors"):
+                importlib.import_module(module)
+            names = recent_models(limit)
+            self.models = len(names)
+            # Oldest first, so the newest models are the last to be evicted if the cache fills up
+            for name in reversed(names):
+                try:
+                    load_predictor(name)
+                    self.loaded += 1
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"Warm-up could not load model '{name}': {e}")
+        finally:
+            self.finished_at = time.time()
+            self.state = "ready"
+            logger.info(f"Warm-up done: {self.loaded}/{self.models} models in "
+                        f"{self.finished_at - self.started_at:.2f}s")
+
+    def status(self):
+        return {
+            "status": "READY" if self.ready else "WARMING",
+            "models": self.models,
+            "loaded": self.loaded,
+            "errors": self.errors,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+warm_up = WarmUp()
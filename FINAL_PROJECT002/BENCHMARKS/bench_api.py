@@ -0,0 +1,383 @@
+"""Reproducible load test of the API: register, login, train and predict.
+
+    python BENCHMARKS/bench_api.py --rows 1000,100000 --out report.json
+    python BENCHMARKS/bench_api.py --rows 1000,100000 --baseline baseline.json
+
+Starts final_project002 under uvicorn in a child process with its own
+models directory, backed by SQLite (sqlite_db.py) or, with --db postgres,
+by the database in frontend.config. Synthetic datasets (1k to 10M rows,
+fixed seed) are written once to --data-dir and reused. Each phase runs
+with --concurrency client threads:
+
+    register   POST /user/create for --users new users
+    login      POST /user/login for each of them
+    train      per dataset and algorithm, --train-jobs /create/{algo} jobs,
+               timed from upload until /jobs/{id} reports done
+    predict    per dataset and algorithm, --predictions POST /models/{model}/predict
+
+The report (JSON) has requests, errors, throughput and p50/p95/p99 latency
+for every phase, plus the peak RSS of the server process tree (Linux). Keep
+a report as the baseline; --baseline compares against it and exits with
+status 1 if throughput fell or p99 rose by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ALGORITHMS = {"linearregression": {}, "knn": {"k": 5}}
+PASSWORD = "bench-password"
+
+
+###################### SERVER ######################
+def serve(args):
+    """Child process: run the app on --port, against SQLite when asked."""
+    if args.db == "sqlite":
+        import sqlite_db
+        sqlite_db.install(args.sqlite)
+    if args.warmup:
+        import frontend.config
+        frontend.config.WARMUP_ENABLED = True
+    import uvicorn
+    from backend.final_project002 import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, workdir, warmup=False):
+    port = free_port()
+    run_dir = os.path.join(workdir, "run")  # models are saved to ../models
+    os.makedirs(run_dir, exist_ok=True)
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+           "--db", args.db, "--sqlite", os.path.join(workdir, "bench.sqlite3")] + (["--warmup"] if warmup else [])
+    proc = subprocess.Popen(cmd, cwd=run_dir)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            requests.get(f"{url}/algorithms", timeout=1)
+            return proc, url
+        except requests.ConnectionError:
+            time.sleep(0.02)
+    proc.terminate()
+    raise TimeoutError("server did not start within 60s")
+
+
+def grant_tokens(args, workdir, emails):
+    # New users hold 15 tokens; give the bench users enough for every prediction
+    sql = "UPDATE ml_user SET tokens = 1000000000 WHERE email = %s"
+    if args.db == "sqlite":
+        conn = sqlite3.connect(os.path.join(workdir, "bench.sqlite3"), timeout=30)
+        conn.executemany(sql.replace("%s", "?"), [(e,) for e in emails])
+        conn.commit()
+        conn.close()
+    else:
+        from backend.db import get_conn
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.executemany(sql, [(e,) for e in emails])
+        conn.commit()
+        conn.close()
+
+
+###################### PEAK RSS ######################
+def _rss_kb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _children(pid):
+    kids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        kids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return kids
+
+
+class RssSampler:
+    """Polls the RSS of the server and its worker processes; peak() since the last reset()."""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.supported = os.path.exists(f"/proc/{pid}/status")
+        self.peak_kb = 0
+        self.stop_event = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while self.supported and not self.stop_event.wait(self.interval):
+            total = 0
+            for pid in [self.pid] + _children(self.pid):
+                try:
+                    total += _rss_kb(pid)
+                except OSError:
+                    pass
+            self.peak_kb = max(self.peak_kb, total)
+
+    def reset(self):
+        self.peak_kb = 0
+
+    def peak(self):
+        return round(self.peak_kb / 1024, 1) if self.supported else None
+
+    def stop(self):
+        self.stop_event.set()
+
+
+###################### DATASETS ######################
+def dataset(data_dir, rows, n_features, chunk_rows=100000):
+    """Write (once) a CSV of rows x n_features with a noisy linear label; fixed seed."""
+    path = os.path.join(data_dir, f"bench_{rows}x{n_features}.csv")
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(rows)
+    coef = rng.normal(size=n_features)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(",".join([f"f{i}" for i in range(n_features)] + ["y"]) + "\n")
+        for start in range(0, rows, chunk_rows):
+            X = rng.normal(size=(min(chunk_rows, rows - start), n_features))
+            y = X @ coef + rng.normal(scale=0.1, size=len(X))
+            np.savetxt(f, np.column_stack([X, y]), fmt="%.6f", delimiter=",")
+    os.replace(tmp, path)
+    return path
+
+
+###################### LOAD ######################
+_local = threading.local()
+
+
+def session():
+    s = getattr(_local, "session", None)
+    if s is None:
+        s = _local.session = requests.Session()
+    return s
+
+
+def run_phase(name, fn, items, concurrency, rss):
+    """Call fn(item) for every item on `concurrency` threads; fn returns True on success."""
+    rss.reset()
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def one(item):
+        start = time.perf_counter()
+        try:
+            ok = fn(item)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors[0] += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, items))
+    seconds = time.perf_counter() - start
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    result = {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "seconds": round(seconds, 3),
+        "throughput": round((len(latencies) - errors[0]) / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "peak_rss_mb": rss.peak(),
+    }
+    print(f"{name:34s} {result['requests']:7d} {result['errors']:6d} {result['throughput']:10.2f} "
+          f"{result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['peak_rss_mb']}")
+    return result
+
+
+def wait_for_job(url, headers, job_id, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = session().get(f"{url}/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job["status"] == "done"
+        time.sleep(0.05)
+    return False
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="bench-api-")
+    data_dir = args.data_dir or os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    run_id = uuid.uuid4().hex[:8]
+    results = {}
+    proc, url = start_server(args, workdir)
+    rss = RssSampler(proc.pid)
+    try:
+        print(f"{'phase':34s} {'reqs':>7s} {'errors':>6s} {'req/s':>10s} {'p50 ms':>9s} {'p95 ms':>9s} "
+              f"{'p99 ms':>9s} peak RSS MB")
+        emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.users)]
+        results["register"] = run_phase(
+            "register", lambda e: session().post(f"{url}/user/create", data={"email": e, "pwd": PASSWORD})
+            .json()["status"] == "OK", emails, args.concurrency, rss)
+        grant_tokens(args, workdir, emails)
+
+        tokens = {}
+
+        def login(email):
+            body = session().post(f"{url}/user/login", data={"email": email, "pwd": PASSWORD}).json()
+            tokens[email] = body.get("token")
+            return body["status"] == "OK"
+
+        results["login"] = run_phase("login", login, emails, args.concurrency, rss)
+        users = [{"Authorization": f"Bearer {t}"} for t in tokens.values() if t]
+        if not users:
+            raise RuntimeError("no user could log in")
+
+        for rows in args.rows:
+            path = dataset(data_dir, rows, args.features)
+            features = ",".join(f"f{i}" for i in range(args.features))
+            for algo in args.algorithms:
+                names = [f"bench_{run_id}_{algo}_{rows}_{j}" for j in range(args.train_jobs)]
+
+                def train(name):
+                    with open(path, "rb") as f:
+                        body = session().post(f"{url}/create/{algo}", headers=users[0],
+                                              data={"model_name": name, "features": features, "label": "y",
+                                                    **ALGORITHMS[algo]},
+                                              files={"file": (os.path.basename(path), f)}).json()
+                    return body.get("status") == "QUEUED" and wait_for_job(url, users[0], body["job_id"],
+                                                                           args.job_timeout)
+
+                key = f"train/{algo}/{rows}"
+                results[key] = run_phase(key, train, names, args.train_concurrency, rss)
+                results[key]["rows_per_second"] = round(rows / (results[key]["p50_ms"] / 1000), 1)
+
+                rng = np.random.default_rng(0)
+                payloads = [",".join(f"{v:.6f}" for v in rng.normal(size=args.features))
+                            for _ in range(args.predictions)]
+
+                def predict(i):
+                    body = session().post(f"{url}/models/{names[0]}/predict", headers=users[i % len(users)],
+                                          data={"data": payloads[i]}).json()
+                    return "prediction" in body
+
+                key = f"predict/{algo}/{rows}"
+                results[key] = run_phase(key, predict, range(args.predictions), args.concurrency, rss)
+    finally:
+        rss.stop()
+        proc.terminate()
+        proc.wait(30)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+###################### REPORT ######################
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, tolerance):
+    """Print per-phase changes against a baseline report; return the regressed phases."""
+    regressions = []
+    print(f"\n{'phase':34s} {'req/s':>18s} {'p99 ms':>18s}")
+    for name, now in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        d_rate = (now["throughput"] - base["throughput"]) / base["throughput"] if base["throughput"] else 0.0
+        d_p99 = (now["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+        bad = d_rate < -tolerance or d_p99 > tolerance
+        if bad:
+            regressions.append(name)
+        print(f"{name:34s} {now['throughput']:10.2f} {d_rate:+7.1%} {now['p99_ms']:10.2f} {d_p99:+7.1%}"
+              f"{'  REGRESSION' if bad else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", default="1000,100000",
+                        help="comma-separated dataset sizes, 1000 to 10000000")
+    parser.add_argument("--features", type=int, default=8)
+    parser.add_argument("--algorithms", default="linearregression,knn")
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads for register/login/predict")
+    parser.add_argument("--train-jobs", type=int, default=2, help="models trained per dataset and algorithm")
+    parser.add_argument("--train-concurrency", type=int, default=2)
+    parser.add_argument("--predictions", type=int, default=2000, help="requests per dataset and algorithm")
+    parser.add_argument("--job-timeout", type=float, default=3600)
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--data-dir", help="where generated datasets are kept between runs (default: temp)")
+    parser.add_argument("--out", default="bench_api_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative change before failing")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--sqlite", help=argparse.SUPPRESS)
+    parser.add_argument("--warmup", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+        return
+
+    args.rows = [int(r) for r in args.rows.split(",")]
+    args.algorithms = args.algorithms.split(",")
+    if not all(1000 <= r <= 10000000 for r in args.rows) or not set(args.algorithms) <= set(ALGORITHMS):
+        parser.error(f"rows must be 1000-10000000 and algorithms among {list(ALGORITHMS)}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "sqlite", "warmup")},
+        },
+        "results": run(args),
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nreport written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} phase(s) regressed beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
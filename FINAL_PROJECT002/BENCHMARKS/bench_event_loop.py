@@ -0,0 +1,124 @@
+"""Predict latency with and without concurrent training load.
+
+Runs against a live server (see BACKEND/terminal.final_project002):
+
+    python BENCHMARKS/bench_event_loop.py --email bench@example.com --pwd secret
+
+The user must exist and hold enough tokens for the run, e.g.
+    UPDATE ml_user SET tokens = 1000000 WHERE email = 'bench@example.com';
+
+Phase 1 measures /predict/* alone, phase 2 repeats it while /create/knn jobs
+train on a synthetic CSV. With blocking work off the event loop the two p99
+values should stay close.
+"""
+import argparse
+import io
+import random
+import statistics
+import sys
+import os
+import threading
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frontend.config import API_URL
+
+
+def synthetic_csv(rows, n_features):
+    buf = io.StringIO()
+    buf.write(",".join([f"f{i}" for i in range(n_features)] + ["y"]) + "\n")
+    for _ in range(rows):
+        x = [random.random() for _ in range(n_features)]
+        buf.write(",".join(f"{v:.6f}" for v in x) + f",{sum(x):.6f}\n")
+    return buf.getvalue().encode()
+
+
+def wait_for_job(session, headers, job_id, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = session.get(f"{API_URL}/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.2)
+    raise TimeoutError(f"training job {job_id} did not finish")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def predict_loop(session, headers, model_name, payload, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.post(f"{API_URL}/predict/knn", data={"model_name": model_name, "data": payload},
+                     headers=headers)
+        latencies.append(time.perf_counter() - start)
+
+
+def train_loop(headers, csv_bytes, features, stop, done, i):
+    session = requests.Session()
+    while not stop.is_set():
+        # One model per trainer: a second job for a model still training is refused as BUSY
+        res = session.post(f"{API_URL}/create/knn",
+                           data={"model_name": f"bench_train_load_{i}", "features": features, "label": "y", "k": 5},
+                           files={"file": ("train.csv", csv_bytes)}, headers=headers).json()
+        if "job_id" in res:
+            wait_for_job(session, headers, res["job_id"])
+            done.append(1)
+
+
+def run_phase(headers, model_name, payload, clients, seconds, trainers=0, csv_bytes=None, features=None):
+    stop = threading.Event()
+    latencies, trained = [], []
+    threads = [threading.Thread(target=predict_loop,
+                                args=(requests.Session(), headers, model_name, payload, stop, latencies))
+               for _ in range(clients)]
+    threads += [threading.Thread(target=train_loop, args=(headers, csv_bytes, features, stop, trained, i))
+                for i in range(trainers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return latencies, len(trained)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--pwd", required=True)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--trainers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--train-rows", type=int, default=200000)
+    parser.add_argument("--features", type=int, default=8)
+    args = parser.parse_args()
+
+    token = requests.post(f"{API_URL}/user/login", data={"email": args.email, "pwd": args.pwd}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    features = ",".join(f"f{i}" for i in range(args.features))
+
+    # Small model served by the predict clients
+    r = requests.post(f"{API_URL}/create/knn",
+                      data={"model_name": "bench_predict", "features": features, "label": "y", "k": 5},
+                      files={"file": ("small.csv", synthetic_csv(1000, args.features))}, headers=headers)
+    r.raise_for_status()
+    wait_for_job(requests.Session(), headers, r.json()["job_id"])
+    payload = ",".join("0.5" for _ in range(args.features))
+    csv_bytes = synthetic_csv(args.train_rows, args.features)
+
+    idle, _ = run_phase(headers, "bench_predict", payload, args.clients, args.seconds)
+    loaded, trained = run_phase(headers, "bench_predict", payload, args.clients, args.seconds,
+                                args.trainers, csv_bytes, features)
+
+    for name, lat in (("predict only", idle), ("predict + training", loaded)):
+        print(f"{name:20s} n={len(lat):6d}  p50={statistics.median(lat) * 1000:8.2f} ms  "
+              f"p99={percentile(lat, 99) * 1000:8.2f} ms")
+    print(f"training requests completed during phase 2: {trained}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Peak RSS and wall time of training-data ingestion: full read_csv vs chunked.
+
+    python BENCHMARKS/bench_ingest.py --rows 20000000      # ~4 GB CSV
+
+Each path runs in a fresh process so ru_maxrss reflects only that path:
+  baseline      pd.read_csv(all columns) + LinearRegression.fit
+  streaming     usecols/dtype chunks + X^T X / X^T y accumulation
+  streaming32   same with float32 parsing
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_csv(path, rows, n_features, n_unused, chunk_rows=500000):
+    """Synthetic regression data with extra columns the model never reads."""
+    rng = np.random.default_rng(0)
+    coef = rng.normal(size=n_features)
+    header = [f"f{i}" for i in range(n_features)] + [f"unused{i}" for i in range(n_unused)] + ["y"]
+    with open(path, "w") as f:
+        f.write(",".join(header) + "\n")
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            X = rng.normal(size=(n, n_features)) * 1000 + 50000
+            extra = rng.normal(size=(n, n_unused))
+            y = X @ coef + rng.normal(size=n)
+            np.savetxt(f, np.hstack([X, extra, y[:, None]]), delimiter=",", fmt="%.6f")
+
+
+def run_path(name, path, features, label, out):
+    start = time.perf_counter()
+    if name == "baseline":
+        import pandas as pd
+        from sklearn.linear_model import LinearRegression
+        df = pd.read_csv(path)
+        model = LinearRegression().fit(df[features], df[label])
+    else:
+        from backend.ingest import fit_linear_streaming
+        model = fit_linear_streaming(path, features, label, float32=(name == "streaming32"))
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out.put((name, elapsed, peak_kb / 1024, model.coef_[:3].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--features", type=int, default=10)
+    parser.add_argument("--unused", type=int, default=10)
+    parser.add_argument("--csv", default="bench_ingest.csv")
+    parser.add_argument("--keep", action="store_true", help="keep the generated CSV")
+    args = parser.parse_args()
+
+    generated = not os.path.exists(args.csv)
+    if generated:
+        print(f"writing {args.rows} rows to {args.csv} ...")
+        write_csv(args.csv, args.rows, args.features, args.unused)
+    print(f"CSV size: {os.path.getsize(args.csv) / 1e9:.2f} GB")
+
+    features = [f"f{i}" for i in range(args.features)]
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        for name in ("baseline", "streaming", "streaming32"):
+            out = ctx.Queue()
+            proc = ctx.Process(target=run_path, args=(name, args.csv, features, "y", out))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                print(f"{name:12s} failed (exit code {proc.exitcode}, likely out of memory)")
+                continue
+            name, elapsed, peak_mb, coef = out.get()
+            print(f"{name:12s} wall={elapsed:8.2f} s  peak RSS={peak_mb:9.1f} MB  coef[:3]={coef}")
+    finally:
+        if generated and not args.keep:
+            os.remove(args.csv)
+
+
+if __name__ == "__main__":
+    main()
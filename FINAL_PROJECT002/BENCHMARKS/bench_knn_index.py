@@ -0,0 +1,83 @@
+"""Recall vs latency of the KNN index choices on synthetic clustered data.
+
+    python BENCHMARKS/bench_knn_index.py --rows 1000000 --dims 8
+
+For every index the script reports build time, pickled size, mean and p99
+single-row query latency and recall@k against exact brute-force neighbours.
+The ivf index is run for several n_probe values to show the trade-off.
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.knn_index import build_knn
+
+
+def clustered_data(rows, dims, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-10, 10, size=(clusters, dims))
+    X = centers[rng.integers(clusters, size=rows)] + rng.normal(size=(rows, dims))
+    y = X.sum(axis=1) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def exact_neighbours(X, queries, k):
+    truth = []
+    for q in queries:
+        d = ((X - q) ** 2).sum(axis=1)
+        truth.append(set(np.argpartition(d, k - 1)[:k].tolist()))
+    return truth
+
+
+def measure(model, queries, k, truth, n_probe=None):
+    latencies, hits = [], 0
+    for q, true_set in zip(queries, truth):
+        start = time.perf_counter()
+        if n_probe is None:
+            _, ind = model.kneighbors(q[None, :], n_neighbors=k)
+        else:
+            _, ind = model.kneighbors(q[None, :], n_neighbors=k, n_probe=n_probe)
+        latencies.append(time.perf_counter() - start)
+        hits += len(true_set & set(ind[0].tolist()))
+    latencies = np.array(latencies) * 1000
+    return latencies.mean(), np.percentile(latencies, 99), hits / (k * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--dims", type=int, default=8)
+    parser.add_argument("--clusters", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--leaf-size", type=int, default=30)
+    args = parser.parse_args()
+
+    X, y = clustered_data(args.rows, args.dims, args.clusters)
+    queries, _ = clustered_data(args.queries, args.dims, args.clusters, seed=1)
+    truth = exact_neighbours(X, queries, args.k)
+
+    print(f"{'index':24s} {'build s':>8s} {'size MB':>8s} {'mean ms':>8s} {'p99 ms':>8s} {'recall':>7s}")
+    configs = [("kd_tree", {"leaf_size": args.leaf_size}),
+               ("ball_tree", {"leaf_size": args.leaf_size}),
+               ("brute", {}),
+               ("ivf", {})]
+    for index, extra in configs:
+        params = {"k": args.k, "index": index, **extra}
+        start = time.perf_counter()
+        model = build_knn(params).fit(X, y)
+        build = time.perf_counter() - start
+        size = len(pickle.dumps(model)) / 1e6
+        probes = [1, 2, 4, 8, 16, 32] if index == "ivf" else [None]
+        for n_probe in probes:
+            mean_ms, p99_ms, recall = measure(model, queries, args.k, truth, n_probe)
+            name = index if n_probe is None else f"ivf (n_probe={n_probe})"
+            print(f"{name:24s} {build:8.2f} {size:8.1f} {mean_ms:8.3f} {p99_ms:8.3f} {recall:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Password verification throughput and latency at several argon2 cost settings.
+
+    python BENCHMARKS/bench_login.py --logins 200 --concurrency 32
+
+For each (time_cost, memory_cost KiB, parallelism) setting a password is
+hashed once, then --logins verifications are submitted --concurrency at a
+time to a process pool sized like EXECUTOR_LIMITS["hash"], the way
+/user/login runs them. Reports logins/sec and p50/p99 latency (queueing
+included), so the cost can be picked for this machine.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from passlib.hash import argon2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frontend.config import EXECUTOR_LIMITS, ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM
+
+SETTINGS = [
+    (1, 19456, 1),     # OWASP minimum for argon2id
+    (2, 19456, 1),
+    (2, 65536, 1),
+    (3, 65536, 4),     # passlib's default
+    (4, 131072, 4),
+]
+
+
+def verify(time_cost, memory_cost, parallelism, password, hashed):
+    hasher = argon2.using(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    assert hasher.verify(password, hashed)
+
+
+def run(pool, setting, logins, concurrency):
+    hashed = argon2.using(time_cost=setting[0], memory_cost=setting[1], parallelism=setting[2]).hash("pw")
+    latencies, pending, submitted = [], {}, 0
+    start = time.perf_counter()
+    while submitted < logins or pending:
+        while submitted < logins and len(pending) < concurrency:
+            pending[pool.submit(verify, *setting, "pw", hashed)] = time.perf_counter()
+            submitted += 1
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            future.result()
+            latencies.append(now - pending.pop(future))
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    return logins / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32, help="logins in flight at once")
+    parser.add_argument("--workers", type=int, default=EXECUTOR_LIMITS["hash"])
+    args = parser.parse_args()
+
+    current = (ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM)
+    settings = SETTINGS if current in SETTINGS else SETTINGS + [current]
+    print(f"{os.cpu_count()} CPUs, {args.workers} hash workers, {args.concurrency} concurrent logins")
+    print(f"{'t':>2s} {'m KiB':>7s} {'p':>2s} {'logins/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(statistics.mean, [[1]] * args.workers))  # start the workers
+        for setting in settings:
+            rate, p50, p99 = run(pool, setting, args.logins, args.concurrency)
+            mark = "  <- config" if setting == current else ""
+            print(f"{setting[0]:2d} {setting[1]:7d} {setting[2]:2d} {rate:9.1f} {p50:8.1f} {p99:8.1f}{mark}")
+
+
+if __name__ == "__main__":
+    main()
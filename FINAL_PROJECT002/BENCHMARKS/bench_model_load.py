@@ -0,0 +1,77 @@
+"""Load time of pickled models vs the native (header.json + .npy, mmap) format.
+
+    python BENCHMARKS/bench_model_load.py --rows 2000000 --dims 16
+
+Each model is written both ways into a temp directory and loaded --repeat
+times; the model cache is bypassed so every load hits the files.
+"""
+import argparse
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.ingest import LinearStats, linear_model_from_stats
+from backend.knn_index import build_knn
+from backend.model_format import write_model, read_model
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dims", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(args.rows, args.dims))
+    y = X.sum(axis=1)
+    features = [f"f{i}" for i in range(args.dims)]
+
+    stats = LinearStats(args.dims)
+    stats.update(X, y)
+    models = {
+        "linearregression": linear_model_from_stats(stats, features),
+        "knn brute": build_knn({"k": 5, "index": "brute"}).fit(X, y),
+        "knn kd_tree": build_knn({"k": 5, "index": "kd_tree"}).fit(X, y),
+        "knn ivf": build_knn({"k": 5, "index": "ivf"}).fit(X, y),
+    }
+    meta = {"features": features, "label": "y"}
+
+    root = tempfile.mkdtemp()
+    try:
+        print(f"{'model':18s} {'pickle ms':>10s} {'native ms':>10s} {'speedup':>8s}")
+        for name, model in models.items():
+            pkl = os.path.join(root, f"{name}.pkl")
+            with open(pkl, "wb") as f:
+                pickle.dump(model, f)
+            native = os.path.join(root, name)
+            write_model(native, model, meta)
+
+            def load_pickle():
+                with open(pkl, "rb") as f:
+                    pickle.load(f)
+
+            pickle_ms = timed(load_pickle, args.repeat)
+            native_ms = timed(lambda: read_model(native), args.repeat)
+            print(f"{name:18s} {pickle_ms:10.2f} {native_ms:10.2f} {pickle_ms / native_ms:7.1f}x")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Per-request prediction overhead: DataFrame + model.predict vs compiled predictors.
+
+    python BENCHMARKS/bench_predict_overhead.py --rows 100000 --dims 8
+
+For each model type the script times the old single-row path
+(pd.DataFrame([values], columns=features) then model.predict) against
+compile_predictor(...).predict_row(values) and checks the outputs are identical.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.ingest import LinearStats, linear_model_from_stats
+from backend.knn_index import build_knn
+from backend.predictors import compile_predictor
+
+
+def per_call_us(fn, rows, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for values in rows:
+            fn(values)
+        times.append((time.perf_counter() - start) / len(rows))
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000, help="training rows")
+    parser.add_argument("--dims", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    features = [f"f{i}" for i in range(args.dims)]
+    X = pd.DataFrame(rng.normal(size=(args.rows, args.dims)), columns=features)
+    y = X.to_numpy().sum(axis=1)
+    queries = rng.normal(size=(args.queries, args.dims)).tolist()
+
+    stats = LinearStats(args.dims)
+    stats.update(X.to_numpy(), y)
+    models = {
+        "linearregression": linear_model_from_stats(stats, features),
+        "knn kd_tree": build_knn({"k": 5, "index": "kd_tree"}).fit(X, y),
+        "knn kd_tree distance": build_knn({"k": 5, "index": "kd_tree"}).set_params(weights="distance").fit(X, y),
+        "knn brute": build_knn({"k": 5, "index": "brute"}).fit(X, y),
+        "knn ivf": build_knn({"k": 5, "index": "ivf"}).fit(X, y),
+    }
+    meta = {"features": features}
+
+    print(f"{'model':22s} {'before us':>10s} {'after us':>10s} {'speedup':>8s} identical")
+    for name, model in models.items():
+        predictor = compile_predictor(model, meta)
+
+        def before(values):
+            return float(model.predict(pd.DataFrame([values], columns=features))[0])
+
+        identical = all(before(v) == predictor.predict_row(v) for v in queries)
+        old = per_call_us(before, queries, args.repeat)
+        new = per_call_us(predictor.predict_row, queries, args.repeat)
+        print(f"{name:22s} {old:10.1f} {new:10.1f} {old / new:7.1f}x {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Startup cost of the APIs: import time and first-request latency, cold vs warmed up.
+
+    python BENCHMARKS/bench_startup.py --repeat 5 --rows 100000
+
+import         a fresh interpreter imports backend.final_project002 (and
+               FINAL_PROJECT001's app), --repeat times; median seconds and
+               whether pandas / sklearn were pulled in at import
+first request  models are trained once on a server started as in
+               bench_api.py (SQLite unless --db postgres), then the server
+               is restarted --repeat times, without and with WARMUP_ENABLED:
+               seconds until it accepts connections and until /ready is 200,
+               then the latency of the first and second /predict per model
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_api import ROOT, ALGORITHMS, PASSWORD, start_server, grant_tokens, dataset, wait_for_job
+
+PROJECT001 = os.path.join(os.path.dirname(ROOT), "FINAL_PROJECT001")
+
+IMPORT_TIMER = """
+import json, sys, time
+sys.path.insert(0, {path!r})
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                   "pandas": "pandas" in sys.modules, "sklearn": "sklearn" in sys.modules}}))
+"""
+
+
+###################### IMPORT TIME ######################
+def import_time(path, module, repeat):
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:  # FINAL_PROJECT001 creates models/ and usage.db here
+            os.makedirs(os.path.join(cwd, "run"))
+            out = subprocess.run([sys.executable, "-c", IMPORT_TIMER.format(path=path, module=module)],
+                                 cwd=os.path.join(cwd, "run"), capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    seconds = statistics.median(r["seconds"] for r in runs)
+    print(f"import {module:28s} {seconds:8.3f}s   pandas: {runs[0]['pandas']}   sklearn: {runs[0]['sklearn']}")
+
+
+###################### FIRST REQUEST ######################
+def train_models(args, workdir):
+    """Register a user and train one model per algorithm; returns (auth headers, model names)."""
+    proc, url = start_server(args, workdir)
+    try:
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        requests.post(f"{url}/user/create", data={"email": email, "pwd": PASSWORD})
+        grant_tokens(args, workdir, [email])
+        token = requests.post(f"{url}/user/login", data={"email": email, "pwd": PASSWORD}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+        path = dataset(os.path.join(workdir, "data"), args.rows, args.features)
+        features = ",".join(f"f{i}" for i in range(args.features))
+        names = []
+        for algo, params in ALGORITHMS.items():
+            name = f"startup_{algo}_{args.rows}"
+            with open(path, "rb") as f:
+                job = requests.post(f"{url}/create/{algo}", headers=headers,
+                                    data={"model_name": name, "features": features, "label": "y", **params},
+                                    files={"file": (os.path.basename(path), f)}).json()
+            if not wait_for_job(url, headers, job["job_id"], 3600):
+                raise RuntimeError(f"training {name} failed")
+            names.append(name)
+        return headers, names
+    finally:
+        proc.terminate()
+        proc.wait(30)
+
+
+def timed_post(url, **kwargs):
+    start = time.perf_counter()
+    body = requests.post(url, **kwargs).json()
+    if "prediction" not in body:
+        raise RuntimeError(f"prediction failed: {body}")
+    return (time.perf_counter() - start) * 1000
+
+
+def first_requests(args, workdir, headers, names, warmup):
+    payload = {"data": ",".join(["0.5"] * args.features)}
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        proc, url = start_server(args, workdir, warmup=warmup)
+        run = {"accepting_s": time.perf_counter() - start}
+        try:
+            while requests.get(f"{url}/ready").status_code != 200:
+                time.sleep(0.02)
+            run["ready_s"] = time.perf_counter() - start
+            for name in names:
+                run[f"{name} first_ms"] = timed_post(f"{url}/models/{name}/predict", headers=headers, data=payload)
+                run[f"{name} second_ms"] = timed_post(f"{url}/models/{name}/predict", headers=headers, data=payload)
+        finally:
+            proc.terminate()
+            proc.wait(30)
+        runs.append(run)
+    label = "warm-up" if warmup else "cold"
+    for key in runs[0]:
+        print(f"{label:8s} {key:40s} {statistics.median(r[key] for r in runs):10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=100000, help="training rows of each model")
+    parser.add_argument("--features", type=int, default=8)
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    args = parser.parse_args()
+
+    import_time(ROOT, "backend.final_project002", args.repeat)
+    import_time(PROJECT001, "final_project001", args.repeat)
+
+    workdir = tempfile.mkdtemp(prefix="bench-startup-")
+    try:
+        headers, names = train_models(args, workdir)
+        print(f"\n{'':8s} {'medians over ' + str(args.repeat) + ' restarts':40s}")
+        first_requests(args, workdir, headers, names, warmup=False)
+        first_requests(args, workdir, headers, names, warmup=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Token debit contention: one UPDATE per request vs the leased token ledger.
+
+    python BENCHMARKS/bench_token_ledger.py --workers 32 --requests 200
+    python BENCHMARKS/bench_token_ledger.py --processes 2 --tokens 1000
+
+Needs the database from frontend/config.py (or --db sqlite, see
+sqlite_db.py). A throwaway user is created with enough tokens for every
+request, --workers threads debit it concurrently (the worst case: a single
+hot row), and the script reports throughput, p50/p99 debit latency and
+checks that the tokens charged match the tokens that left ml_user once the
+ledger has returned its leases.
+
+With --processes N, N processes (each its own ledger, like API workers)
+drain a user holding --tokens until every thread is refused. No debit may
+start after any refusal was returned (that refusal would have been wrong:
+the tokens were still there, leased to another process), the charged
+tokens must match what left ml_user, and less than --amount may be left.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from backend.db import db_conn
+from backend.ledger import TokenLedger
+from frontend.config import TOKEN_LEASE_BLOCK
+
+
+def direct_use(email, amount):
+    # The pre-ledger use_tokens
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            UPDATE ml_user
+            SET tokens = tokens - %s
+            WHERE email=%s AND tokens >= %s
+            RETURNING tokens;
+        """, (amount, email, amount))
+        row = cur.fetchone()
+        cur.close()
+    return row is not None
+
+
+def balance(email):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT tokens FROM ml_user WHERE email=%s", (email,))
+        tokens = cur.fetchone()[0]
+        cur.close()
+    return tokens
+
+
+def hammer(use, email, workers, requests, amount):
+    latencies = [[] for _ in range(workers)]
+    ok = [0] * workers
+
+    def worker(i):
+        for _ in range(requests):
+            start = time.perf_counter()
+            ok[i] += use(email, amount)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, np.concatenate(latencies) * 1000, sum(ok)
+
+
+def use_db(args):
+    if args.db == "sqlite":
+        import sqlite_db
+        sqlite_db.install(args.sqlite)
+
+
+def drain(args, email, start_at, results):
+    """Child process: --workers threads debit email through one ledger until each is refused."""
+    use_db(args)
+    ledger = TokenLedger(args.block, idle_seconds=3600, flush_interval=3600, max_leases=10000)
+    successes, refusals = [], []
+
+    def worker():
+        while True:
+            start = time.time()
+            if not ledger.use(email, args.amount):
+                refusals.append(time.time())
+                return
+            successes.append(start)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    time.sleep(max(0.0, start_at - time.time()))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ledger.shutdown()
+    results.put((successes, refusals, ledger.stats()))
+
+
+def run_processes(args, email, start_tokens):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    start_at = time.time() + 3  # let every child finish importing first
+    procs = [ctx.Process(target=drain, args=(args, email, start_at, results)) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    successes = [t for s, _, _ in outcomes for t in s]
+    first_refusal = min(t for _, r, _ in outcomes for t in r)
+    late = sum(t > first_refusal for t in successes)
+    charged = len(successes) * args.amount
+    left = balance(email)
+    print(f"{'processes':>9s} {'debits':>7s} {'charged':>8s} {'removed':>8s} {'left':>5s} "
+          f"{'debits after a refusal':>22s} ok")
+    ok = charged == start_tokens - left and left < args.amount and late == 0
+    print(f"{args.processes:9d} {len(successes):7d} {charged:8d} {start_tokens - left:8d} {left:5d} {late:22d} {ok}")
+    for _, _, stats in outcomes:
+        print(stats)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="debits per worker")
+    parser.add_argument("--amount", type=int, default=5)
+    parser.add_argument("--block", type=int, default=TOKEN_LEASE_BLOCK)
+    parser.add_argument("--processes", type=int, default=1, help="ledgers draining one user (see above)")
+    parser.add_argument("--tokens", type=int, default=1000, help="tokens of the drained user")
+    parser.add_argument("--db", choices=("postgres", "sqlite"), default="postgres")
+    parser.add_argument("--sqlite", default="bench_token_ledger.sqlite3")
+    args = parser.parse_args()
+    use_db(args)
+
+    email = f"bench-{uuid.uuid4().hex[:8]}@bench.local"
+    start_tokens = args.tokens if args.processes > 1 else args.workers * args.requests * args.amount * 2
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO ml_user (email, pwd, tokens) VALUES (%s, %s, %s)",
+                    (email, "x", start_tokens))
+        cur.close()
+
+    try:
+        if args.processes > 1:
+            if not run_processes(args, email, start_tokens):
+                sys.exit(1)
+            return
+        print(f"{'mode':8s} {'ops/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'charged':>8s} {'removed':>8s} ok")
+        ledger = TokenLedger(args.block, idle_seconds=3600, flush_interval=3600, max_leases=10000)
+        for mode, use in (("direct", direct_use), ("ledger", ledger.use)):
+            before = balance(email)
+            elapsed, lat, successes = hammer(use, email, args.workers, args.requests, args.amount)
+            if mode == "ledger":
+                ledger.shutdown()
+            charged = successes * args.amount
+            removed = before - balance(email)
+            print(f"{mode:8s} {len(lat) / elapsed:9.0f} {np.percentile(lat, 50):8.3f} "
+                  f"{np.percentile(lat, 99):8.3f} {charged:8d} {removed:8d} {charged == removed}")
+        print(ledger.stats())
+    finally:
+        with db_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM ml_user WHERE email=%s", (email,))
+            cur.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""SQLite stand-in for the Postgres database, for benchmarks only.
+
+    import sqlite_db                          # with BENCHMARKS on sys.path
+    sqlite_db.install("/tmp/bench.sqlite3")   # before the first request
+
+Creates the tables from schema.sql and points backend.db's pool at SQLite
+connections that accept the psycopg2-style SQL the backend sends (%s
+placeholders, NOW(), SELECT ... FOR UPDATE, execute_values,
+percentile_cont(ARRAY[...]) WITHIN GROUP (ORDER BY ...)) and return
+TIMESTAMP columns as datetime, like psycopg2. Writes are
+serialized by SQLite, so absolute DB-bound numbers differ from Postgres;
+use it to compare runs on one machine, not to size a deployment.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+from datetime import datetime
+import backend.db
+import backend.usage_log
+from frontend.config import DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_POOL_CHECK_AFTER
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.sql")
+
+
+# Postgres' ordered-set aggregate, rewritten to a two-argument SQLite aggregate
+# whose JSON result the "floats" converter turns back into a list
+PERCENTILE_CONT = re.compile(r"percentile_cont\(ARRAY\[([^\]]*)\]\)\s+WITHIN GROUP\s*\(ORDER BY\s+([^)]+)\)")
+
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("floats", json.loads)
+
+
+def translate(sql):
+    sql = sql.replace("%s", "?").replace("NOW()", "CURRENT_TIMESTAMP")
+    sql = PERCENTILE_CONT.sub(r"percentile_cont(\2, '\1') AS " + '"percentiles [floats]"', sql)
+    return re.sub(r"\s+FOR UPDATE", "", sql)
+
+
+class PercentileCont:
+    """percentile_cont(value, 'f1, f2, ...'): linear interpolation between the closest ranks, as in Postgres."""
+
+    def __init__(self):
+        self.values = []
+        self.fractions = ()
+
+    def step(self, value, fractions):
+        if value is not None:
+            self.values.append(value)
+        self.fractions = [float(f) for f in fractions.split(",")]
+
+    def finalize(self):
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        result = []
+        for fraction in self.fractions:
+            position = fraction * (len(values) - 1)
+            low, high = math.floor(position), math.ceil(position)
+            result.append(values[low] + (values[high] - values[low]) * (position - low))
+        return json.dumps(result)
+
+
+def starts_write(sql):
+    """Writes (and SELECT ... FOR UPDATE) take the write lock when their transaction begins."""
+    return "FOR UPDATE" in sql or not sql.lstrip().upper().startswith("SELECT")
+
+
+class Cursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.raw = conn.raw.cursor()
+        self.itersize = 2000
+
+    def _begin(self, sql):
+        if not self.conn.raw.in_transaction:
+            self.raw.execute("BEGIN IMMEDIATE" if starts_write(sql) else "BEGIN")
+
+    def execute(self, sql, params=()):
+        self._begin(sql)
+        self.raw.execute(translate(sql), tuple(params))
+
+    def executemany(self, sql, rows):
+        self._begin(sql)
+        self.raw.executemany(translate(sql), [tuple(r) for r in rows])
+
+    def fetchone(self):
+        return self.raw.fetchone()
+
+    def fetchall(self):
+        return self.raw.fetchall()
+
+    def fetchmany(self, size=None):
+        return self.raw.fetchmany(size or self.itersize)
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    @property
+    def rowcount(self):
+        return self.raw.rowcount
+
+    def close(self):
+        self.raw.close()
+
+
+class Connection:
+    """The subset of a psycopg2 connection that backend.db and its callers use."""
+
+    def __init__(self, path):
+        # Autocommit mode; Cursor opens each transaction itself
+        self.raw = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+        self.raw.create_aggregate("percentile_cont", 2, PercentileCont)
+        self.raw.execute("PRAGMA journal_mode=WAL")
+        self.raw.execute("PRAGMA synchronous=NORMAL")
+        self.closed = 0
+
+    def cursor(self, name=None):  # named (server-side) cursors are plain cursors here
+        return Cursor(self)
+
+    def commit(self):
+        if self.raw.in_transaction:
+            self.raw.execute("COMMIT")
+
+    def rollback(self):
+        if self.raw.in_transaction:
+            self.raw.execute("ROLLBACK")
+
+    def close(self):
+        self.raw.close()
+        self.closed = 1
+
+
+def execute_values(cur, sql, rows, page_size=100):
+    """psycopg2.extras.execute_values for "... VALUES %s" statements."""
+    if rows:
+        placeholders = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        cur.executemany(sql.replace("VALUES %s", f"VALUES {placeholders}"), rows)
+
+
+def create_schema(path):
+    with open(SCHEMA) as f:
+        ddl = f.read().replace("SERIAL PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+    conn = sqlite3.connect(path)
+    conn.executescript(translate(ddl))
+    conn.close()
+
+
+def install(path):
+    """Create the schema in path and route every backend connection to it."""
+    create_schema(path)
+    backend.db._pool = backend.db.ConnectionPool(DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT,
+                                                 DB_POOL_CHECK_AFTER, connect=lambda: Connection(path))
+    backend.usage_log.execute_values = execute_values
@@ -0,0 +1,101 @@
+import uuid
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from frontend.config import (API_URL, UI_HTTP_POOL_SIZE, UI_MODELS_TTL, UI_ALGORITHMS_TTL, UI_ADMIN_TTL,
+                             UI_UPLOAD_CHUNK_BYTES)
+
+###################### SHARED API CLIENT ######################
+# Streamlit reruns a page's whole script on every widget interaction. The
+# pages share one pooled requests.Session (keep-alive instead of a new
+# connection per call), and read-mostly responses are cached for a few
+# seconds across reruns and browser sessions. A finished training job
+# clears the model list so the new model shows up at once.
+
+
+@st.cache_resource
+def session():
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UI_HTTP_POOL_SIZE)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+###################### CACHED READS ######################
+@st.cache_resource
+def _validators():
+    return {}  # models cursor -> (ETag, body), so an expired page is revalidated, not refetched
+
+
+@st.cache_data(ttl=UI_MODELS_TTL, show_spinner=False)
+def models_page(cursor=None):
+    """One page of GET /models."""
+    known = _validators().get(cursor)
+    r = session().get(f"{API_URL}/models", params={"cursor": cursor} if cursor else {},
+                      headers={"If-None-Match": known[0]} if known else {})
+    if r.status_code == 304:
+        return known[1]
+    body = r.json()
+    if r.headers.get("ETag"):
+        _validators()[cursor] = (r.headers["ETag"], body)
+    return body
+
+
+def clear_models():
+    models_page.clear()
+    _validators().clear()
+
+
+@st.cache_data(ttl=UI_ALGORITHMS_TTL, show_spinner=False)
+def algorithms():
+    return session().get(f"{API_URL}/algorithms").json()["algorithms"]
+
+
+@st.cache_data(ttl=UI_ADMIN_TTL, show_spinner=False)
+def users_summary():
+    return session().get(f"{API_URL}/admin/users/summary").json()
+
+
+@st.cache_data(ttl=UI_ADMIN_TTL, show_spinner=False)
+def users_page(cursor=None):
+    return session().get(f"{API_URL}/admin/users", params={"cursor": cursor} if cursor else {}).json()
+
+
+def clear_admin():
+    users_summary.clear()
+    users_page.clear()
+
+
+###################### STREAMED UPLOAD ######################
+def _multipart(fields, fileobj, filename):
+    """multipart/form-data body as a generator: the file is read and sent in chunks."""
+    boundary = uuid.uuid4().hex
+    filename = filename.replace('"', "%22")
+
+    def body():
+        for name, value in fields.items():
+            yield (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                   f"{value}\r\n").encode()
+        yield (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+               "Content-Type: text/csv\r\n\r\n").encode()
+        fileobj.seek(0)
+        while True:
+            chunk = fileobj.read(UI_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    return body(), f"multipart/form-data; boundary={boundary}"
+
+
+def upload(path, fields, fileobj, filename, token):
+    """POST a form with a CSV file without building the whole request body in memory."""
+    body, content_type = _multipart(fields, fileobj, filename)
+    return session().post(f"{API_URL}{path}", data=body,
+                          headers={**auth(token), "Content-Type": content_type}).json()
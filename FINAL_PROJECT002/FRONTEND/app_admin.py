@@ -1,7 +1,6 @@
 import streamlit as st
-import requests
 import pandas as pd
-from frontend.config import API_URL
+from frontend import api_client as api
 import sys
 import os
 
@@ -11,15 +10,34 @@ if project_root not in sys.path:
 
 st.title("Admin Dashboard")
 
-users = requests.get(f"{API_URL}/admin/users").json()
+# Responses are reused for UI_ADMIN_TTL seconds; Refresh fetches them again
+if st.button("Refresh"):
+    api.clear_admin()
+
+# Aggregates are computed in SQL; only the numbers come back
+summary = api.users_summary()
+cols = st.columns(4)
+cols[0].metric("Users", summary["users"])
+cols[1].metric("Tokens (total)", summary["tokens_total"])
+cols[2].metric("Median tokens", summary["tokens_p50"])
+cols[3].metric("p99 tokens", summary["tokens_p99"])
+
 st.subheader("Users & Tokens")
 
-if isinstance(users, list):
-    st.table(pd.DataFrame(users))
+# One page at a time; cursors of the pages already visited allow going back
+if "admin_cursors" not in st.session_state:
+    st.session_state["admin_cursors"] = [None]
+cursors = st.session_state["admin_cursors"]
 
-elif "users" in users:
-    st.table(pd.DataFrame(users["users"]))
+users = api.users_page(cursors[-1])
 
+st.table(pd.DataFrame(users["users"]))
 
-else:
-    st.table(pd.DataFrame([users]))
\ No newline at end of file
+prev_col, page_col, next_col = st.columns(3)
+page_col.write(f"Page {len(cursors)}")
+if len(cursors) > 1 and prev_col.button("Previous page"):
+    cursors.pop()
+    st.rerun()
+if users.get("next_cursor") and next_col.button("Next page"):
+    cursors.append(users["next_cursor"])
+    st.rerun()
@@ -1,6 +1,6 @@
 import streamlit as st
-import requests
-from config import API_URL
+from frontend import api_client as api
+from frontend.config import API_URL
 
 st.title("User Registration / Login")
 
@@ -37,7 +37,7 @@ with tab1:
             st.warning("Please enter both email and password")
         else:
             try:
-                r = requests.post(
+                r = api.session().post(
                     f"{API_URL}/user/create",
                     data={"email": reg_email, "pwd": reg_pwd}
                 )
@@ -57,7 +57,7 @@ with tab2:
             st.warning("Please enter both email and password")
         else:
             try:
-                r = requests.post(
+                r = api.session().post(
                     f"{API_URL}/user/login",
                     data={"email": log_email, "pwd": log_pwd}
                 )
@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+from frontend import api_client as api
 from frontend.config import API_URL
 
 st.title("Make Predictions")
@@ -9,25 +9,24 @@ if not token:
     st.warning("Please login first")
     st.stop()
 
-headers = {"Authorization": f"Bearer {token}"}
+# Model pages come from the shared client cache; "Load more" adds the next page
+pages = [api.models_page()]
+for cursor in st.session_state.get("models_cursors", []):
+    pages.append(api.models_page(cursor))
 
-# Fetch models
-models = requests.get(f"{API_URL}/models").json()["models"]
+next_cursor = pages[-1]["next_cursor"]
+if next_cursor and st.button("Load more models"):
+    st.session_state.setdefault("models_cursors", []).append(next_cursor)
+    st.rerun()
 
-model_name = st.selectbox("Model Name", models)
+models = [m for page in pages for m in page["models"]]
+algorithms = {m["model_name"]: m["algorithm"] for m in models}
+
+model_name = st.selectbox("Model Name", list(algorithms),
+                          format_func=lambda name: f"{name} ({algorithms[name]})")
 data = st.text_input("Comma-separated input values")
 
 if st.button("Predict"):
-    payload = {"model_name": model_name, "data": data}
-
-    if "knn" in model_name.lower():
-        r = requests.post(f"{API_URL}/predict/knn", data=payload, headers=headers)
-    else:
-        r = requests.post(f"{API_URL}/predict/linearregression", data=payload, headers=headers)
-
+    # The server picks the predictor from the saved model, whatever its algorithm
+    r = api.session().post(f"{API_URL}/models/{model_name}/predict", data={"data": data}, headers=api.auth(token))
     st.write(r.json())
-
-
-
-
-    
\ No newline at end of file
@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+from frontend import api_client as api
 from frontend.config import API_URL
 import sys
 import os
@@ -15,39 +15,45 @@ if not token:
     st.warning("Please login first")
     st.stop()
 
-headers = {"Authorization": f"Bearer {token}"}
-
 model_name = st.text_input("Model Name")
 features = st.text_input("Features (comma-separated)")
 label = st.text_input("Label Column")
 uploaded_file = st.file_uploader("Upload CSV")
 
-algorithm = st.selectbox("Model Type", ["Linear Regression", "KNN"])
-
-if algorithm == "KNN":
-    k = st.number_input("k", min_value=1, value=3)
+# Model types and their parameters come from the server's algorithm registry
+algorithms = api.algorithms()
+titles = {a["title"]: a for a in algorithms}
+algorithm = titles[st.selectbox("Model Type", list(titles))]
+
+params = {}
+for p in algorithm["params"]:
+    if p["choices"]:
+        params[p["name"]] = st.selectbox(p["name"], p["choices"], index=p["choices"].index(p["default"]),
+                                         help=p["help"])
+    elif p["type"] == "int":
+        params[p["name"]] = st.number_input(p["name"], value=p["default"], step=1, help=p["help"])
+    elif p["type"] == "float":
+        params[p["name"]] = st.number_input(p["name"], value=float(p["default"]), help=p["help"])
+    else:
+        params[p["name"]] = st.text_input(p["name"], value=p["default"], help=p["help"])
 
 if st.button("Train Model"):
     if uploaded_file:
-        if algorithm == "Linear Regression":
-            data = {
-                "model_name": model_name,
-                "features": features,
-                "label": label
-            }
-            files = {"file": uploaded_file}
-            r = requests.post(f"{API_URL}/create/linearregression",
-                              data=data, files=files, headers=headers)
-            st.write(r.json())
-
-        else:
-            data = {
-                "model_name": model_name,
-                "features": features,
-                "label": label,
-                "k": k
-            }
-            files = {"file": uploaded_file}
-            r = requests.post(f"{API_URL}/create/knn",
-                              data=data, files=files, headers=headers)
-            st.write(r.json())
+        data = {
+            "model_name": model_name,
+            "features": features,
+            "label": label,
+            **params
+        }
+        # Streamed in chunks rather than copied into one request body
+        res = api.upload(f"/create/{algorithm['name']}", data, uploaded_file, uploaded_file.name, token)
+        st.session_state["job_id"] = res.get("job_id")
+        st.write(res)
+
+# Training runs in the background; poll the last job until it is done
+job_id = st.session_state.get("job_id")
+if job_id and st.button("Check Training Status"):
+    job = api.session().get(f"{API_URL}/jobs/{job_id}", headers=api.auth(token)).json()
+    if job.get("status") == "done":
+        api.clear_models()  # list the new model on the predict page right away
+    st.write(job)
@@ -8,11 +8,121 @@ DB_PASSWORD = "123654789"
 SECRET_KEY = "MY_JWT_SECRET_KEY"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 2
+TOKEN_CACHE_SIZE = 10000   # Verified JWTs kept in memory until they expire
+ARGON2_TIME_COST = 3         # Password hashing passes; changing any ARGON2_* rehashes users at next login
+ARGON2_MEMORY_COST = 65536   # KiB per hash
+ARGON2_PARALLELISM = 4       # Lanes per hash
 API_URL = "http://127.0.0.1:9000"    ##################### DIFFERENT PORT #####################
 
+################ STREAMLIT CLIENT ####################
 
+UI_HTTP_POOL_SIZE = 10             # Keep-alive connections the pages share to API_URL
+UI_MODELS_TTL = 30                 # Seconds a page of GET /models is reused before revalidating
+UI_ALGORITHMS_TTL = 3600           # Seconds the GET /algorithms form schema is reused
+UI_ADMIN_TTL = 10                  # Seconds admin summary / user pages are reused
+UI_UPLOAD_CHUNK_BYTES = 1 << 20    # Training CSVs are streamed to the API in chunks of this size
 
+################ DATABASE POOL ####################
 
+DB_POOL_MIN = 1             # Connections opened when the pool is created
+DB_POOL_MAX = 10            # Upper bound on open connections
+DB_POOL_TIMEOUT = 5         # Seconds to wait for a free connection
+DB_POOL_CHECK_AFTER = 30    # Idle seconds after which a connection is pinged before reuse
 
+################ TOKEN LEDGER ####################
 
+TOKEN_LEASE_BLOCK = 50       # Tokens moved from ml_user into a worker at a time (lost if the worker crashes)
+TOKEN_LEASE_IDLE = 30        # Seconds unused before a lease is returned to ml_user
+TOKEN_FLUSH_INTERVAL = 5     # Seconds between checks for idle leases
+TOKEN_MAX_LEASES = 10000     # Users with a lease held before the oldest are returned early
+TOKEN_SYNC_INTERVAL = 0.5    # Seconds between publishing lease balances to ml_token_lease and answering recalls
+TOKEN_RECALL_TIMEOUT = 3     # Seconds a worker short of tokens waits for other workers to hand back their leases
+TOKEN_LEASE_STALE = 60       # Leases not heartbeated for this long belong to a dead worker and are dropped
 
+################ LOGGING ####################
+
+LOG_QUEUE_SIZE = 10000      # Log records / ml_logs rows buffered before the full-queue policy applies
+LOG_BATCH_SIZE = 500        # ml_logs rows inserted per transaction
+LOG_FLUSH_INTERVAL = 1.0    # Seconds the writer waits for a row before checking again
+LOG_FULL_POLICY = "drop"    # "drop": discard rows when the queue is full, "block": wait LOG_BLOCK_TIMEOUT first
+LOG_BLOCK_TIMEOUT = 0.05
+
+################ MODEL CACHE ####################
+
+MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024   # Loaded models kept in memory, by file size
+
+################ MODEL STORAGE ####################
+
+MODEL_KEEP_VERSIONS = 3    # Saved versions kept per model; older ones are deleted after each save
+
+################ MODEL REGISTRY ####################
+
+MODELS_PAGE_SIZE = 100    # Default page size of GET /models
+MODELS_PAGE_MAX = 1000    # Largest page a client may ask for
+
+################ ADMIN ####################
+
+ADMIN_EMAILS = ()                # Users allowed on admin-only routes (the profiler)
+ADMIN_PAGE_SIZE = 100            # Users per page on the admin dashboard
+ADMIN_PAGE_MAX = 1000            # Largest page of /admin/users a client may ask for
+ADMIN_STREAM_ITERSIZE = 2000     # Rows fetched per round trip when streaming /admin/users
+
+################ PREDICTION RESULT CACHE ####################
+
+PREDICTION_CACHE_ENABLED = False   # Reuse results for repeated (model version, input row) pairs
+PREDICTION_CACHE_SIZE = 100000     # Cached single-row results across all models
+PREDICTION_CACHE_TTL = 300         # Seconds a cached result is served
+
+################ METRICS ####################
+
+METRICS_ENABLED = True   # Request / stage latency histograms served on GET /metrics
+# Histogram bucket upper bounds, in seconds
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILER_ENABLED = False      # Allow /admin/profiler/start (admins only); sampling walks every thread's stack
+PROFILER_INTERVAL = 0.01      # Seconds between stack samples while the profiler runs
+PROFILER_MAX_SECONDS = 300    # The profiler stops itself after this long
+
+################ WARM-UP ####################
+
+WARMUP_ENABLED = False   # Preload recent models at startup; GET /ready answers 503 until done
+WARMUP_MODELS = 20       # Most recently trained models loaded into the model cache
+
+################ BATCH PREDICTION ####################
+
+BATCH_ROWS_PER_CHARGE = 1000   # Every started block of rows costs one prediction (5 tokens)
+BATCH_CHUNK_ROWS = 10000       # Rows per chunk streamed back to the client
+
+################ EXECUTION POOLS ####################
+
+# Max concurrent jobs per work class; extra work waits in the pool's queue
+EXECUTOR_LIMITS = {
+    "train": 2,      # sklearn fit
+    "hash": 4,       # argon2 hash / verify
+    "predict": 8,    # model.predict
+    "io": 16,        # database, CSV parsing, model files
+    "tune": 2,       # tuning coordinators (their CV folds run on "train")
+}
+EXECUTOR_PROCESS_CLASSES = ("train", "hash")   # Work classes run in processes instead of threads
+# Max calls queued or running per work class; more are refused (login/register answer BUSY)
+EXECUTOR_QUEUE_LIMITS = {"hash": 64}
+
+################ TRAINING JOBS ####################
+
+JOB_QUEUE_DEPTH = 20            # Max training jobs queued or running; EXECUTOR_LIMITS["train"] run at once
+JOB_RETENTION_SECONDS = 3600    # How long finished jobs stay visible on /jobs/{id}
+APPEND_RETRIES = 3              # Times an append reruns on the newer version when another save got there first
+
+################ CSV INGESTION ####################
+
+INGEST_CHUNK_ROWS = 100000   # Rows parsed per chunk when reading training uploads
+INGEST_FLOAT32 = False       # Parse features as float32 to halve memory (KNN keeps the matrix)
+
+################ TUNING ####################
+
+TUNE_MAX_FOLDS = 10     # Largest k for k-fold cross-validation on /tune/*
+TUNE_MAX_GRID = 200     # Largest number of parameter combinations per tuning job
+
+################ KNN INDEX ####################
+
+KNN_LEAF_SIZE = 30   # Default leaf size for kd_tree / ball_tree indexes
+KNN_N_PROBE = 8      # Default number of cells an "ivf" index scans per query
@@ -18,3 +18,20 @@ CREATE TABLE IF NOT EXISTS ml_logs (
     model_name VARCHAR(255),
     timestamp TIMESTAMP DEFAULT NOW()
 );
+
+-- Tokens each API worker has leased from ml_user (backend/ledger.py). Balances
+-- shown to users add these back; recall asks the holder to return its lease.
+CREATE TABLE IF NOT EXISTS ml_token_lease (
+    email VARCHAR(255) REFERENCES ml_user(email) ON DELETE CASCADE,
+    holder VARCHAR(100),
+    tokens INT NOT NULL,
+    recall BOOLEAN DEFAULT FALSE,
+    synced_at DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (email, holder)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ml_token_lease_holder ON ml_token_lease (holder);
+
+-- GET /models filters by owner or algorithm and pages in model_name order
+CREATE INDEX IF NOT EXISTS idx_ml_models_owner ON ml_models (owner_email, model_name);
+CREATE INDEX IF NOT EXISTS idx_ml_models_algorithm ON ml_models (algorithm, model_name);
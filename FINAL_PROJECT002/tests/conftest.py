@@ -0,0 +1,38 @@
+import importlib.util
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "BENCHMARKS"))  # sqlite_db
+
+# The packages live in BACKEND/ and FRONTEND/ but are imported as backend /
+# frontend, which only resolves on a case-insensitive filesystem
+for package in ("backend", "frontend"):
+    if importlib.util.find_spec(package) is None:
+        path = os.path.join(ROOT, package.upper())
+        spec = importlib.util.spec_from_file_location(package, os.path.join(path, "__init__.py"),
+                                                      submodule_search_locations=[path])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[package] = module
+        spec.loader.exec_module(module)
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    """Route backend.db to a fresh SQLite database with the schema; returns its path."""
+    import sqlite_db
+    path = str(tmp_path / "test.sqlite3")
+    sqlite_db.install(path)
+    return path
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Save and load models under a temporary MODELS_DIR."""
+    import backend.models
+    path = str(tmp_path / "models")
+    os.makedirs(path)
+    monkeypatch.setattr(backend.models, "MODELS_DIR", path)
+    return path
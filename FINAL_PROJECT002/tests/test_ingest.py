@@ -0,0 +1,74 @@
+import io
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from backend.ingest import LinearStats, linear_model_from_stats, read_chunks, fit_linear_streaming
+
+
+def data(n=3000, features=4, offset=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, features)) * [1.0, 10.0, 0.1, 1000.0][:features] + offset
+    y = X @ rng.normal(size=features) + 3.0 + rng.normal(scale=0.1, size=n)
+    return X, y
+
+
+def accumulate(X, y, chunk_rows):
+    stats = LinearStats(X.shape[1])
+    for start in range(0, len(X), chunk_rows):
+        stats.update(X[start:start + chunk_rows], y[start:start + chunk_rows])
+    return stats
+
+
+@pytest.mark.parametrize("offset", [0.0, 1e6])
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1000, 5000])
+def test_linear_stats_match_sklearn(offset, chunk_rows):
+    X, y = data(offset=offset)
+    reference = LinearRegression().fit(X, y)
+    coef, intercept = accumulate(X, y, chunk_rows).solve()
+    np.testing.assert_allclose(coef, reference.coef_, rtol=1e-6, atol=1e-8)
+    assert intercept == pytest.approx(reference.intercept_, rel=1e-6, abs=1e-6)
+
+
+@pytest.mark.parametrize("alpha", [0.1, 10.0])
+def test_linear_stats_match_ridge(alpha):
+    X, y = data()
+    reference = Ridge(alpha=alpha).fit(X, y)
+    model = linear_model_from_stats(accumulate(X, y, 256), ["a", "b", "c", "d"], alpha)
+    assert isinstance(model, Ridge)
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-6, atol=1e-8)
+    assert model.intercept_ == pytest.approx(reference.intercept_, rel=1e-6)
+
+
+def test_linear_stats_empty():
+    stats = LinearStats(2)
+    stats.update(np.empty((0, 2)), np.empty(0))
+    with pytest.raises(ValueError, match="no data rows"):
+        stats.solve()
+
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, -np.inf])
+def test_linear_stats_reject_non_finite(bad):
+    X, y = data(n=20)
+    stats = LinearStats(X.shape[1])
+    stats.update(X[:10], y[:10])
+    X[13, 2] = bad
+    with pytest.raises(ValueError, match="first at data row 14"):
+        stats.update(X[10:], y[10:])
+    y[13] = bad
+    with pytest.raises(ValueError, match="NaN or infinite"):
+        LinearStats(X.shape[1]).update(X[:5], y[10:15])
+
+
+def test_read_chunks_reject_blank_cells():
+    csv = "a,b,y\n" + "".join(f"{i},{i * 2},{i * 3}\n" for i in range(10)) + "1,,3\n"
+    with pytest.raises(ValueError, match=r"1 rows, first at data row 11"):
+        list(read_chunks(io.StringIO(csv), ["a", "b"], "y", chunk_rows=4))
+
+
+def test_fit_linear_streaming():
+    X, y = data(n=500, features=2)
+    csv = "a,b,y\n" + "".join(",".join(repr(float(v)) for v in row) + "\n" for row in np.column_stack([X, y]))
+    model = fit_linear_streaming(io.StringIO(csv), ["a", "b"], "y", chunk_rows=64, float32=False)
+    reference = LinearRegression().fit(X, y)
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-6)
+    assert list(model.feature_names_in_) == ["a", "b"]
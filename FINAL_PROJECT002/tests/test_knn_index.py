@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsRegressor
+from backend.knn_index import IVFKNNRegressor, build_knn
+
+
+def data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    return X, X.sum(axis=1) + rng.normal(scale=0.1, size=n)
+
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_full_probe_is_exact(weights):
+    X, y = data(2000)
+    Q, _ = data(50, seed=1)
+    model = IVFKNNRegressor(n_neighbors=5, n_probe=10 ** 6, weights=weights).fit(X, y)
+    exact = KNeighborsRegressor(n_neighbors=5, weights=weights, algorithm="brute").fit(X, y)
+    np.testing.assert_allclose(model.predict(Q), exact.predict(Q))
+    np.testing.assert_array_equal(np.sort(model.kneighbors(Q)[1], axis=1),
+                                  np.sort(exact.kneighbors(Q)[1], axis=1))
+
+
+def test_partial_fit_adds_rows_to_the_index():
+    X, y = data(3200)
+    model = IVFKNNRegressor(n_neighbors=5, n_lists=20, n_probe=20).fit(X[:2000], y[:2000])
+    centroids = model.centroids_.copy()
+    for start in (2000, 2600):
+        model.partial_fit(X[start:start + 600], y[start:start + 600])
+    model.partial_fit(X[:0], y[:0])  # no rows: unchanged
+
+    np.testing.assert_array_equal(model.centroids_, centroids)  # no k-means rerun
+    assert len(model.X_) == 3200 and model.offsets_[-1] == 3200
+    # index_ maps the cell-sorted rows back to the order they were added in
+    assert sorted(model.index_) == list(range(3200))
+    np.testing.assert_array_equal(model.X_, X[model.index_])
+    np.testing.assert_array_equal(model.y_, y[model.index_])
+    # Every row sits in the cell of its nearest centroid
+    cells = np.repeat(np.arange(20), np.diff(model.offsets_))
+    nearest = ((model.X_[:, None, :] - centroids[None]) ** 2).sum(axis=2).argmin(axis=1)
+    np.testing.assert_array_equal(cells, nearest)
+    # Probing every cell, predictions match an exact search over all the rows
+    Q, _ = data(50, seed=1)
+    exact = KNeighborsRegressor(n_neighbors=5, algorithm="brute").fit(X, y)
+    np.testing.assert_allclose(model.predict(Q), exact.predict(Q))
+    np.testing.assert_array_equal(np.sort(model.kneighbors(Q)[1], axis=1),
+                                  np.sort(exact.kneighbors(Q)[1], axis=1))
+
+
+def test_partial_fit_keeps_float32():
+    X, y = data(500)
+    model = IVFKNNRegressor(n_neighbors=3).fit(X.astype(np.float32), y)
+    model.partial_fit(X[:10].astype(np.float32), y[:10])
+    assert model.X_.dtype == np.float32
+    model.partial_fit(X[:10], y[:10])  # float64 rows widen the index instead of losing precision
+    assert model.X_.dtype == np.float64 and len(model.X_) == 520
+
+
+def test_build_knn():
+    assert isinstance(build_knn({"k": 4, "index": "ivf"}), IVFKNNRegressor)
+    assert isinstance(build_knn({"k": 4, "index": "kd_tree"}), KNeighborsRegressor)
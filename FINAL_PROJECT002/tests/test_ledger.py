@@ -0,0 +1,128 @@
+import threading
+import pytest
+from backend.db import db_conn
+from backend.ledger import TokenLedger, BALANCE_SQL
+
+
+def query(sql, *params):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        cur.close()
+    return rows
+
+
+def user(email, tokens):
+    query("INSERT INTO ml_user (email, pwd, tokens) VALUES (%s, 'x', %s)", email, tokens)
+
+
+def balances(email):
+    """(tokens in ml_user, full balance including leases)"""
+    return query(f"SELECT u.tokens, {BALANCE_SQL} FROM ml_user u WHERE u.email=%s", email)[0]
+
+
+@pytest.fixture
+def ledgers(sqlite):
+    """Two ledgers on one database, like two API worker processes."""
+    made = [TokenLedger(50, 3600, 3600, 100, sync_interval=0.05, recall_timeout=3) for _ in range(2)]
+    yield made
+    for ledger in made:
+        ledger.shutdown()
+
+
+def test_single_ledger_conserves_tokens(ledgers):
+    a, _ = ledgers
+    user("u", 1000)
+    assert all(a.use("u", 7) for _ in range(100))
+    a.sync()  # lease balances are published on the sync timer
+    assert balances("u")[1] == 1000 - 700  # leased tokens are still counted
+    a.shutdown()
+    assert balances("u") == (300, 300)
+    assert query("SELECT COUNT(*) FROM ml_token_lease")[0][0] == 0
+
+
+def test_tokens_leased_by_another_ledger_are_recalled(ledgers):
+    a, b = ledgers
+    user("u", 100)
+    assert a.use("u", 5)  # a leases a block and holds most of the balance
+    assert balances("u")[1] == 95
+    # b can spend everything, including what a had leased
+    assert sum(b.use("u", 5) for _ in range(19)) == 19
+    assert not b.use("u", 5)
+    assert not a.use("u", 5)
+    a.shutdown()
+    b.shutdown()
+    assert balances("u") == (0, 0)
+    assert b.stats()["recalls_sent"] >= 1 and a.stats()["recalls_answered"] >= 1
+
+
+def test_no_refusal_while_tokens_remain(ledgers):
+    a, b = ledgers
+    user("u", 15)
+    assert a.use("u", 5)
+    assert b.use("u", 5)
+    assert b.use("u", 5)
+    assert not a.use("u", 5) and not b.use("u", 5)
+    a.shutdown()
+    b.shutdown()
+    assert balances("u") == (0, 0)
+
+
+def test_debit_over_the_whole_balance_moves_nothing(ledgers):
+    a, b = ledgers
+    user("u", 150)
+    assert not a.use("u", 5000)
+    assert balances("u") == (150, 150)
+    assert b.use("u", 100)
+    # Same with a lease already held: it stays published and can still be recalled
+    assert a.use("u", 5)
+    assert not a.use("u", 5000)
+    a.sync()
+    assert balances("u")[1] == 45
+    assert sum(b.use("u", 5) for _ in range(9)) == 9
+    a.shutdown()
+    b.shutdown()
+    assert balances("u") == (0, 0)
+
+
+def test_published_lease_row_comes_back(ledgers):
+    a, _ = ledgers
+    user("u", 1000)
+    assert a.use("u", 10)
+    query("DELETE FROM ml_token_lease")  # e.g. dropped as stale
+    a.use("u", 10)
+    a.sync()
+    assert balances("u")[1] == 980
+
+
+def test_concurrent_ledgers_conserve_tokens(ledgers):
+    start, amount = 2000, 3
+    user("u", start)
+    debits = [0] * 8
+    refused_then_debited = []
+
+    def worker(i, ledger):
+        refused = False
+        while True:
+            if ledger.use("u", amount):
+                debits[i] += 1
+                if refused:
+                    refused_then_debited.append(i)
+            elif refused:
+                return
+            else:
+                refused = True  # asking again must be refused too
+
+    threads = [threading.Thread(target=worker, args=(i, ledgers[i % 2])) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for ledger in ledgers:
+        ledger.shutdown()
+    assert refused_then_debited == []  # a refusal was final: nothing was left to spend
+    tokens, total = balances("u")
+    assert tokens == total == start - amount * sum(debits)
+    assert tokens < amount  # every token that could be spent was
+    assert sum(ledger.stats()["debits"] for ledger in ledgers) == sum(debits)
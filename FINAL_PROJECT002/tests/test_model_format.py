@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.neighbors import KNeighborsRegressor
+from backend.ingest import LinearStats, linear_model_from_stats
+from backend.knn_index import IVFKNNRegressor
+from backend.model_format import HEADER, MMAP_MIN_BYTES, write_model, read_model, supports
+
+META = {"features": ["a", "b", "c"], "label": "y", "algorithm": "test"}
+
+
+def data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    return X, X @ [1.0, -2.0, 0.5] + rng.normal(scale=0.1, size=n)
+
+
+def round_trip(tmp_path, model):
+    path = str(tmp_path / "model")
+    write_model(path, model, META)
+    loaded, meta = read_model(path)
+    assert meta == META
+    assert type(loaded) is type(model)
+    return loaded, path
+
+
+@pytest.mark.parametrize("model", [LinearRegression(), Ridge(alpha=2.0),
+                                   KNeighborsRegressor(n_neighbors=4, weights="distance"),
+                                   KNeighborsRegressor(n_neighbors=3, algorithm="brute"),
+                                   IVFKNNRegressor(n_neighbors=3, n_probe=2)])
+def test_round_trip_predicts_the_same(tmp_path, model):
+    X, y = data()
+    model.fit(X, y)
+    assert supports(model)
+    loaded, _ = round_trip(tmp_path, model)
+    np.testing.assert_allclose(loaded.predict(X[:50]), model.predict(X[:50]))
+
+
+def test_linear_keeps_stats_and_feature_names(tmp_path):
+    X, y = data()
+    stats = LinearStats(3)
+    stats.update(X, y)
+    model = linear_model_from_stats(stats, META["features"])
+    loaded, path = round_trip(tmp_path, model)
+    assert os.listdir(path) == [HEADER]  # small arrays are inlined
+    assert list(loaded.feature_names_in_) == META["features"]
+    assert loaded.stats_.n == stats.n
+    np.testing.assert_array_equal(loaded.stats_.sxx, stats.sxx)
+    np.testing.assert_array_equal(loaded.stats_.shift_x, stats.shift_x)
+    # Appending to the loaded statistics fits the same as one pass over all rows
+    X2, y2 = data(seed=1)
+    loaded.stats_.update(X2, y2)
+    stats.update(X2, y2)
+    np.testing.assert_allclose(loaded.stats_.solve()[0], stats.solve()[0])
+
+
+def test_large_arrays_are_memory_mapped(tmp_path):
+    X, y = data(n=MMAP_MIN_BYTES // 24 + 1000)
+    model = IVFKNNRegressor(n_neighbors=3).fit(X, y)
+    loaded, path = round_trip(tmp_path, model)
+    assert "X.npy" in os.listdir(path)
+    assert isinstance(loaded.X_, np.memmap)
+    assert not loaded.X_.flags.writeable
+    np.testing.assert_allclose(loaded.predict(X[:20]), model.predict(X[:20]))
+
+
+def test_unsupported_format_version(tmp_path):
+    X, y = data()
+    path = str(tmp_path / "model")
+    write_model(path, LinearRegression().fit(X, y), META)
+    with open(os.path.join(path, HEADER)) as f:
+        header = f.read()
+    with open(os.path.join(path, HEADER), "w") as f:
+        f.write(header.replace('"format": 1', '"format": 99'))
+    with pytest.raises(ValueError, match="Unsupported model format 99"):
+        read_model(path)
@@ -0,0 +1,110 @@
+import os
+import pickle
+import threading
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeRegressor
+import backend.models as models
+from backend.ingest import LinearStats, linear_model_from_stats
+from backend.knn_index import IVFKNNRegressor
+from backend.model_format import write_model
+from frontend.config import MODEL_KEEP_VERSIONS
+
+META = {"features": ["a", "b"], "label": "y", "algorithm": "linearregression"}
+
+
+@pytest.fixture
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 2))
+    y = X.sum(axis=1)
+    stats = LinearStats(2)
+    stats.update(X, y)
+    return X, linear_model_from_stats(stats, META["features"]), IVFKNNRegressor(n_neighbors=3).fit(X, y)
+
+
+def versions(models_dir, name):
+    return sorted(e for e in os.listdir(os.path.join(models_dir, name)) if e.startswith("v"))
+
+
+def test_save_publishes_a_new_version(models_dir, fitted):
+    _, linear, knn = fitted
+    assert models.save_model("m", linear, {**META, "i": 0}) == "v000001"
+    assert models.load_model("m")[1]["i"] == 0
+    assert models.save_model("m", knn, {**META, "i": 1}) == "v000002"
+    model, meta = models.load_model("m")  # the cached v000001 is not served
+    assert isinstance(model, IVFKNNRegressor) and meta["i"] == 1
+    assert models.current_version("m") == "v000002"
+
+
+def test_old_versions_are_collected(models_dir, fitted):
+    _, linear, _ = fitted
+    for i in range(MODEL_KEEP_VERSIONS + 3):
+        models.save_model("m", linear, {**META, "i": i})
+    assert versions(models_dir, "m") == [f"v{i:06d}" for i in range(4, MODEL_KEEP_VERSIONS + 4)]
+
+
+@pytest.mark.parametrize("legacy", ["pickle", "native"])
+def test_legacy_layouts_move_to_versions(models_dir, fitted, legacy):
+    _, linear, _ = fitted
+    if legacy == "pickle":
+        for path, obj in ((f"{models_dir}/old.pkl", linear), (f"{models_dir}/old_meta.pkl", META)):
+            with open(path, "wb") as f:
+                pickle.dump(obj, f)
+    else:
+        write_model(f"{models_dir}/old", linear, META)
+    assert models.load_model("old")[1] == META
+    assert models.save_model("old", linear, {**META, "i": 1}) == "v000001"
+    assert models.load_model("old")[1]["i"] == 1
+    assert not os.path.exists(f"{models_dir}/old.pkl")
+    assert not os.path.exists(f"{models_dir}/old/header.json")
+
+
+def test_unsupported_estimators_are_pickled(models_dir, fitted):
+    X, _, _ = fitted
+    tree = DecisionTreeRegressor().fit(X, X.sum(axis=1))
+    version = models.save_model("tree", tree, META)
+    assert sorted(os.listdir(f"{models_dir}/tree/{version}")) == ["meta.pkl", "model.pkl"]
+    assert isinstance(models.load_model("tree")[0], DecisionTreeRegressor)
+
+
+def test_concurrent_saves_and_loads(models_dir, fitted):
+    _, linear, knn = fitted
+    models.save_model("c", linear, {**META, "writer": -1, "i": 0})
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                models.model_cache.invalidate("c")
+                model, meta = models.load_model("c")
+                # model and metadata always come from the same version
+                assert isinstance(model, IVFKNNRegressor) == (meta["i"] % 2 == 1)
+            except Exception as e:
+                errors.append(repr(e))
+
+    def writer(k):
+        for i in range(15):
+            try:
+                models.save_model("c", knn if i % 2 else linear, {**META, "writer": k, "i": i})
+            except Exception as e:
+                errors.append(repr(e))
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(k,)) for k in range(4)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert errors == []
+    kept = versions(models_dir, "c")
+    # CURRENT only moves forward, so it names the newest version, which was never collected
+    assert models.current_version("c") == kept[-1] == "v000061"
+    assert len(kept) == MODEL_KEEP_VERSIONS
+    assert not [e for e in os.listdir(f"{models_dir}/c") if e.startswith(models.TMP_PREFIX)]
+    assert models.load_model("c")[1]["i"] == 14
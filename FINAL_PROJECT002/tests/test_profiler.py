@@ -0,0 +1,33 @@
+import pytest
+from fastapi.testclient import TestClient
+import backend.authorize as authorize
+import backend.final_project002 as api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(authorize, "ADMIN_EMAILS", ("admin@example.com",))
+    yield TestClient(api.app)
+    api.profiler.stop()
+
+
+def bearer(email):
+    return {"Authorization": f"Bearer {authorize.create_token({'sub': email})}"}
+
+
+def test_profiler_needs_an_admin(client):
+    for method, path in (("get", "/admin/profiler"), ("post", "/admin/profiler/start"),
+                         ("post", "/admin/profiler/stop")):
+        assert getattr(client, method)(path).status_code == 401
+        assert getattr(client, method)(path, headers=bearer("user@example.com")).status_code == 403
+    assert not api.profiler.status()["running"]
+
+
+def test_profiler_is_off_unless_enabled(client, monkeypatch):
+    admin = bearer("admin@example.com")
+    body = client.post("/admin/profiler/start", headers=admin).json()
+    assert body["status"] == "FAIL" and "PROFILER_ENABLED" in body["reason"]
+    monkeypatch.setattr(api, "PROFILER_ENABLED", True)
+    assert client.post("/admin/profiler/start", params={"seconds": 5}, headers=admin).json()["status"] == "OK"
+    assert client.get("/admin/profiler", headers=admin).json()["running"]
+    assert client.post("/admin/profiler/stop", headers=admin).status_code == 200
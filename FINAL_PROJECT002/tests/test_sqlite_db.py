@@ -0,0 +1,41 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import backend.final_project002 as api
+from backend.db import db_conn
+
+
+def execute(sql, rows):
+    with db_conn() as conn:
+        cur = conn.cursor()
+        cur.executemany(sql, rows)
+        cur.close()
+
+
+@pytest.fixture
+def client(sqlite):
+    return TestClient(api.app)
+
+
+def test_models_page_has_timestamps(client):
+    execute("INSERT INTO ml_user (email, pwd, tokens) VALUES (%s, 'x', 10)", [("a@example.com",)])
+    execute("INSERT INTO ml_models (model_name, owner_email, algorithm) VALUES (%s, %s, %s)",
+            [(f"m{i}", "a@example.com", "knn") for i in range(3)])
+    rows = api.fetch_models(None, None, None, 10)
+    assert all(isinstance(created, datetime) for *_, created in rows)
+    body = client.get("/models").json()
+    assert [m["model_name"] for m in body["models"]] == ["m0", "m1", "m2"]
+    assert datetime.fromisoformat(body["models"][0]["created_at"]) <= datetime.utcnow()
+
+
+def test_user_summary_percentiles_match_postgres(client):
+    assert client.get("/admin/users/summary").json()["tokens_p50"] is None  # no users: NULL, like Postgres
+    tokens = [3, 1, 4, 1, 5, 9, 2, 6, 5, 35, 8]
+    execute("INSERT INTO ml_user (email, pwd, tokens) VALUES (%s, 'x', %s)",
+            [(f"u{i}@example.com", t) for i, t in enumerate(tokens)])
+    body = client.get("/admin/users/summary").json()
+    assert body["users"] == len(tokens) and body["tokens_total"] == sum(tokens)
+    # percentile_cont interpolates linearly between ranks, as numpy's default does
+    expected = np.percentile(tokens, [50, 90, 99])
+    assert [body["tokens_p50"], body["tokens_p90"], body["tokens_p99"]] == pytest.approx(expected)
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import backend.models as models
+import backend.training as training
+from backend.ingest import LinearStats, linear_model_from_stats
+from backend.jobs import JobQueue, ModelBusy
+from frontend.config import APPEND_RETRIES
+
+META = {"features": ["a", "b"], "label": "y", "algorithm": "linearregression"}
+
+
+def linear(n, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 2))
+    stats = LinearStats(2)
+    stats.update(X, X.sum(axis=1))
+    return linear_model_from_stats(stats, META["features"])
+
+
+@pytest.fixture
+def delta(tmp_path):
+    rng = np.random.default_rng(9)
+    X = rng.normal(size=(30, 2))
+    path = str(tmp_path / "delta.csv")
+    pd.DataFrame({"a": X[:, 0], "b": X[:, 1], "y": X.sum(axis=1)}).to_csv(path, index=False)
+    return path
+
+
+def append(path):
+    return training.run_append_job("job", {}, path, "linearregression", "m", META["features"], "y", {})
+
+
+def test_save_with_expect_refuses_a_moved_version(models_dir):
+    first = models.save_model("m", linear(50, 0), META)
+    models.save_model("m", linear(60, 1), META)
+    with pytest.raises(models.VersionConflict):
+        models.save_model("m", linear(70, 2), META, expect=first)
+    assert models.load_model("m")[0].stats_.n == 60
+    assert sorted(e for e in os.listdir(f"{models_dir}/m") if e.startswith("v")) == ["v000001", "v000002"]
+    assert models.save_model("m", linear(70, 2), META, expect="v000002") == "v000003"  # the discarded number is reused
+
+
+def test_append_reruns_on_the_newer_version(models_dir, delta, monkeypatch):
+    models.save_model("m", linear(50, 0), META)
+    real = training.load_versioned_model
+    calls = []
+
+    def load_then_race(name):
+        loaded = real(name)
+        calls.append(loaded[2])
+        if len(calls) == 1:  # another worker retrains the model while this append runs
+            models.save_model(name, linear(100, 1), META)
+        return loaded
+
+    monkeypatch.setattr(training, "load_versioned_model", load_then_race)
+    result = append(delta)
+    assert calls == ["v000001", "v000002"]
+    assert result == {"version": "v000003"}
+    # The rows went into the retrained model instead of overwriting it
+    assert models.load_model("m")[0].stats_.n == 130
+
+
+def test_append_gives_up_after_retries(models_dir, delta, monkeypatch):
+    models.save_model("m", linear(50, 0), META)
+    real = training.load_versioned_model
+
+    def load_then_race(name):
+        loaded = real(name)
+        models.save_model(name, linear(100, 1), META)
+        return loaded
+
+    monkeypatch.setattr(training, "load_versioned_model", load_then_race)
+    with pytest.raises(models.VersionConflict):
+        append(delta)
+    assert models.load_model("m")[0].stats_.n == 100
+    assert models.current_version("m") == f"v{APPEND_RETRIES + 2:06d}"  # only the competing saves were published
+
+
+def test_one_job_per_model():
+    queue = JobQueue(10)
+    queue.reserve("m")
+    with pytest.raises(ModelBusy):
+        queue.reserve("m")
+    queue.reserve("other")
+    queue.release("m")
+    queue.reserve("m")
+    assert queue.active == 2